@@ -7,12 +7,29 @@ import logging
 # Load environment variables from .env file
 load_dotenv()
 
-def get_accounts_for_budget(budget_id):
+# Fields the projection engine reads from an account
+PROJECTION_ACCOUNT_FIELDS = ("name", "balance")
+
+def get_accounts_for_budget(budget_id, fields=None, batch_size=500):
+    """
+    Fetch the accounts of a budget from localaccounts.
+
+    Args:
+        budget_id: ObjectId of the budget
+        fields: Optional field names to return. Documents are then returned
+            without _id, so the recursive ObjectId conversion is skipped
+        batch_size: Number of documents per cursor batch
+    """
     query = {
         "budgetId": budget_id
     }
+    if fields:
+        projection = dict.fromkeys(fields, 1)
+        projection["_id"] = 0
+        return list(get_DB().localaccounts.find(query, projection, batch_size=batch_size))
+
     # Execute the query and retrieve categories from localcategories
-    accounts = get_DB().localaccounts.find(query)
+    accounts = get_DB().localaccounts.find(query, batch_size=batch_size)
     account_list = []
     for account in accounts:
         account_list.append(convert_objectid_to_str(account))
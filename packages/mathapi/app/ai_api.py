@@ -1,33 +1,252 @@
 import os
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("AI_OPENAI_API_KEY"))
+import re
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, AsyncOpenAI
+from app.rate_limit import openai_limiter
+from app.metrics import external_call
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Fetch the YNAB access token and base URL
+logger = logging.getLogger(__name__)
 
-def suggest_category(transaction, categories):
-    """Suggest a category for a transaction using OpenAI."""
-    category_names = ", ".join([category["name"] for category in categories])
-    prompt = f"""
-    Suggest the most suitable category for the following transaction based on these available categories: {category_names}.
-    Special cases:
+AI_OPENAI_MODEL = os.getenv("AI_OPENAI_MODEL", "gpt-4")
+# Transactions categorized per chat completion
+SUGGEST_BATCH_SIZE = int(os.getenv("SUGGEST_BATCH_SIZE", "25"))
+# Batch requests in flight at once per categorization
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "5"))
+
+SPECIAL_CASES = """Special cases:
     - 'Afrekening op" means kbc krediet.
     - Kbc business => Unexpected
-    - Ava => Unexpected
+    - Ava => Unexpected"""
+
+_client = None
+_async_client = None
+
+def get_client():
+    """OpenAI client, created on first use so importing the app needs no API key."""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("AI_OPENAI_API_KEY"))
+    return _client
+
+def get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=os.getenv("AI_OPENAI_API_KEY"))
+    return _async_client
+
+def prompt_amount(transaction):
+    """Amount of a transaction as shown to the model: YNAB milliunits converted to currency units."""
+    return transaction["amount"] / 1000
+
+def category_prompt(transaction, categories):
+    """Build the prompt asking for the category of one transaction, with the amount in currency units."""
+    category_names = ", ".join([category["name"] for category in categories])
+    return f"""
+    Suggest the most suitable category for the following transaction based on these available categories: {category_names}.
+    {SPECIAL_CASES}
     Transaction Details:
     - Description: {transaction['payee_name']}
-    - Amount: {transaction['amount']}
+    - Amount: {prompt_amount(transaction)}
     - Date: {transaction['date']}
 
     Return only the name of the category.
     """
-    print(prompt)
-    response = client.chat.completions.create(model="gpt-4",
-    messages=[{"role": "user", "content": prompt}],
-    temperature=0.2)
-    print(response.choices[0].message.content.strip())
-    return response.choices[0].message.content.strip()
+
+def batch_prompt(transactions, categories):
+    """
+    Build one prompt asking for the categories of several transactions.
+
+    The category list and special cases are sent once per batch; transactions
+    are listed one JSON object per line, with amounts in currency units.
+    """
+    category_names = ", ".join([category["name"] for category in categories])
+    lines = "\n".join(
+        json.dumps({
+            "id": transaction["id"],
+            "description": transaction.get("payee_name"),
+            "amount": prompt_amount(transaction),
+            "date": transaction.get("date"),
+        }, ensure_ascii=False)
+        for transaction in transactions
+    )
+    return f"""
+    Suggest the most suitable category for each of the following transactions based on these available categories: {category_names}.
+    {SPECIAL_CASES}
+    Transactions (one JSON object per line):
+{lines}
+
+    Return only a JSON object mapping every transaction id to the name of its category.
+    """
+
+def parse_batch_response(content, transactions):
+    """
+    Parse the JSON object returned for a batch prompt.
+
+    Args:
+        content: The model's answer; a surrounding Markdown code fence is ignored
+        transactions: The transactions of the batch
+
+    Returns:
+        Dictionary of transaction id to category name, for the ids of the batch
+        that have a non-empty string answer
+
+    Raises:
+        ValueError: If the answer is not a JSON object
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+    try:
+        answer = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Batch response is not valid JSON: {e}")
+    if not isinstance(answer, dict):
+        raise ValueError("Batch response is not a JSON object")
+
+    suggestions = {}
+    for transaction in transactions:
+        name = answer.get(transaction["id"])
+        if isinstance(name, str) and name.strip():
+            suggestions[transaction["id"]] = name.strip()
+    return suggestions
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), max(1, size))]
+
+def _complete(prompt):
+    openai_limiter.acquire()
+    with external_call("openai"):
+        response = get_client().chat.completions.create(model=AI_OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2)
+    return response.choices[0].message.content
+
+async def _complete_async(prompt):
+    await openai_limiter.acquire_async()
+    with external_call("openai"):
+        response = await get_async_client().chat.completions.create(model=AI_OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2)
+    return response.choices[0].message.content
+
+def suggest_category(transaction, categories):
+    """Suggest a category for a transaction using OpenAI."""
+    suggestion = _complete(category_prompt(transaction, categories)).strip()
+    logger.debug("Suggested category for %s: %s", transaction.get("id"), suggestion)
+    return suggestion
+
+async def suggest_category_async(transaction, categories):
+    """Async suggest_category, for the ASGI app."""
+    suggestion = (await _complete_async(category_prompt(transaction, categories))).strip()
+    logger.debug("Suggested category for %s: %s", transaction.get("id"), suggestion)
+    return suggestion
+
+def _suggest_batch(transactions, categories):
+    """
+    Categorize one batch; transactions the answer does not cover are retried in
+    two halves, down to the single-transaction prompt.
+    """
+    if len(transactions) == 1:
+        return {transactions[0]["id"]: suggest_category(transactions[0], categories)}
+    try:
+        suggestions = parse_batch_response(_complete(batch_prompt(transactions, categories)), transactions)
+    except ValueError as e:
+        logger.warning("Splitting a batch of %d transactions: %s", len(transactions), e)
+        suggestions = {}
+
+    missing = [transaction for transaction in transactions if transaction["id"] not in suggestions]
+    if missing:
+        half = (len(missing) + 1) // 2
+        for part in (missing[:half], missing[half:]):
+            if part:
+                suggestions.update(_suggest_batch(part, categories))
+    return suggestions
+
+async def _suggest_batch_async(transactions, categories):
+    """Async _suggest_batch."""
+    if len(transactions) == 1:
+        return {transactions[0]["id"]: await suggest_category_async(transactions[0], categories)}
+    try:
+        suggestions = parse_batch_response(
+            await _complete_async(batch_prompt(transactions, categories)), transactions
+        )
+    except ValueError as e:
+        logger.warning("Splitting a batch of %d transactions: %s", len(transactions), e)
+        suggestions = {}
+
+    missing = [transaction for transaction in transactions if transaction["id"] not in suggestions]
+    if missing:
+        half = (len(missing) + 1) // 2
+        for part in await asyncio.gather(*(
+            _suggest_batch_async(part, categories) for part in (missing[:half], missing[half:]) if part
+        )):
+            suggestions.update(part)
+    return suggestions
+
+def _suggest_batch_safely(batch, categories):
+    try:
+        return batch, _suggest_batch(batch, categories), None
+    except Exception as e:
+        logger.warning("Categorizing a batch of %d transactions failed: %s", len(batch), e)
+        return batch, {}, e
+
+def iter_suggest_categories(transactions, categories, batch_size=SUGGEST_BATCH_SIZE, max_workers=OPENAI_MAX_CONCURRENCY):
+    """
+    Suggest categories batch by batch, with up to `max_workers` batches in flight.
+
+    Yields:
+        (batch, suggestions, error) per batch in completion order, so callers can
+        act on a batch while later ones are still running. suggestions maps
+        transaction ids to category names; error is the exception that made the
+        batch fail, or None
+    """
+    batches = _chunks(transactions, batch_size)
+    if len(batches) <= 1 or max_workers <= 1:
+        for batch in batches:
+            yield _suggest_batch_safely(batch, categories)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)), thread_name_prefix="openai") as executor:
+        futures = [executor.submit(_suggest_batch_safely, batch, categories) for batch in batches]
+        for future in as_completed(futures):
+            yield future.result()
+
+def suggest_categories(transactions, categories, batch_size=SUGGEST_BATCH_SIZE):
+    """
+    Suggest categories for many transactions with one chat completion per batch.
+
+    Args:
+        transactions: YNAB transactions with "id", "payee_name", "amount" and "date"
+        categories: Categories with a "name"
+        batch_size: Transactions per request; a batch whose answer cannot be parsed
+            is split in halves and retried
+
+    Returns:
+        Dictionary of transaction id to suggested category name
+
+    Raises:
+        The first error of a failed batch
+    """
+    suggestions = {}
+    for _, batch_suggestions, error in iter_suggest_categories(transactions, categories, batch_size):
+        if error is not None:
+            raise error
+        suggestions.update(batch_suggestions)
+    return suggestions
+
+async def suggest_categories_async(transactions, categories, batch_size=SUGGEST_BATCH_SIZE):
+    """Async suggest_categories; up to OPENAI_MAX_CONCURRENCY batches are in flight at once."""
+    semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+    async def suggest(batch):
+        async with semaphore:
+            return await _suggest_batch_async(batch, categories)
+
+    suggestions = {}
+    for part in await asyncio.gather(*(suggest(batch) for batch in _chunks(transactions, batch_size))):
+        suggestions.update(part)
+    return suggestions
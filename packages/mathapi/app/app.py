@@ -1,42 +1,197 @@
 import os
 import itertools
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, g, jsonify, make_response, request, render_template
 from .ynab_service import apply_suggested_categories_service
-from .ynab_api import get_scheduled_transactions, get_uncategorized_transactions
-from .categories_api import get_categories_for_budget
+from .ynab_cache import get_scheduled_transactions, get_uncategorized_transactions
+from .categories_api import get_categories_for_budget, CATEGORIZATION_CATEGORY_FIELDS
 from .budget_api import get_objectid_for_budget
-from .accounts_api import get_accounts_for_budget
+from .data_loader import load_projection_inputs
 from .prediction_api import project_daily_balances_with_reasons
-from .categories_api import get_categories_for_budget
-from .ai_api import suggest_category
+from .projection_engine import project_daily_balances_columnar, evaluate_scenarios
+from .monte_carlo import project_balance_bands
+from .projection_format import COMPACT_FIELDS, compact_payload
+from .request_params import (
+    parse_budget_id, parse_data_params, parse_probabilistic_params, parse_projection_params, parse_scenarios_params,
+)
+from .http_cache import (
+    choose_encoding, compress_body, encoded_etag, is_compressible, iter_compressed,
+    not_modified, projection_etag, COMPRESSION_MIN_BYTES,
+)
+from .projection_cache import projection_cache, cached_projection, inputs_fingerprint
+from .simulation_registry import SimulationRegistry
+from .db import ensure_indexes, is_ready
+from .ynab_cache import ensure_cache_indexes
+from .categorization import suggest_categories_for_budget
+from .category_memo import ensure_memo_indexes
+from .metrics import count_cache, latest_metrics, observe_request, stage
 import logging
 import json
+import threading
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 
-def load_simulations_folder(folder_name="simulations"):
-    """Load all simulations from a folder containing JSON files."""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    folder_path = os.path.join(base_dir, folder_name)
-    
+def init_database():
+    """Ensure the MongoDB indexes exist; failures are logged and never block startup."""
+    try:
+        ensure_indexes()
+        ensure_cache_indexes()
+        ensure_memo_indexes()
+    except Exception as e:
+        logging.warning(f"Could not ensure MongoDB indexes: {e}")
+
+_database_init_pid = None
+
+def start_database_init():
+    """
+    Run init_database in a background thread, once per process.
+
+    Called when a server process starts serving (wsgi.warm_up, the ASGI startup
+    hook), never on import, so tests and tools importing the app leave MongoDB alone.
+    """
+    global _database_init_pid
+    if _database_init_pid == os.getpid():
+        return
+    _database_init_pid = os.getpid()
+    threading.Thread(target=init_database, name="ensure-indexes", daemon=True).start()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Observe the request duration; registered first, so it runs after the other hooks."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        observe_request(endpoint, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress text and JSON bodies with the best encoding the client accepts."""
+    if response.status_code == 304 or is_compressible(response):
+        response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    etag, weak = response.get_etag()
+    if response.status_code == 304:
+        if etag:
+            response.set_etag(encoded_etag(etag, encoding), weak)
+        return response
+    if not is_compressible(response):
+        return response
+
+    if response.is_streamed:
+        response.response = iter_compressed(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress_body(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+SIMULATIONS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulations")
+simulation_registry = SimulationRegistry(SIMULATIONS_FOLDER)
+
+def load_simulations_folder():
+    """Return all registered simulations, preceded by the baseline."""
     simulations = {"Actual Balance": None}  # Treat the baseline as a default simulation
-    if not os.path.exists(folder_path):
-        logging.warning(f"Simulation folder not found: {folder_path}")
-        return simulations
-
-    for file_name in os.listdir(folder_path):
-        if file_name.endswith('.json'):
-            file_path = os.path.join(folder_path, file_name)
-            try:
-                with open(file_path, "r") as file:
-                    simulations[file_name] = json.load(file)
-            except Exception as e:
-                logging.warning(f"Failed to load simulation file {file_name}: {str(e)}")
+    simulations.update(simulation_registry.all())
     return simulations
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def columnar_baseline(accounts, categories, future_transactions, days_ahead, inputs_key=None):
+    """Columnar baseline projection, served from the projection cache when the inputs are unchanged."""
+    inputs_key = inputs_key or inputs_fingerprint(accounts, categories, future_transactions, days_ahead)
+    return cached_projection(
+        project_daily_balances_columnar, inputs_key, accounts, categories, future_transactions, days_ahead,
+        engine="columnar"
+    )
+
+def build_projector(engine, accounts, categories, future_transactions, days_ahead, cache_simulations=True):
+    """
+    Return a function mapping simulation data to projected balances in the dict-based shape.
+
+    The columnar engine projects the baseline once here and applies every
+    simulation as a delta on top of it; the dict engine projects every
+    simulation on its own. Both go through the projection cache.
+
+    Args:
+        cache_simulations: Whether the dict engine caches simulation results;
+            the baseline is always cached
+    """
+    inputs_key = inputs_fingerprint(accounts, categories, future_transactions, days_ahead)
+    if engine == "columnar":
+        baseline = columnar_baseline(accounts, categories, future_transactions, days_ahead, inputs_key)
+        return lambda simulation_data=None: baseline.with_simulations(simulation_data).to_daily_dict()
+
+    def project(simulation_data=None):
+        if simulation_data is None or cache_simulations:
+            return cached_projection(
+                project_daily_balances_with_reasons, inputs_key,
+                accounts, categories, future_transactions, days_ahead, simulation_data
+            )
+        return project_daily_balances_with_reasons(accounts, categories, future_transactions, days_ahead, simulation_data)
+    return project
+
+def request_etag(inputs, days_ahead):
+    """ETag of the projection the current request asks for."""
+    return projection_etag(inputs, days_ahead, simulation_registry.version(), request.path, request.args.to_dict())
+
+def client_copy_is_current(etag):
+    """Whether the request's If-None-Match matches `etag`; counted as an "http_etag" cache lookup."""
+    if not request.if_none_match:
+        return False
+    current = not_modified(request.if_none_match, etag)
+    count_cache("http_etag", current, not current)
+    return current
+
+def not_modified_response(etag):
+    response = make_response("", 304)
+    response.set_etag(etag)
+    return response
+
+def with_etag(response, etag):
+    """Tag a projection response; clients may keep it but must revalidate before reusing it."""
+    response = make_response(response)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+@stage("hover_text")
+def build_hover_texts(projected_balances, dates):
+    """Hover text of every plotted date of the interactive view."""
+    hover_texts = []
+    for date in dates:
+        day_data = projected_balances[date]
+        balance = day_data["balance"]  # Raw balance
+        balance_diff = day_data.get("balance_diff", 0)  # Raw difference
+        changes = day_data["changes"]
+
+        # Format numbers for presentation
+        hover_text = f"Date: {date}<br>Balance: {balance:.2f}€<br>Balance Difference: {balance_diff:.2f}€"
+        if changes:
+            hover_text += "<br>Changes:"
+            for change in changes:
+                amount = change["amount"]  # Raw amount
+                if amount == 0:  # Skip zero-value changes
+                    continue
+                simulation_flag = "(Simulation)" if change.get("is_simulation", False) else ""
+                hover_text += f"<br>{amount:.2f}€ ({change['category']} - {change['reason']}) {simulation_flag}"
+        hover_texts.append(hover_text)
+    return hover_texts
+
 def generate_unique_colors():
     """Generate unique colors for the plots."""
     colors = itertools.cycle(["red", "green", "blue", "purple", "orange", "cyan", "magenta"])
@@ -44,40 +199,124 @@ def generate_unique_colors():
     for color in colors:
         yield color
 
-@app.route('/balance-prediction/interactive', methods=['GET'])
-def balance_prediction_interactive():
-    # Step 1: Get `budget_id` from query parameters
-    budget_uuid = request.args.get('budget_id')
-    if not budget_uuid:
-        return "budget_id query parameter is required", 400
-
-    # Step 2: Load simulations from folder
-    simulations = load_simulations_folder()
-    # Handle optional days_ahead parameter
-    days_ahead_param = request.args.get('days_ahead')
+def _project_simulation(project, scenario, simulation_data):
     try:
-        days_ahead = int(days_ahead_param) if days_ahead_param is not None else 300
-    except ValueError:
-        return "Invalid days_ahead query parameter, it must be an integer.", 400
-
-    # Step 3: Fetch required data
-    try:
-        budget_id = get_objectid_for_budget(budget_uuid)
-        future_transactions = get_scheduled_transactions(budget_uuid)
-        categories = get_categories_for_budget(budget_id)
-        accounts = get_accounts_for_budget(budget_id)
+        return project(simulation_data)
     except Exception as e:
-        return f"Error fetching data: {str(e)}", 500
-
-    # Step 4: Generate plot data for the baseline and all simulations
+        logging.warning(f"Error processing simulation '{scenario}': {str(e)}")
+        return {"error": f"Error: {str(e)}"}
+
+def iter_scenario_projections(inputs, days_ahead, engine, simulations, cache_simulations=True):
+    """
+    Project the baseline and then every simulation, one at a time.
+
+    Args:
+        cache_simulations: See build_projector
+
+    Yields:
+        (scenario name, projection) pairs; names are "baseline" and
+        "simulation_<name>", and a failing simulation's projection is
+        {"error": message}. A failing baseline raises
+    """
+    project = build_projector(
+        engine, inputs["accounts"], inputs["categories"], inputs["future_transactions"], days_ahead, cache_simulations
+    )
+    yield "baseline", project()
+    for simulation_name, simulation_data in simulations.items():
+        scenario = f"simulation_{simulation_name}"
+        yield scenario, _project_simulation(project, scenario, simulation_data)
+
+def balance_prediction_payload(inputs, days_ahead, engine, simulations):
+    """
+    Baseline and per-simulation projections returned by /balance-prediction/data.
+
+    A failing simulation is reported in its entry; a failing baseline raises.
+    """
+    return dict(iter_scenario_projections(inputs, days_ahead, engine, simulations))
+
+def _scenario_records(scenario, daily_balances, chunk):
+    if "error" in daily_balances:
+        yield {"scenario": scenario, "error": daily_balances["error"]}
+    elif chunk == "month":
+        for month, days in itertools.groupby(daily_balances.items(), key=lambda item: item[0][:7]):
+            yield {"scenario": scenario, "month": month, "data": dict(days)}
+    else:
+        yield {"scenario": scenario, "data": daily_balances}
+
+def iter_balance_prediction_records(inputs, days_ahead, engine, simulations, chunk="scenario"):
+    """
+    Streaming variant of balance_prediction_payload.
+
+    Every scenario is projected only when the previous one has been consumed,
+    so the baseline can be sent before the simulations are computed and only
+    one scenario is held in memory at a time; simulation results are not kept
+    in the projection cache either.
+
+    Args:
+        chunk: "scenario" for one record per scenario, "month" for one record
+            per scenario and calendar month
+
+    Yields:
+        {"scenario", "data"} records ("month" is added when chunked per month);
+        scenario names are the keys of balance_prediction_payload, and a failing
+        simulation yields {"scenario", "error"} instead
+    """
+    scenarios = iter_scenario_projections(inputs, days_ahead, engine, simulations, cache_simulations=False)
+    for scenario, daily_balances in scenarios:
+        yield from _scenario_records(scenario, daily_balances, chunk)
+
+def ndjson_lines(records):
+    """Serialize records as newline-delimited JSON, one line per record."""
+    for record in records:
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+def ndjson_stream(records):
+    """
+    Start an NDJSON stream, producing its first line right away.
+
+    The first line is computed eagerly, so an error in it (the baseline)
+    raises before any response is sent.
+
+    Returns:
+        (first line or None, iterator over the remaining lines)
+    """
+    lines = ndjson_lines(records)
+    return next(lines, None), lines
+
+def compact_balance_prediction_payload(inputs, days_ahead, engine, simulations, fields=COMPACT_FIELDS):
+    """/balance-prediction/data?format=compact: parallel arrays with dictionary-encoded changes."""
+    return compact_payload(iter_scenario_projections(inputs, days_ahead, engine, simulations), fields)
+
+def scenarios_payload(inputs, days_ahead, scenarios):
+    """Daily balances of every scenario, evaluated against one cached baseline."""
+    baseline = columnar_baseline(inputs["accounts"], inputs["categories"], inputs["future_transactions"], days_ahead)
+    balances = evaluate_scenarios(baseline, list(scenarios.values()))
+    return {
+        "dates": baseline.dates().tolist(),
+        "baseline": baseline.balance.tolist(),
+        "scenarios": {name: row for name, row in zip(scenarios.keys(), balances.tolist())}
+    }
+
+def probabilistic_payload(inputs, days_ahead, paths, seed):
+    """Monte Carlo percentile bands around the cached baseline."""
+    baseline = columnar_baseline(inputs["accounts"], inputs["categories"], inputs["future_transactions"], days_ahead)
+    return project_balance_bands(baseline, inputs["categories"], paths, seed)
+
+def interactive_plot_data(project, simulations):
+    """
+    Plotly traces of /balance-prediction/interactive, one per simulation.
+
+    Args:
+        project: Projector returned by build_projector
+        simulations: {name: simulation data} as returned by load_simulations_folder;
+            a simulation that fails to project is logged and left out
+    """
     plot_data = []
     color_generator = generate_unique_colors()
     for simulation_name, simulation_data in simulations.items():
         try:
             # Get projected balances with raw numeric data
-            projected_balances = project_daily_balances_with_reasons(
-                accounts, categories, future_transactions, days_ahead, simulation_data
-            )
+            projected_balances = project(simulation_data)
         except Exception as e:
             logging.warning(f"Error processing simulation '{simulation_name}': {str(e)}")
             continue
@@ -85,26 +324,7 @@ def balance_prediction_interactive():
         # Prepare data for the plot
         dates = list(projected_balances.keys())
         balances = [projected_balances[date]["balance"] for date in dates]  # Raw numbers
-        hover_texts = []
-
-        # Calculate hover text for each date
-        for i, date in enumerate(dates):
-            day_data = projected_balances[date]
-            balance = day_data["balance"]  # Raw balance
-            balance_diff = day_data.get("balance_diff", 0)  # Raw difference
-            changes = day_data["changes"]
-
-            # Format numbers for presentation
-            hover_text = f"Date: {date}<br>Balance: {balance:.2f}€<br>Balance Difference: {balance_diff:.2f}€"
-            if changes:
-                hover_text += "<br>Changes:"
-                for change in changes:
-                    amount = change["amount"]  # Raw amount
-                    if amount == 0:  # Skip zero-value changes
-                        continue
-                    simulation_flag = "(Simulation)" if change.get("is_simulation", False) else ""
-                    hover_text += f"<br>{amount:.2f}€ ({change['category']} - {change['reason']}) {simulation_flag}"
-            hover_texts.append(hover_text)
+        hover_texts = build_hover_texts(projected_balances, dates)
 
         # Add the line to the plot
         plot_data.append({
@@ -117,68 +337,195 @@ def balance_prediction_interactive():
             "hoverinfo": "text",
             "marker": {"color": next(color_generator)}
         })
+    return plot_data
+
+def suggestion_entry(transaction, suggestion):
+    """Item of the suggest-categories response; `suggestion` comes from suggest_categories_for_budget."""
+    suggestion = suggestion or {}
+    return {
+        "transaction_id": transaction["id"],
+        "payee_name": transaction["payee_name"],
+        "amount": transaction["amount"],
+        "date": transaction["date"],
+        "suggested_category_name": suggestion.get("category_name"),
+        "suggestion_source": suggestion.get("source"),
+        "confidence": suggestion.get("confidence")
+    }
 
-    # Convert plot data to JSON for the template
-    sanitized_plot_data = json.dumps(plot_data)
+@app.route('/balance-prediction/interactive', methods=['GET'])
+def balance_prediction_interactive():
+    # Step 1: Get `budget_id`, `days_ahead` and `engine` from query parameters
+    try:
+        budget_uuid, days_ahead, engine = parse_projection_params(request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    # Step 2: Load simulations from folder
+    simulations = load_simulations_folder()
+
+    # Step 3: Fetch required data
+    try:
+        inputs = load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return f"Error fetching data: {str(e)}", 500
+    accounts, categories, future_transactions = inputs["accounts"], inputs["categories"], inputs["future_transactions"]
+
+    # Unchanged inputs mean an unchanged page: skip projecting and rendering
+    etag = request_etag(inputs, days_ahead)
+    if client_copy_is_current(etag):
+        return not_modified_response(etag)
+
+    try:
+        project = build_projector(engine, accounts, categories, future_transactions, days_ahead)
+    except Exception as e:
+        return f"Error generating baseline: {str(e)}", 500
 
-    # Render HTML template with plot data
-    return render_template('balance_projection.html', plot_data=sanitized_plot_data)
+    # Step 4: Generate plot data for the baseline and all simulations
+    plot_data = interactive_plot_data(project, simulations)
+
+    with stage("serialization"):
+        # Convert plot data to JSON for the template
+        sanitized_plot_data = json.dumps(plot_data)
+
+        # Render HTML template with plot data
+        page = render_template('balance_projection.html', plot_data=sanitized_plot_data)
+    return with_etag(page, etag)
 
 @app.route('/balance-prediction/data', methods=['GET'])
 def balance_prediction_data():
-    # Step 1: Get `budget_id` and `days_ahead` from query parameters
-    budget_uuid = request.args.get('budget_id')
-    if not budget_uuid:
-        return jsonify({"error": "budget_id query parameter is required"}), 400
-
-    days_ahead_param = request.args.get('days_ahead')
+    # Step 1: Get `budget_id`, `days_ahead` and the output options from query parameters
     try:
-        days_ahead = int(days_ahead_param) if days_ahead_param is not None else 300
-    except ValueError:
-        return jsonify({"error": "Invalid days_ahead query parameter, it must be an integer."}), 400
+        budget_uuid, days_ahead, engine, output_format, chunk, fields = parse_data_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Step 2: Load simulations from folder
     simulations = load_simulations_folder()
 
     try:
-        budget_id = get_objectid_for_budget(budget_uuid)
-        future_transactions = get_scheduled_transactions(budget_uuid)
-        categories = get_categories_for_budget(budget_id)
-        accounts = get_accounts_for_budget(budget_id)
+        inputs = load_projection_inputs(budget_uuid)
     except Exception as e:
         return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
 
-    # Step 3: Prepare data for baseline and simulations
-    data = {}
+    etag = request_etag(inputs, days_ahead)
+    if client_copy_is_current(etag):
+        return not_modified_response(etag)
+
+    if output_format == "ndjson":
+        try:
+            first, lines = ndjson_stream(iter_balance_prediction_records(inputs, days_ahead, engine, simulations, chunk))
+        except Exception as e:
+            logging.error(f"Error generating baseline: {e}")
+            return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
+        # Later records are projected while the response is being sent
+        return with_etag(Response(itertools.chain([first], lines), mimetype=NDJSON_MIMETYPE), etag)
 
-    # Add baseline
     try:
-        data["baseline"] = project_daily_balances_with_reasons(
-            accounts, categories, future_transactions, days_ahead
-        )
+        if output_format == "compact":
+            data = compact_balance_prediction_payload(inputs, days_ahead, engine, simulations, fields)
+        else:
+            data = balance_prediction_payload(inputs, days_ahead, engine, simulations)
     except Exception as e:
         logging.error(f"Error generating baseline: {e}")
         return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
 
-    # Add simulations
-    for simulation_name, simulation_data in simulations.items():
-        try:
-            simulation_key = f"simulation_{simulation_name}"
-            data[simulation_key] = project_daily_balances_with_reasons(
-                accounts, categories, future_transactions, days_ahead, simulation_data
-            )
-        except Exception as e:
-            logging.warning(f"Error processing simulation '{simulation_name}': {str(e)}")
-            data[f"simulation_{simulation_name}"] = {"error": f"Error: {str(e)}"}
-
     # Return data as JSON
-    return jsonify(data)
+    with stage("serialization"):
+        response = jsonify(data)
+    return with_etag(response, etag)
+
+@app.route('/balance-prediction/scenarios', methods=['POST'])
+def balance_prediction_scenarios():
+    """Evaluate a batch of ad-hoc simulation lists against one baseline projection."""
+    try:
+        budget_uuid, days_ahead, scenarios = parse_scenarios_params(request.args, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        inputs = load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    try:
+        return jsonify(scenarios_payload(inputs, days_ahead, scenarios))
+    except Exception as e:
+        logging.error(f"Error generating baseline: {e}")
+        return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
+
+@app.route('/balance-prediction/probabilistic', methods=['GET'])
+def balance_prediction_probabilistic():
+    """Monte Carlo projection returning percentile bands and the probability of a negative balance."""
+    try:
+        budget_uuid, days_ahead, paths, seed = parse_probabilistic_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        inputs = load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    try:
+        return jsonify(probabilistic_payload(inputs, days_ahead, paths, seed))
+    except Exception as e:
+        logging.error(f"Error generating probabilistic projection: {e}")
+        return jsonify({"error": f"Error generating probabilistic projection: {str(e)}"}), 500
+
+@app.route('/balance-prediction/cache-stats', methods=['GET'])
+def balance_prediction_cache_stats():
+    """Hit/miss/eviction counters of the projection cache."""
+    return jsonify(projection_cache.stats())
+
+@app.route('/simulations', methods=['GET'])
+def list_simulations():
+    """List all registered simulation scenarios."""
+    return jsonify(simulation_registry.all())
+
+@app.route('/simulations/<name>', methods=['PUT'])
+def put_simulation(name):
+    """Add or replace a simulation scenario; the body is a list of simulation entries."""
+    try:
+        file_name, entries = simulation_registry.put(name, request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({file_name: entries})
+
+@app.route('/simulations/<name>', methods=['DELETE'])
+def delete_simulation(name):
+    """Remove a simulation scenario."""
+    try:
+        deleted = simulation_registry.delete(name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not deleted:
+        return jsonify({"error": f"Simulation not found: {name}"}), 404
+    return "", 204
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics of this process, or of all gunicorn workers in multiprocess mode."""
+    body, content_type = latest_metrics()
+    return Response(body, content_type=content_type)
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness probe; does not touch any dependency."""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness probe; checks MongoDB with a short timeout."""
+    if not is_ready():
+        return jsonify({"status": "unavailable", "mongodb": False}), 503
+    return jsonify({"status": "ok", "mongodb": True})
 
 @app.route('/sheduled-transactions', methods=['GET'])
 def get_scheduled_transactions_route():
-    budget_uuid = request.args.get('budget_id')
-    if not budget_uuid:
-        return "budget_id query parameter is required", 400
+    try:
+        budget_uuid = parse_budget_id(request.args)
+    except ValueError as e:
+        return str(e), 400
 
     try:
         transactions = get_scheduled_transactions(budget_uuid)
@@ -188,44 +535,42 @@ def get_scheduled_transactions_route():
     
 @app.route('/uncategorised-transactions/suggest-categories', methods=['GET'])
 def suggest_categories_for_unscheduled_transactions():
-    budget_uuid = request.args.get('budget_id')
-    if not budget_uuid:
-        return jsonify({"error": "budget_id query parameter is required"}), 400
+    try:
+        budget_uuid = parse_budget_id(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         # Fetch budget ID and data
         budget_id = get_objectid_for_budget(budget_uuid)
         uncategorized_transactions = get_uncategorized_transactions(budget_uuid)
-        categories = get_categories_for_budget(budget_id)
+        categories = get_categories_for_budget(budget_id, CATEGORIZATION_CATEGORY_FIELDS)
     except Exception as e:
         return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
 
     if not uncategorized_transactions:
         return jsonify([])  # No uncategorized transactions found
 
-    # Suggest categories for each uncategorized transaction
-    suggested_transactions = []
-    for transaction in uncategorized_transactions:
-        try:
-            suggested_category_name = suggest_category(transaction, categories)
-            suggested_transactions.append({
-                "transaction_id": transaction["id"],
-                "payee_name": transaction["payee_name"],
-                "amount": transaction["amount"],
-                "date": transaction["date"],
-                "suggested_category_name": suggested_category_name
-            })
-        except Exception as e:
-             return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+    # Known payees come from the category memo, the rest from OpenAI in batches
+    try:
+        suggestions = suggest_categories_for_budget(budget_uuid, uncategorized_transactions, categories)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    suggested_transactions = [
+        suggestion_entry(transaction, suggestions.get(transaction["id"]))
+        for transaction in uncategorized_transactions
+    ]
 
     return jsonify(suggested_transactions)
 
 @app.route('/uncategorised-transactions/apply-categories', methods=['POST'])
 def apply_suggested_categories():
     """Fetch transactions, suggest categories, and apply them."""
-    budget_uuid = request.args.get('budget_id')
-    if not budget_uuid:
-        return jsonify({"error": "budget_id query parameter is required"}), 400
+    try:
+        budget_uuid = parse_budget_id(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
         # Delegate business logic to the service layer
@@ -236,4 +581,5 @@ def apply_suggested_categories():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    start_database_init()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,329 @@
+"""
+asyncio variant of the I/O-bound endpoints, served as an ASGI app.
+
+Loading inputs from MongoDB (Motor), YNAB (httpx) and OpenAI happens on the
+event loop, so one worker keeps many requests in flight; the CPU-bound
+projection code is the same as in the Flask app and runs in a thread via
+asyncio.to_thread. Run with:
+
+    uvicorn app.asgi:app
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py app.asgi:app
+"""
+import asyncio
+import json
+import logging
+import time
+
+from quart import Quart, Response, g, jsonify, make_response, render_template, request
+from quart.wrappers.response import DataBody, IterableBody
+
+from .app import (
+    NDJSON_MIMETYPE,
+    balance_prediction_payload,
+    build_projector,
+    compact_balance_prediction_payload,
+    interactive_plot_data,
+    iter_balance_prediction_records,
+    load_simulations_folder,
+    ndjson_stream,
+    probabilistic_payload,
+    scenarios_payload,
+    simulation_registry,
+    start_database_init,
+    suggestion_entry,
+)
+from .async_data import (
+    get_categories_for_budget,
+    get_objectid_for_budget,
+    get_scheduled_transactions,
+    get_uncategorized_transactions,
+    load_projection_inputs,
+)
+from .categorization import suggest_categories_for_budget_async
+from .categories_api import CATEGORIZATION_CATEGORY_FIELDS
+from .db import get_async_DB, MONGODB_READY_TIMEOUT_MS
+from .http_cache import (
+    aiter_compressed, choose_encoding, compress_body, encoded_etag, is_compressible, not_modified,
+    projection_etag, COMPRESSION_MIN_BYTES,
+)
+from .metrics import count_cache, latest_metrics, observe_request, stage
+from .request_params import (
+    parse_budget_id,
+    parse_data_params,
+    parse_probabilistic_params,
+    parse_projection_params,
+    parse_scenarios_params,
+)
+from .ynab_async import close_async_client
+
+app = Quart(__name__)
+
+
+@app.before_serving
+async def startup():
+    start_database_init()
+
+
+@app.after_serving
+async def shutdown():
+    await close_async_client()
+
+
+@app.before_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+async def record_request(response):
+    """Observe the request duration; registered first, so it runs after the other hooks."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        observe_request(endpoint, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+
+@app.after_request
+async def compress_response(response):
+    """Compress text and JSON bodies with the best encoding the client accepts (see app.app)."""
+    if response.status_code == 304 or is_compressible(response):
+        response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    etag, weak = response.get_etag()
+    if response.status_code == 304:
+        if etag:
+            response.set_etag(encoded_etag(etag, encoding), weak)
+        return response
+    if not is_compressible(response):
+        return response
+
+    if isinstance(response.response, IterableBody):
+        response.response = IterableBody(aiter_compressed(response.response, encoding))
+        response.headers.pop("Content-Length", None)
+    elif isinstance(response.response, DataBody):
+        data = await response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress_body(data, encoding))
+    else:
+        return response
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+
+async def _request_etag(inputs, days_ahead):
+    simulations_version = await asyncio.to_thread(simulation_registry.version)
+    return projection_etag(inputs, days_ahead, simulations_version, request.path, request.args.to_dict())
+
+
+def _client_copy_is_current(etag):
+    if not request.if_none_match:
+        return False
+    current = not_modified(request.if_none_match, etag)
+    count_cache("http_etag", current, not current)
+    return current
+
+
+async def _with_etag(response, etag):
+    response = await make_response(response)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+async def _not_modified_response(etag):
+    response = await make_response("", 304)
+    response.set_etag(etag)
+    return response
+
+
+async def _ndjson_body(first, lines):
+    # Each further record is projected in a thread, off the event loop
+    yield first
+    while (line := await asyncio.to_thread(next, lines, None)) is not None:
+        yield line
+
+
+@app.route('/balance-prediction/interactive', methods=['GET'])
+async def balance_prediction_interactive():
+    try:
+        budget_uuid, days_ahead, engine = parse_projection_params(request.args)
+    except ValueError as e:
+        return str(e), 400
+
+    try:
+        inputs = await load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return f"Error fetching data: {str(e)}", 500
+
+    etag = await _request_etag(inputs, days_ahead)
+    if _client_copy_is_current(etag):
+        return await _not_modified_response(etag)
+
+    try:
+        project = await asyncio.to_thread(
+            build_projector, engine, inputs["accounts"], inputs["categories"], inputs["future_transactions"], days_ahead
+        )
+    except Exception as e:
+        return f"Error generating baseline: {str(e)}", 500
+
+    simulations = await asyncio.to_thread(load_simulations_folder)
+    plot_data = await asyncio.to_thread(interactive_plot_data, project, simulations)
+    with stage("serialization"):
+        page = await render_template('balance_projection.html', plot_data=json.dumps(plot_data))
+    return await _with_etag(page, etag)
+
+
+@app.route('/balance-prediction/data', methods=['GET'])
+async def balance_prediction_data():
+    try:
+        budget_uuid, days_ahead, engine, output_format, chunk, fields = parse_data_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        inputs = await load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    etag = await _request_etag(inputs, days_ahead)
+    if _client_copy_is_current(etag):
+        return await _not_modified_response(etag)
+
+    if output_format == "ndjson":
+        try:
+            simulations = await asyncio.to_thread(load_simulations_folder)
+            first, lines = await asyncio.to_thread(
+                ndjson_stream, iter_balance_prediction_records(inputs, days_ahead, engine, simulations, chunk)
+            )
+        except Exception as e:
+            logging.error(f"Error generating baseline: {e}")
+            return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
+        return await _with_etag((_ndjson_body(first, lines), 200, {"Content-Type": NDJSON_MIMETYPE}), etag)
+
+    try:
+        simulations = await asyncio.to_thread(load_simulations_folder)
+        if output_format == "compact":
+            data = await asyncio.to_thread(
+                compact_balance_prediction_payload, inputs, days_ahead, engine, simulations, fields
+            )
+        else:
+            data = await asyncio.to_thread(balance_prediction_payload, inputs, days_ahead, engine, simulations)
+    except Exception as e:
+        logging.error(f"Error generating baseline: {e}")
+        return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
+
+    with stage("serialization"):
+        response = jsonify(data)
+    return await _with_etag(response, etag)
+
+
+@app.route('/balance-prediction/scenarios', methods=['POST'])
+async def balance_prediction_scenarios():
+    body = await request.get_json(silent=True)
+    try:
+        budget_uuid, days_ahead, scenarios = parse_scenarios_params(request.args, body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        inputs = await load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    try:
+        return jsonify(await asyncio.to_thread(scenarios_payload, inputs, days_ahead, scenarios))
+    except Exception as e:
+        logging.error(f"Error generating baseline: {e}")
+        return jsonify({"error": f"Error generating baseline: {str(e)}"}), 500
+
+
+@app.route('/balance-prediction/probabilistic', methods=['GET'])
+async def balance_prediction_probabilistic():
+    try:
+        budget_uuid, days_ahead, paths, seed = parse_probabilistic_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        inputs = await load_projection_inputs(budget_uuid)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    try:
+        return jsonify(await asyncio.to_thread(probabilistic_payload, inputs, days_ahead, paths, seed))
+    except Exception as e:
+        logging.error(f"Error generating probabilistic projection: {e}")
+        return jsonify({"error": f"Error generating probabilistic projection: {str(e)}"}), 500
+
+
+@app.route('/sheduled-transactions', methods=['GET'])
+async def scheduled_transactions():
+    try:
+        budget_uuid = parse_budget_id(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        return jsonify(await get_scheduled_transactions(budget_uuid))
+    except Exception as e:
+        return jsonify({"error": f"Error fetching scheduled transactions: {str(e)}"}), 500
+
+
+@app.route('/uncategorised-transactions/suggest-categories', methods=['GET'])
+async def suggest_categories_for_unscheduled_transactions():
+    try:
+        budget_uuid = parse_budget_id(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        budget_id, uncategorized_transactions = await asyncio.gather(
+            get_objectid_for_budget(budget_uuid), get_uncategorized_transactions(budget_uuid)
+        )
+        categories = await get_categories_for_budget(budget_id, CATEGORIZATION_CATEGORY_FIELDS)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    if not uncategorized_transactions:
+        return jsonify([])
+
+    try:
+        suggestions = await suggest_categories_for_budget_async(budget_uuid, uncategorized_transactions, categories)
+    except Exception as e:
+        return jsonify({"error": f"Error fetching data: {str(e)}"}), 500
+
+    suggested_transactions = [
+        suggestion_entry(transaction, suggestions.get(transaction["id"]))
+        for transaction in uncategorized_transactions
+    ]
+
+    return jsonify(suggested_transactions)
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    body, content_type = latest_metrics()
+    return Response(body, content_type=content_type)
+
+
+@app.route('/healthz', methods=['GET'])
+async def healthz():
+    """Liveness probe; does not touch any dependency."""
+    return jsonify({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+async def readyz():
+    """Readiness probe; pings MongoDB through the async client."""
+    try:
+        await asyncio.wait_for(get_async_DB().client.admin.command("ping"), timeout=MONGODB_READY_TIMEOUT_MS / 1000)
+    except Exception as e:
+        logging.warning(f"MongoDB readiness check failed: {e}")
+        return jsonify({"status": "unavailable", "mongodb": False}), 503
+    return jsonify({"status": "ok", "mongodb": True})
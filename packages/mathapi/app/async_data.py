@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+
+from app.db import get_async_DB
+from app.metrics import observe_stage
+from app.ynab_async import fetch_async
+from app.ynab_cache import (
+    SCHEDULED_TRANSACTIONS,
+    TRANSACTIONS,
+    UNCATEGORIZED_QUERY,
+    cached_items_filter,
+    only_stale_writes_failed,
+    sync_operations,
+    sync_path,
+    sync_state_write,
+    without_transfers,
+)
+from app.categories_api import PROJECTION_CATEGORY_FIELDS
+from app.accounts_api import PROJECTION_ACCOUNT_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# asyncio counterparts of the loaders used by the projection and categorization
+# routes; they return the same shapes as their synchronous versions.
+
+
+async def get_objectid_for_budget(budget_uuid):
+    """Async budget_api.get_objectid_for_budget."""
+    budget = await get_async_DB().localbudgets.find_one({"uuid": budget_uuid}, {"_id": 1})
+    return budget["_id"] if budget else None
+
+
+async def _find_for_budget(collection, budget_id, fields, batch_size=500):
+    projection = dict.fromkeys(fields, 1)
+    projection["_id"] = 0
+    cursor = get_async_DB()[collection].find({"budgetId": budget_id}, projection, batch_size=batch_size)
+    return await cursor.to_list(length=None)
+
+
+async def get_categories_for_budget(budget_id, fields=PROJECTION_CATEGORY_FIELDS):
+    """Async categories_api.get_categories_for_budget with a field projection."""
+    return await _find_for_budget("localcategories", budget_id, fields)
+
+
+async def get_accounts_for_budget(budget_id, fields=PROJECTION_ACCOUNT_FIELDS):
+    """Async accounts_api.get_accounts_for_budget with a field projection."""
+    return await _find_for_budget("localaccounts", budget_id, fields)
+
+
+async def sync_resource(budget_uuid, resource):
+    """Async ynab_cache.sync_resource; the indexes are ensured by the app at startup."""
+    db = get_async_DB()
+    key = {"budgetUuid": budget_uuid, "resource": resource}
+    state = await db.ynabsyncstate.find_one(key, {"serverKnowledge": 1})
+
+    result = await fetch_async("GET", sync_path(budget_uuid, resource, state))
+    if "error" in result:
+        return result
+
+    data = result.get("data", {})
+    items = data.get(resource, [])
+    operations = sync_operations(key, items, data.get("server_knowledge"))
+    if operations:
+        try:
+            await db.ynabcacheitems.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            if not only_stale_writes_failed(e):
+                raise
+
+    state_write = sync_state_write(key, data)
+    if state_write:
+        try:
+            await db.ynabsyncstate.update_one(*state_write, upsert=True)
+        except DuplicateKeyError:
+            pass  # A concurrent sync already stored newer server knowledge
+    logger.info(
+        "ynab_sync budget=%s resource=%s delta=%s changed=%d",
+        budget_uuid, resource, state is not None, len(items),
+    )
+    return len(items)
+
+
+async def cached_items(budget_uuid, resource, query=None):
+    """Async ynab_cache.cached_items."""
+    cursor = get_async_DB().ynabcacheitems.find(
+        cached_items_filter(budget_uuid, resource, query), {"data": 1, "_id": 0}
+    )
+    return [doc["data"] async for doc in cursor]
+
+
+async def get_scheduled_transactions(budget_uuid):
+    """Async ynab_cache.get_scheduled_transactions, including the direct YNAB fallback."""
+    if not budget_uuid:
+        raise ValueError("A budget ID is required")
+
+    try:
+        result = await sync_resource(budget_uuid, SCHEDULED_TRANSACTIONS)
+        if isinstance(result, dict):
+            return result
+        return await cached_items(budget_uuid, SCHEDULED_TRANSACTIONS)
+    except PyMongoError as e:
+        logger.warning("ynab_cache_unavailable resource=%s error=%s", SCHEDULED_TRANSACTIONS, e)
+        result = await fetch_async("GET", f"budgets/{budget_uuid}/scheduled_transactions")
+        if "error" in result:
+            return result
+        return result.get("data", {}).get("scheduled_transactions", [])
+
+
+async def get_uncategorized_transactions(budget_uuid):
+    """Async ynab_cache.get_uncategorized_transactions, including the direct YNAB fallback."""
+    if not budget_uuid:
+        raise ValueError("A budget ID is required")
+
+    try:
+        result = await sync_resource(budget_uuid, TRANSACTIONS)
+        if isinstance(result, dict):
+            return []
+        transactions = await cached_items(budget_uuid, TRANSACTIONS, UNCATEGORIZED_QUERY)
+    except PyMongoError as e:
+        logger.warning("ynab_cache_unavailable resource=%s error=%s", TRANSACTIONS, e)
+        result = await fetch_async("GET", f"budgets/{budget_uuid}/transactions?type=uncategorized")
+        transactions = result.get("data", {}).get("transactions", [])
+
+    return without_transfers(transactions)
+
+
+async def _timed(timings, name, awaitable):
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _scheduled_transactions(budget_uuid):
+    future_transactions = await get_scheduled_transactions(budget_uuid)
+    if isinstance(future_transactions, dict) and "error" in future_transactions:
+        raise RuntimeError(future_transactions["error"])
+    return future_transactions
+
+
+async def _gather(*awaitables):
+    """Like asyncio.gather, but cancels the remaining tasks as soon as one fails."""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def load_projection_inputs(budget_uuid):
+    """
+    Async data_loader.load_projection_inputs.
+
+    Runs the same fetches concurrently on the event loop instead of a thread pool.
+
+    Returns:
+        Dictionary with "accounts", "categories", "future_transactions" and "timings"
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    scheduled = asyncio.ensure_future(
+        _timed(timings, "scheduled_transactions", _scheduled_transactions(budget_uuid))
+    )
+    try:
+        budget_id = await _timed(timings, "budget_id", get_objectid_for_budget(budget_uuid))
+    except BaseException:
+        scheduled.cancel()
+        raise
+
+    future_transactions, categories, accounts = await _gather(
+        scheduled,
+        _timed(timings, "categories", get_categories_for_budget(budget_id)),
+        _timed(timings, "accounts", get_accounts_for_budget(budget_id)),
+    )
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    observe_stage("load_projection_inputs", timings["total"] / 1000)
+    logger.info(
+        "projection_inputs_loaded budget=%s async=true %s",
+        budget_uuid, " ".join(f"{name}_ms={value}" for name, value in timings.items()),
+    )
+    return {
+        "accounts": accounts,
+        "categories": categories,
+        "future_transactions": future_transactions,
+        "timings": timings,
+    }
@@ -20,5 +20,5 @@ def get_objectid_for_budget(budget_uuid):
     Returns:
         ObjectId or None: The ObjectId associated with the budget UUID, or None if not found.
     """
-    budget = get_DB().localbudgets.find_one({"uuid": budget_uuid})
+    budget = get_DB().localbudgets.find_one({"uuid": budget_uuid}, {"_id": 1})
     return budget["_id"] if budget else None
\ No newline at end of file
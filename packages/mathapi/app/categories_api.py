@@ -7,13 +7,51 @@ import logging
 # Load environment variables from .env file
 load_dotenv()
 
-def get_categories_for_budget(budget_id):
+# Fields the projection engine and the Monte Carlo mode read from a category
+PROJECTION_CATEGORY_FIELDS = (
+    "name",
+    "uuid",
+    "balance",
+    "historicalAverage",
+    "typicalSpendingPattern",
+    "target.goal_type",
+    "target.goal_target",
+    "target.goal_overall_left",
+    "target.goal_target_month",
+    "target.goal_cadence",
+    "target.goal_cadence_frequency",
+    "target.goal_day",
+)
+# Fields needed to suggest and apply categories
+CATEGORIZATION_CATEGORY_FIELDS = ("name", "uuid")
+
+def get_categories_for_budget(budget_id, fields=None, batch_size=500):
+    """
+    Fetch the categories of a budget from localcategories.
+
+    Args:
+        budget_id: ObjectId of the budget
+        fields: Optional field names (dotted for subfields) to return. Documents
+            are then returned without _id or other ObjectId fields, so the
+            recursive ObjectId conversion is skipped
+        batch_size: Number of documents per cursor batch
+    """
     query = {
         "budgetId": budget_id
     }
+    if fields:
+        projection = dict.fromkeys(fields, 1)
+        projection["_id"] = 0
+        return list(get_DB().localcategories.find(query, projection, batch_size=batch_size))
+
     # Execute the query and retrieve categories from localcategories
-    categories = get_DB().localcategories.find(query)
+    categories = get_DB().localcategories.find(query, batch_size=batch_size)
     categories_list = []
     for category in categories:
         categories_list.append(convert_objectid_to_str(category))
-    return categories_list
\ No newline at end of file
+    return categories_list
+
+def get_category_names_by_id(budget_id):
+    """Map the ObjectIds of a budget's categories to their names."""
+    categories = get_DB().localcategories.find({"budgetId": budget_id}, {"name": 1})
+    return {category["_id"]: category["name"] for category in categories}
@@ -0,0 +1,134 @@
+import asyncio
+from pymongo.errors import PyMongoError
+from app.ai_api import iter_suggest_categories, suggest_categories_async
+from app.category_memo import lookup_categories, lookup_filter, match_memos
+from app.category_model import predict_categories
+from app.db import get_async_DB
+from app.metrics import count_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+MEMO = "memo"
+MODEL = "model"
+OPENAI = "openai"
+
+
+def _predict(budget_uuid, transactions, categories):
+    """Confident local predictions; the model is optional, so failures only log."""
+    try:
+        return predict_categories(budget_uuid, transactions, categories)
+    except Exception as e:
+        logger.warning("category_model_unavailable error=%s", e)
+        return {}
+
+
+def _local_suggestion(transaction_id, remembered, predicted):
+    if transaction_id in remembered:
+        return {"category_name": remembered[transaction_id], "source": MEMO, "confidence": None}
+    name, confidence = predicted[transaction_id]
+    return {"category_name": name, "source": MODEL, "confidence": round(confidence, 4)}
+
+
+def _openai_suggestions(suggested):
+    return {
+        transaction_id: {"category_name": name, "source": OPENAI, "confidence": None}
+        for transaction_id, name in suggested.items() if name
+    }
+
+
+def _merge(transactions, remembered, predicted, suggested):
+    suggestions = {}
+    for transaction in transactions:
+        transaction_id = transaction["id"]
+        if transaction_id in remembered or transaction_id in predicted:
+            suggestions[transaction_id] = _local_suggestion(transaction_id, remembered, predicted)
+    suggestions.update(_openai_suggestions(suggested))
+    return suggestions
+
+
+def _log(budget_uuid, transactions, remembered, predicted, unknown):
+    count_cache("category_memo", len(remembered), len(transactions) - len(remembered))
+    count_cache("category_model", len(predicted), len(unknown))
+    logger.info(
+        "categorization budget=%s transactions=%d memo=%d model=%d openai=%d",
+        budget_uuid, len(transactions), len(remembered), len(predicted), len(unknown),
+    )
+
+
+def _remembered(budget_uuid, transactions, categories):
+    try:
+        return lookup_categories(budget_uuid, transactions, categories)
+    except PyMongoError as e:
+        logger.warning("category_memo_unavailable error=%s", e)
+        return {}
+
+
+def iter_categorize(budget_uuid, transactions, categories):
+    """
+    Suggest categories as a stream, asking OpenAI only for what the memo and the local model cannot answer.
+
+    Known payees come from the category memo, then the budget's naive Bayes
+    model answers the transactions it is confident about; the rest goes to
+    OpenAI in concurrent batches.
+
+    Args:
+        budget_uuid: The UUID of the budget the transactions belong to
+        transactions: YNAB transactions with "id", "payee_name", "memo", "amount" and "date"
+        categories: The budget's categories, with a "name"
+
+    Yields:
+        (transactions, suggestions, error): first everything answered locally,
+        then one item per OpenAI batch as it completes. suggestions maps
+        transaction ids to {"category_name", "source", "confidence"}, where
+        source is "memo", "model" or "openai" and confidence is set for the
+        model; error is the exception of a failed batch, or None
+    """
+    remembered = _remembered(budget_uuid, transactions, categories)
+    pending = [transaction for transaction in transactions if transaction["id"] not in remembered]
+    predicted = _predict(budget_uuid, pending, categories)
+    unknown = [transaction for transaction in pending if transaction["id"] not in predicted]
+    _log(budget_uuid, transactions, remembered, predicted, unknown)
+
+    local = [transaction for transaction in transactions if transaction["id"] in remembered or transaction["id"] in predicted]
+    if local:
+        yield local, _merge(local, remembered, predicted, {}), None
+    for batch, suggested, error in iter_suggest_categories(unknown, categories):
+        yield batch, _openai_suggestions(suggested), error
+
+
+def suggest_categories_for_budget(budget_uuid, transactions, categories):
+    """
+    Suggest categories for all transactions; see iter_categorize().
+
+    Returns:
+        Dictionary of transaction id to {"category_name", "source", "confidence"}
+
+    Raises:
+        The error of the first failed OpenAI batch
+    """
+    suggestions = {}
+    for _, batch_suggestions, error in iter_categorize(budget_uuid, transactions, categories):
+        if error is not None:
+            raise error
+        suggestions.update(batch_suggestions)
+    return suggestions
+
+
+async def suggest_categories_for_budget_async(budget_uuid, transactions, categories):
+    """Async suggest_categories_for_budget, for the ASGI app; the model runs in a thread."""
+    try:
+        cursor = get_async_DB().categorymemos.find(
+            lookup_filter(budget_uuid, transactions), {"payee": 1, "bucket": 1, "categoryName": 1, "_id": 0}
+        )
+        remembered = match_memos(await cursor.to_list(length=None), transactions, categories)
+    except PyMongoError as e:
+        logger.warning("category_memo_unavailable error=%s", e)
+        remembered = {}
+
+    pending = [transaction for transaction in transactions if transaction["id"] not in remembered]
+    predicted = await asyncio.to_thread(_predict, budget_uuid, pending, categories)
+    unknown = [transaction for transaction in pending if transaction["id"] not in predicted]
+    suggested = await suggest_categories_async(unknown, categories) if unknown else {}
+    _log(budget_uuid, transactions, remembered, predicted, unknown)
+    return _merge(transactions, remembered, predicted, suggested)
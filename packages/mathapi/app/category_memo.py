@@ -0,0 +1,157 @@
+from datetime import datetime
+import math
+import os
+import re
+import unicodedata
+from pymongo import ASCENDING, UpdateOne
+from app.db import get_DB
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Also remember categories per payee and amount bucket, so a payee used for
+# different kinds of spending (a supermarket and its fuel station) can map to
+# different categories by amount; the payee-wide entry is the fallback
+CATEGORY_MEMO_AMOUNT_BUCKETS = os.getenv("CATEGORY_MEMO_AMOUNT_BUCKETS", "true").lower() == "true"
+
+ANY_AMOUNT = "*"
+
+# Card numbers, references, dates and other digit runs that differ per transaction
+_NOISE = re.compile(r"\d+|[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+_indexes_ready = False
+
+
+def ensure_memo_indexes():
+    """Create the unique index the memo upserts and lookups rely on."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    get_DB().categorymemos.create_index(
+        [("budgetUuid", ASCENDING), ("payee", ASCENDING), ("bucket", ASCENDING)], unique=True
+    )
+    _indexes_ready = True
+
+
+def normalize_payee(payee_name):
+    """
+    Normalize a payee name so variants of the same payee share a memo entry.
+
+    Accents, case, digits and punctuation are dropped: "Carrefour Market 0123
+    Gent", "CARREFOUR MARKET 0456 GENT" and "carrefour-market gent" all become
+    "carrefour market gent".
+
+    Returns:
+        The normalized name, or None if nothing is left
+    """
+    if not payee_name:
+        return None
+    text = unicodedata.normalize("NFKD", payee_name)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    text = _SPACES.sub(" ", _NOISE.sub(" ", text.replace("_", " "))).strip()
+    return text or None
+
+
+def amount_bucket(amount):
+    """
+    Coarse bucket of a milliunit amount: its direction and order of magnitude.
+
+    -4.50 and -8.00 share "out:0", -45.00 is "out:1", 1200.00 is "in:3".
+    """
+    units = abs(amount or 0) / 1000
+    magnitude = int(math.floor(math.log10(units))) if units >= 1 else 0
+    return f"{'in' if (amount or 0) > 0 else 'out'}:{magnitude}"
+
+
+def _buckets(transaction):
+    if CATEGORY_MEMO_AMOUNT_BUCKETS:
+        return [amount_bucket(transaction.get("amount")), ANY_AMOUNT]
+    return [ANY_AMOUNT]
+
+
+def lookup_filter(budget_uuid, transactions):
+    """Query for the memo entries of the payees of `transactions`."""
+    payees = {normalize_payee(transaction.get("payee_name")) for transaction in transactions}
+    payees.discard(None)
+    return {"budgetUuid": budget_uuid, "payee": {"$in": sorted(payees)}}
+
+
+def match_memos(memos, transactions, categories):
+    """
+    Pick the remembered category of each transaction.
+
+    The entry for the transaction's amount bucket wins over the payee-wide one;
+    categories that no longer exist in the budget are ignored.
+
+    Args:
+        memos: Memo documents returned for lookup_filter()
+        transactions: The transactions to categorize
+        categories: The budget's categories, with a "name"
+
+    Returns:
+        Dictionary of transaction id to category name
+    """
+    names = {category["name"] for category in categories}
+    by_key = {(memo["payee"], memo["bucket"]): memo["categoryName"] for memo in memos}
+    suggestions = {}
+    for transaction in transactions:
+        payee = normalize_payee(transaction.get("payee_name"))
+        if payee is None:
+            continue
+        for bucket in _buckets(transaction):
+            name = by_key.get((payee, bucket))
+            if name in names:
+                suggestions[transaction["id"]] = name
+                break
+    return suggestions
+
+
+def lookup_categories(budget_uuid, transactions, categories):
+    """Remembered categories of the transactions whose payee was categorized before."""
+    if not transactions:
+        return {}
+    memos = get_DB().categorymemos.find(
+        lookup_filter(budget_uuid, transactions), {"payee": 1, "bucket": 1, "categoryName": 1, "_id": 0}
+    )
+    return match_memos(list(memos), transactions, categories)
+
+
+def memo_operations(budget_uuid, assignments):
+    """
+    Upserts remembering the category applied to each transaction.
+
+    Args:
+        assignments: (transaction, category) pairs; categories need "name" and "uuid"
+    """
+    now = datetime.utcnow()
+    operations = []
+    for transaction, category in assignments:
+        payee = normalize_payee(transaction.get("payee_name"))
+        if payee is None:
+            continue
+        for bucket in _buckets(transaction):
+            operations.append(UpdateOne(
+                {"budgetUuid": budget_uuid, "payee": payee, "bucket": bucket},
+                {
+                    "$set": {"categoryName": category["name"], "categoryUuid": category.get("uuid"), "updatedAt": now},
+                    "$inc": {"count": 1},
+                },
+                upsert=True,
+            ))
+    return operations
+
+
+def remember_categories(budget_uuid, assignments):
+    """
+    Store the categories applied to transactions, replacing earlier ones for the same payee.
+
+    Returns:
+        Number of memo entries written
+    """
+    operations = memo_operations(budget_uuid, assignments)
+    if not operations:
+        return 0
+    ensure_memo_indexes()
+    get_DB().categorymemos.bulk_write(operations, ordered=False)
+    return len(operations)
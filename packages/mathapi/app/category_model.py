@@ -0,0 +1,291 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+import math
+import os
+import threading
+import zlib
+from bson import Binary, ObjectId
+from app.budget_api import get_objectid_for_budget
+from app.categories_api import get_category_names_by_id
+from app.category_memo import amount_bucket, normalize_payee
+from app.db import get_DB
+from app.transactions_api import get_categorized_transactions
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Predictions at or above this confidence are used without asking OpenAI
+CATEGORY_MODEL_MIN_CONFIDENCE = float(os.getenv("CATEGORY_MODEL_MIN_CONFIDENCE", "0.9"))
+# Incremental training only sees newly inserted transactions, not recategorized ones,
+# so models are retrained from scratch once they are this old
+CATEGORY_MODEL_RETRAIN_HOURS = float(os.getenv("CATEGORY_MODEL_RETRAIN_HOURS", "24"))
+
+MODEL_VERSION = 1
+NGRAM_SIZES = (3, 4)
+
+# Feature groups: payee character n-grams, memo words and the amount bucket
+PAYEE, MEMO, AMOUNT = "p", "m", "a"
+
+
+def char_ngrams(text, sizes=NGRAM_SIZES):
+    """Character n-grams of a normalized text, with word boundaries marked by spaces."""
+    padded = f" {text} "
+    return [padded[start:start + size] for size in sizes for start in range(len(padded) - size + 1)]
+
+
+def transaction_features(payee_name, memo, amount):
+    """
+    Features of a transaction, per group.
+
+    Returns:
+        Dictionary of group ("p", "m" or "a") to a list of features
+    """
+    features = {AMOUNT: [amount_bucket(amount)]}
+    payee = normalize_payee(payee_name)
+    if payee:
+        features[PAYEE] = char_ngrams(payee)
+    memo = normalize_payee(memo)
+    if memo:
+        features[MEMO] = memo.split()
+    return features
+
+
+class CategoryModel:
+    """
+    Multinomial naive Bayes over payee n-grams, memo words and the amount bucket.
+
+    Training only adds counts, so the model is updated incrementally with new
+    transactions. Overlapping n-grams are far from independent, so each feature
+    group's summed log-likelihood is divided by the square root of its number of
+    features; otherwise a long payee name makes the posterior, used as the
+    confidence, saturate at 1.
+
+    Args:
+        alpha: Laplace smoothing
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.class_counts = defaultdict(int)  # category -> number of transactions
+        self.feature_counts = defaultdict(lambda: defaultdict(int))  # category -> feature -> count
+        self.group_totals = defaultdict(lambda: defaultdict(int))  # category -> group -> count
+        self.vocabulary = defaultdict(set)  # group -> features
+        self.last_transaction_id = None  # Training watermark in localtransactions
+        self.trained_at = None  # Start of the last training from scratch
+
+    @property
+    def transactions(self):
+        return sum(self.class_counts.values())
+
+    def learn(self, features, category):
+        """Add one labelled transaction."""
+        self.class_counts[category] += 1
+        counts = self.feature_counts[category]
+        for group, values in features.items():
+            self.group_totals[category][group] += len(values)
+            self.vocabulary[group].update(values)
+            for value in values:
+                counts[f"{group}:{value}"] += 1
+
+    def probabilities(self, features):
+        """
+        Posterior probability of every category.
+
+        Returns:
+            List of (category, probability), most likely first; empty for an untrained model
+        """
+        total = self.transactions
+        if not total:
+            return []
+        classes = len(self.class_counts)
+        scores = {}
+        for category, class_count in self.class_counts.items():
+            score = math.log((class_count + self.alpha) / (total + self.alpha * classes))
+            counts = self.feature_counts[category]
+            for group, values in features.items():
+                if not values:
+                    continue
+                denominator = self.group_totals[category][group] + self.alpha * (len(self.vocabulary[group]) + 1)
+                score += sum(
+                    math.log((counts.get(f"{group}:{value}", 0) + self.alpha) / denominator) for value in values
+                ) / math.sqrt(len(values))
+            scores[category] = score
+
+        best = max(scores.values())
+        weights = {category: math.exp(score - best) for category, score in scores.items()}
+        norm = sum(weights.values())
+        return sorted(
+            ((category, weight / norm) for category, weight in weights.items()), key=lambda item: -item[1]
+        )
+
+    def needs_full_training(self, now=None, max_age=timedelta(hours=CATEGORY_MODEL_RETRAIN_HOURS)):
+        """Whether the model was never trained from scratch, or longer than `max_age` ago."""
+        return self.trained_at is None or (now or datetime.utcnow()) - self.trained_at >= max_age
+
+    def predict(self, features):
+        """Return (category, confidence) of the most likely category, or (None, 0.0)."""
+        probabilities = self.probabilities(features)
+        return probabilities[0] if probabilities else (None, 0.0)
+
+    def to_blob(self):
+        """Serialize to zlib-compressed JSON."""
+        state = {
+            "version": MODEL_VERSION,
+            "alpha": self.alpha,
+            "class_counts": self.class_counts,
+            "feature_counts": self.feature_counts,
+            "group_totals": self.group_totals,
+            "vocabulary": {group: sorted(values) for group, values in self.vocabulary.items()},
+        }
+        return zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def from_blob(cls, blob):
+        state = json.loads(zlib.decompress(blob).decode("utf-8"))
+        if state.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported category model version: {state.get('version')}")
+        model = cls(alpha=state["alpha"])
+        model.class_counts.update(state["class_counts"])
+        for category, counts in state["feature_counts"].items():
+            model.feature_counts[category].update(counts)
+        for category, totals in state["group_totals"].items():
+            model.group_totals[category].update(totals)
+        for group, values in state["vocabulary"].items():
+            model.vocabulary[group] = set(values)
+        return model
+
+
+# Models of this process per budget UUID, loaded from MongoDB on first use
+_models = {}
+_model_locks = defaultdict(threading.Lock)
+_models_lock = threading.Lock()
+
+
+def load_model(budget_uuid):
+    """Load the persisted model of a budget, or return an untrained one."""
+    document = get_DB().categorymodels.find_one({"budgetUuid": budget_uuid})
+    if document:
+        try:
+            model = CategoryModel.from_blob(document["model"])
+            model.last_transaction_id = document.get("lastTransactionId")
+            model.trained_at = document.get("trainedAt")
+            return model
+        except (ValueError, KeyError, zlib.error) as e:
+            logger.warning("category_model_discarded budget=%s error=%s", budget_uuid, e)
+    return CategoryModel()
+
+
+def save_model(budget_uuid, model):
+    blob = model.to_blob()
+    get_DB().categorymodels.update_one(
+        {"budgetUuid": budget_uuid},
+        {"$set": {
+            "model": Binary(blob),
+            "lastTransactionId": model.last_transaction_id,
+            "trainedAt": model.trained_at,
+            "transactions": model.transactions,
+            "categories": len(model.class_counts),
+            "updatedAt": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+    return len(blob)
+
+
+def train_model(budget_uuid, model=None):
+    """
+    Bring the model of a budget up to date with the categorized local transactions.
+
+    Only transactions inserted after the model's watermark are read, and the
+    model is persisted when it learned anything. A model without a watermark is
+    trained from scratch.
+
+    Returns:
+        Number of transactions learned
+    """
+    model = model if model is not None else load_model(budget_uuid)
+    budget_id = get_objectid_for_budget(budget_uuid)
+    if not budget_id:
+        return 0
+    category_names = get_category_names_by_id(budget_id)
+    if model.last_transaction_id is None:
+        model.trained_at = datetime.utcnow()
+
+    learned = 0
+    last_id = ObjectId(model.last_transaction_id) if model.last_transaction_id else None
+    for transaction in get_categorized_transactions(budget_id, last_id):
+        last_id = transaction["_id"]
+        name = category_names.get(transaction.get("categoryId"))
+        payee_name = transaction.get("payeeName") or ""
+        if not name or payee_name.startswith("Transfer :"):
+            continue
+        model.learn(transaction_features(payee_name, transaction.get("memo"), transaction.get("amount")), name)
+        learned += 1
+
+    if last_id is not None and str(last_id) != model.last_transaction_id:
+        model.last_transaction_id = str(last_id)
+        size = save_model(budget_uuid, model)
+        logger.info(
+            "category_model_trained budget=%s learned=%d transactions=%d bytes=%d",
+            budget_uuid, learned, model.transactions, size,
+        )
+    return learned
+
+
+def _model_lock(budget_uuid):
+    with _models_lock:
+        return _model_locks[budget_uuid]
+
+
+def _up_to_date_model(budget_uuid):
+    """The trained model of a budget; the caller holds the budget's lock."""
+    model = _models.get(budget_uuid)
+    if model is None:
+        model = load_model(budget_uuid)
+    if model.needs_full_training():
+        # Transactions recategorized after they were learned are only picked up from scratch
+        model = CategoryModel(alpha=model.alpha)
+    train_model(budget_uuid, model)
+    _models[budget_uuid] = model
+    return model
+
+
+def get_model(budget_uuid):
+    """
+    Return the up-to-date model of a budget, training it incrementally if needed.
+
+    Other requests keep training the returned model; only read it while holding
+    the budget's lock, as predict_categories does.
+    """
+    with _model_lock(budget_uuid):  # Budgets train independently; requests for one budget wait for its update
+        return _up_to_date_model(budget_uuid)
+
+
+def predict_categories(budget_uuid, transactions, categories, min_confidence=CATEGORY_MODEL_MIN_CONFIDENCE):
+    """
+    Categorize transactions with the budget's model.
+
+    Args:
+        transactions: YNAB transactions with "id", "payee_name", "memo" and "amount"
+        categories: The budget's categories; predictions of other categories are dropped
+        min_confidence: Minimum posterior probability of a returned prediction
+
+    Returns:
+        Dictionary of transaction id to (category name, confidence)
+    """
+    if not transactions:
+        return {}
+    names = {category["name"] for category in categories}
+    predictions = {}
+    # Predict under the budget's lock, so no other request trains the model meanwhile
+    with _model_lock(budget_uuid):
+        model = _up_to_date_model(budget_uuid)
+        for transaction in transactions:
+            features = transaction_features(
+                transaction.get("payee_name"), transaction.get("memo"), transaction.get("amount")
+            )
+            name, confidence = model.predict(features)
+            if name in names and confidence >= min_confidence:
+                predictions[transaction["id"]] = (name, confidence)
+    return predictions
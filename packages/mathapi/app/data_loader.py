@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from app.budget_api import get_objectid_for_budget
+from app.ynab_cache import get_scheduled_transactions
+from app.categories_api import get_categories_for_budget, PROJECTION_CATEGORY_FIELDS
+from app.accounts_api import get_accounts_for_budget, PROJECTION_ACCOUNT_FIELDS
+from app.metrics import observe_stage
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_LOADER_MAX_WORKERS = int(os.getenv("DATA_LOADER_MAX_WORKERS", "8"))
+
+
+def _create_executor():
+    return ThreadPoolExecutor(max_workers=DATA_LOADER_MAX_WORKERS, thread_name_prefix="data-loader")
+
+
+# Shared by all request threads of the process; tasks never submit nested tasks
+_executor = _create_executor()
+
+
+def _reset_after_fork():
+    # Worker threads do not survive fork(), so a child needs its own pool
+    global _executor
+    _executor = _create_executor()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _timed(timings, name, func, *args):
+    """Call func(*args) and record its duration in milliseconds under `name`."""
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _scheduled_transactions(budget_uuid):
+    future_transactions = get_scheduled_transactions(budget_uuid)
+    if isinstance(future_transactions, dict) and "error" in future_transactions:
+        raise RuntimeError(future_transactions["error"])
+    return future_transactions
+
+
+def _wait_for(futures):
+    """Wait for all futures, raising the first exception as soon as one fails."""
+    done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+    for future in futures:
+        if future in done and future.exception() is not None:
+            for other in pending:
+                other.cancel()
+            raise future.exception()
+    return [future.result() for future in futures]
+
+
+def load_projection_inputs(budget_uuid):
+    """
+    Load everything a balance projection needs, running independent fetches concurrently.
+
+    The YNAB scheduled transactions only need the budget UUID, so they are fetched
+    while the budget ObjectId is looked up; the categories and accounts queries
+    then run in parallel.
+
+    Args:
+        budget_uuid: The UUID of the budget
+
+    Returns:
+        Dictionary with "accounts", "categories", "future_transactions" and
+        "timings" (milliseconds spent in each fetch)
+
+    Raises:
+        The first exception raised by any of the fetches
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    scheduled = _executor.submit(_timed, timings, "scheduled_transactions", _scheduled_transactions, budget_uuid)
+    try:
+        budget_id = _timed(timings, "budget_id", get_objectid_for_budget, budget_uuid)
+    except Exception:
+        scheduled.cancel()
+        raise
+    categories = _executor.submit(
+        _timed, timings, "categories", get_categories_for_budget, budget_id, PROJECTION_CATEGORY_FIELDS
+    )
+    accounts = _executor.submit(
+        _timed, timings, "accounts", get_accounts_for_budget, budget_id, PROJECTION_ACCOUNT_FIELDS
+    )
+
+    future_transactions, categories, accounts = _wait_for([scheduled, categories, accounts])
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    observe_stage("load_projection_inputs", timings["total"] / 1000)
+    logger.info(
+        "projection_inputs_loaded budget=%s %s",
+        budget_uuid, " ".join(f"{name}_ms={value}" for name, value in timings.items()),
+    )
+    return {
+        "accounts": accounts,
+        "categories": categories,
+        "future_transactions": future_transactions,
+        "timings": timings,
+    }
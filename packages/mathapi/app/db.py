@@ -1,6 +1,9 @@
 # MongoDB connection
 import os
-from pymongo import MongoClient
+import threading
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import PyMongoError
+from app.metrics import MongoCommandMetrics
 import logging
 from dotenv import load_dotenv
 
@@ -11,10 +14,145 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI")
-logger.info(f"Connecting to MongoDB with URI: {MONGODB_URI}")
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "test")
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+MONGODB_READY_TIMEOUT_MS = int(os.getenv("MONGODB_READY_TIMEOUT_MS", "1000"))
 
-client = MongoClient(MONGODB_URI)
-db = client["test"]  # Replace with the actual database name
+# One client per process, created on first use; reset in forked children
+_client = None
+_probe_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_async_client = None
+_async_client_pid = None
+
+def redact_uri(uri):
+    """Strip credentials and options from a MongoDB URI for logging."""
+    if not uri:
+        return uri
+    scheme, _, rest = uri.partition("://")
+    hosts = rest.split("@")[-1].split("/")[0].split("?")[0]
+    return f"{scheme}://{hosts}"
+
+def _client_options(**overrides):
+    options = dict(
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+        connect=False,  # Connect on the first operation, never at import or before a fork
+        event_listeners=[MongoCommandMetrics()],
+    )
+    options.update(overrides)
+    return options
+
+def _create_client(**overrides):
+    return MongoClient(MONGODB_URI, **_client_options(**overrides))
+
+def get_client():
+    """
+    Return this process's MongoClient, creating it lazily.
+
+    A client inherited through fork() is never reused: the child creates its own
+    on first use, as pymongo clients are not fork-safe.
+    """
+    global _client, _probe_client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                logger.info(f"Connecting to MongoDB at {redact_uri(MONGODB_URI)} (pid {pid})")
+                _client = _create_client()
+                _probe_client = None
+                _client_pid = pid
+    return _client
 
 def get_DB():
-    return db
\ No newline at end of file
+    return get_client()[MONGODB_DB_NAME]
+
+def get_async_DB():
+    """
+    Return this process's database through the asyncio Motor driver.
+
+    Used by the ASGI app (app.asgi); like get_client() the client is created on
+    first use, with the same pool and timeout settings, and never crosses a fork.
+    """
+    global _async_client, _async_client_pid
+    from motor.motor_asyncio import AsyncIOMotorClient  # Only the ASGI app needs Motor
+
+    pid = os.getpid()
+    if _async_client is None or _async_client_pid != pid:
+        with _client_lock:
+            if _async_client is None or _async_client_pid != pid:
+                logger.info(f"Connecting to MongoDB (async) at {redact_uri(MONGODB_URI)} (pid {pid})")
+                _async_client = AsyncIOMotorClient(MONGODB_URI, **_client_options())
+                _async_client_pid = pid
+    return _async_client[MONGODB_DB_NAME]
+
+def _reset_after_fork():
+    global _client, _probe_client, _client_pid, _client_lock, _async_client, _async_client_pid
+    _client = None
+    _probe_client = None
+    _client_pid = None
+    _async_client = None
+    _async_client_pid = None
+    _client_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def is_ready():
+    """
+    Cheap readiness check: ping MongoDB, waiting at most MONGODB_READY_TIMEOUT_MS.
+
+    Uses a single-connection probe client with a short server selection timeout so
+    a probe never blocks on the main client's longer timeouts.
+
+    Returns:
+        True if MongoDB answered the ping
+    """
+    global _probe_client
+    get_client()  # Resets the probe client after a fork
+    if _probe_client is None:
+        with _client_lock:
+            if _probe_client is None:
+                _probe_client = _create_client(
+                    maxPoolSize=1,
+                    minPoolSize=0,
+                    serverSelectionTimeoutMS=MONGODB_READY_TIMEOUT_MS,
+                    connectTimeoutMS=MONGODB_READY_TIMEOUT_MS,
+                    socketTimeoutMS=MONGODB_READY_TIMEOUT_MS,
+                    event_listeners=[],  # Readiness pings are not request work
+                )
+    try:
+        _probe_client.admin.command("ping")
+        return True
+    except PyMongoError as e:
+        logger.warning(f"MongoDB readiness check failed: {e}")
+        return False
+
+# Indexes the reference-data lookups rely on: (collection, keys)
+INDEXES = [
+    ("localbudgets", [("uuid", ASCENDING)]),
+    ("localcategories", [("budgetId", ASCENDING)]),
+    ("localaccounts", [("budgetId", ASCENDING)]),
+    ("localtransactions", [("budgetId", ASCENDING), ("date", ASCENDING)]),
+    ("localtransactions", [("budgetId", ASCENDING), ("_id", ASCENDING)]),
+]
+
+def ensure_indexes():
+    """
+    Create the indexes in INDEXES if they do not exist yet.
+
+    Collections are owned by the api package, so an index that conflicts with an
+    existing one is logged and skipped rather than failing startup.
+    """
+    for collection, keys in INDEXES:
+        try:
+            get_DB()[collection].create_index(keys)
+        except PyMongoError as e:
+            logger.warning(f"Could not ensure index {keys} on {collection}: {e}")
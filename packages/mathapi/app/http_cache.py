@@ -0,0 +1,132 @@
+import os
+import zlib
+import brotli
+from app.projection_cache import fingerprint, inputs_fingerprint
+
+# Bump when the output of the projection endpoints changes, so cached copies are refetched
+ETAG_VERSION = 1
+# Smaller bodies are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/html", "text/plain")
+ENCODINGS = ("br", "gzip")
+
+
+def projection_etag(inputs, days_ahead, simulations_version, endpoint, params):
+    """
+    Strong ETag of a projection response.
+
+    A projection is a function of its inputs, the registered simulations, the
+    day it starts on and the request parameters, so their fingerprint changes
+    exactly when the response would.
+
+    Args:
+        inputs: Projection inputs, as returned by load_projection_inputs
+        simulations_version: SimulationRegistry.version()
+        endpoint: The request path, so different endpoints never share a tag
+        params: The query parameters
+
+    Returns:
+        The entity tag, without quotes
+    """
+    inputs_key = inputs_fingerprint(inputs["accounts"], inputs["categories"], inputs["future_transactions"], days_ahead)
+    return fingerprint(ETAG_VERSION, inputs_key, simulations_version, endpoint, sorted(params.items()))[:40]
+
+
+def encoded_etag(etag, encoding):
+    """Tag of the `encoding`-compressed representation; strong tags differ per encoding."""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def not_modified(if_none_match, etag):
+    """
+    Whether the client's copy is current.
+
+    Args:
+        if_none_match: The request's parsed If-None-Match header (werkzeug ETags)
+        etag: The response's identity tag; the tags of its compressed
+            representations match too, since they carry the same data
+    """
+    return any(if_none_match.contains_weak(encoded_etag(etag, encoding)) for encoding in (None,) + ENCODINGS)
+
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the response encoding.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header (werkzeug Accept)
+
+    Returns:
+        "br" when accepted, else "gzip" when accepted, else None
+    """
+    for encoding in ENCODINGS:
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    """Whether a response may be compressed: a successful, not yet encoded text or JSON body."""
+    return (
+        response.status_code == 200
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+    )
+
+
+class Encoder:
+    """
+    Incremental gzip or Brotli compressor.
+
+    flush() emits everything compressed so far, so a streamed response can be
+    compressed chunk by chunk without holding back earlier lines.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_body(data, encoding):
+    """Compress a whole response body."""
+    encoder = Encoder(encoding)
+    return encoder.compress(data) + encoder.finish()
+
+
+def iter_compressed(chunks, encoding):
+    """Compress a streamed body, flushing after every chunk."""
+    encoder = Encoder(encoding)
+    for chunk in chunks:
+        yield encoder.compress(chunk) + encoder.flush()
+    yield encoder.finish()
+
+
+async def aiter_compressed(chunks, encoding):
+    """iter_compressed for async bodies."""
+    encoder = Encoder(encoding)
+    async for chunk in chunks:
+        yield encoder.compress(chunk) + encoder.flush()
+    yield encoder.finish()
@@ -0,0 +1,116 @@
+"""
+Prometheus metrics of the Math API, served on /metrics.
+
+Under gunicorn every worker is a separate process; set PROMETHEUS_MULTIPROC_DIR
+to an empty, writable directory so /metrics aggregates all of them (see
+gunicorn.conf.py).
+"""
+from contextlib import contextmanager
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+# Stages range from microseconds (a NEED category pass) to seconds (an OpenAI batch)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram(
+    "mathapi_stage_duration_seconds", "Time spent in each stage of a request", ["stage"], buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "mathapi_request_duration_seconds", "Time until the response is returned, per endpoint",
+    ["endpoint", "method", "status"], buckets=STAGE_BUCKETS,
+)
+EXTERNAL_CALLS = Counter(
+    "mathapi_external_calls_total", "Calls to YNAB, OpenAI and MongoDB", ["service", "outcome"]
+)
+ERRORS = Counter("mathapi_errors_total", "Stages that raised and requests answered with a 5xx", ["stage"])
+CACHE_EVENTS = Counter("mathapi_cache_events_total", "Cache lookups", ["cache", "result"])
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage; usable as a context manager or a decorator.
+
+    An exception raised in the stage is counted in mathapi_errors_total and re-raised.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(name).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def observe_stage(name, seconds):
+    """Record a stage timed by the caller."""
+    STAGE_SECONDS.labels(name).observe(seconds)
+
+
+@contextmanager
+def external_call(service):
+    """Time a call to an external service and count it by outcome ("ok" or "error")."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        STAGE_SECONDS.labels(f"{service}_fetch").observe(time.perf_counter() - start)
+        EXTERNAL_CALLS.labels(service, outcome).inc()
+
+
+def count_cache(cache, hits, misses=0):
+    """Count cache hits and misses; either may be a number of items."""
+    if hits:
+        CACHE_EVENTS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_EVENTS.labels(cache, "miss").inc(misses)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command as the "mongodb_fetch" stage; pass it to MongoClient(event_listeners=...)."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        STAGE_SECONDS.labels("mongodb_fetch").observe(event.duration_micros / 1e6)
+        EXTERNAL_CALLS.labels("mongodb", "ok").inc()
+
+    def failed(self, event):
+        STAGE_SECONDS.labels("mongodb_fetch").observe(event.duration_micros / 1e6)
+        EXTERNAL_CALLS.labels("mongodb", "error").inc()
+
+
+def observe_request(endpoint, method, status, seconds):
+    REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(seconds)
+    if status >= 500:
+        ERRORS.labels("http").inc()
+
+
+def latest_metrics():
+    """
+    Metrics in the Prometheus text format.
+
+    Returns:
+        (body, content type); with PROMETHEUS_MULTIPROC_DIR set the body
+        aggregates the metrics of every worker process
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of an exited worker; a no-op outside multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
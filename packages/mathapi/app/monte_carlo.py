@@ -0,0 +1,122 @@
+import numpy as np
+
+DEFAULT_PATHS = 1000
+MAX_PATHS = 5000
+MAX_CELLS = 2_000_000  # paths x days, bounds memory (~16MB per matrix) and request time
+DAYS_PER_MONTH = 30.4375
+SPEND_SHAPE = 4.0  # Gamma shape of a single spend; coefficient of variation 1/sqrt(4) = 0.5
+PERCENTILES = (5, 50, 95)
+
+
+def stochastic_categories(categories):
+    """
+    Select the categories whose spending is sampled instead of projected.
+
+    Categories without a NEED target contribute random spending on top of the
+    projection, less what is already scheduled for them (see unscheduled_share).
+    NEED categories are already spent deterministically by the
+    projection, so their sampled spending is centered: the expected daily spend
+    is added back, which widens the bands around the baseline without moving it.
+    Categories without a historical average are left out.
+
+    Returns:
+        List of (name, monthly average in thousands, daily spending probability, centered) tuples
+    """
+    selected = []
+    for category in categories:
+        target = category.get("target") or {}
+        monthly_average = abs(category.get("historicalAverage") or 0) / 1000  # Convert to thousands
+        if monthly_average <= 0:
+            continue
+        probability = category.get("typicalSpendingPattern") or 0
+        if not 0 < probability <= 1:
+            probability = 1 / DAYS_PER_MONTH  # Assume one spend per month
+        selected.append((category.get("name"), monthly_average, probability, target.get("goal_type") == "NEED"))
+    return selected
+
+
+def effective_paths(paths, days_ahead):
+    """Clamp the requested path count to MAX_PATHS and the MAX_CELLS budget."""
+    paths = max(1, min(int(paths), MAX_PATHS))
+    return max(1, min(paths, MAX_CELLS // (days_ahead + 1)))
+
+
+def unscheduled_share(baseline, scheduled_index, name, monthly_average):
+    """
+    Share of a category's monthly average not covered by its scheduled transactions.
+
+    The baseline already spends the scheduled transactions, so only the rest of
+    the historical average is sampled, month by month.
+
+    Returns:
+        Array of shape (days_ahead + 1,) with values between 0 and 1
+    """
+    months = (np.datetime64(baseline.start_date, "D") + np.arange(baseline.days_ahead + 1)).astype("datetime64[M]")
+    unique_months, month_of_day = np.unique(months, return_inverse=True)
+    share = []
+    for value in unique_months.astype(np.int64).tolist():  # Months since 1970-01
+        scheduled = scheduled_index.scheduled_amount(name, 1970 + value // 12, value % 12 + 1)
+        share.append(max(0.0, monthly_average - scheduled) / monthly_average)
+    return np.asarray(share)[month_of_day]
+
+
+def simulate_balance_paths(baseline, categories, paths=DEFAULT_PATHS, seed=None):
+    """
+    Sample daily balance paths around a deterministic baseline projection.
+
+    For each category a spend happens on a day with probability
+    `typicalSpendingPattern`; its size is Gamma distributed so that the expected
+    monthly spending equals `historicalAverage`, less the month's scheduled
+    transactions of the category. NEED categories only add the
+    deviation from that expectation (see stochastic_categories). Sampling is
+    vectorized across all paths and days, one category at a time.
+
+    Args:
+        baseline: ColumnarProjection the sampled spending is subtracted from
+        categories: List of budget categories
+        paths: Number of paths to sample, capped by effective_paths()
+        seed: Optional seed for reproducible samples
+
+    Returns:
+        Array of shape (paths, days_ahead + 1) with the sampled daily balances
+    """
+    rng = np.random.default_rng(seed)
+    days = baseline.days_ahead + 1
+    paths = effective_paths(paths, baseline.days_ahead)
+
+    scheduled_index = baseline.scheduled_index()
+    spending = np.zeros((paths, days))
+    for name, monthly_average, probability, centered in stochastic_categories(categories):
+        spend_mean = monthly_average / (DAYS_PER_MONTH * probability)
+        spend_days = rng.random((paths, days), dtype=np.float32) < probability
+        amounts = rng.gamma(SPEND_SHAPE, spend_mean / SPEND_SHAPE, size=int(spend_days.sum()))
+        if centered:
+            spending[spend_days] += amounts
+            spending -= monthly_average / DAYS_PER_MONTH
+        else:
+            share = unscheduled_share(baseline, scheduled_index, name, monthly_average)
+            spending[spend_days] += amounts * np.broadcast_to(share, (paths, days))[spend_days]
+
+    return baseline.balance - np.cumsum(spending, axis=1)
+
+
+def project_balance_bands(baseline, categories, paths=DEFAULT_PATHS, seed=None):
+    """
+    Summarize sampled balance paths as percentile bands.
+
+    Returns:
+        Dictionary with the dates, the baseline, the p5/p50/p95 balances and the
+        probability of a negative balance for every day, plus the path count used
+    """
+    balances = simulate_balance_paths(baseline, categories, paths, seed)
+    p5, p50, p95 = np.percentile(balances, PERCENTILES, axis=0)
+    return {
+        "dates": baseline.dates().tolist(),
+        "baseline": baseline.balance.tolist(),
+        "p5": p5.tolist(),
+        "p50": p50.tolist(),
+        "p95": p95.tolist(),
+        "probability_negative": (balances < 0).mean(axis=0).tolist(),
+        "paths": balances.shape[0],
+        "seed": seed,
+    }
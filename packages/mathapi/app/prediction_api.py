@@ -1,11 +1,14 @@
 from datetime import datetime, timedelta
 from app.budget_api import get_objectid_for_budget
-from app.ynab_api import get_scheduled_transactions
-from app.categories_api import get_categories_for_budget
-from app.accounts_api import get_accounts_for_budget
+from app.ynab_cache import get_scheduled_transactions
+from app.categories_api import get_categories_for_budget, PROJECTION_CATEGORY_FIELDS
+from app.accounts_api import get_accounts_for_budget, PROJECTION_ACCOUNT_FIELDS
+from app.recurrence import expand_scheduled_transaction
+from app.metrics import stage
 from collections import OrderedDict
 import calendar
 import logging
+import numpy as np
 
 CADENCE_CONFIG = {
     1: {"type": "monthly", "interval": 1},       # Monthly cadence
@@ -15,6 +18,52 @@ CADENCE_CONFIG = {
 }
 
 
+class ScheduledIndex(dict):
+    """
+    Scheduled dates per category, with the scheduled totals per category and month.
+
+    The mapping itself is category name -> set of ISO dates, as returned by
+    add_future_transactions_to_projection. NEED processing reads the month totals
+    through scheduled_amount() instead of rescanning every day of the projection.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.monthly_totals = {}
+
+    def add(self, category_name, date_str, amount):
+        """Record a scheduled transaction of `amount` on `date_str` for a category."""
+        self.setdefault(category_name, set()).add(date_str)
+        key = (category_name, int(date_str[:4]), int(date_str[5:7]))
+        self.monthly_totals[key] = self.monthly_totals.get(key, 0) + abs(amount)  # Use abs() since changes are negative
+
+    def add_occurrences(self, category_name, date_strs, amount):
+        """Record every occurrence of one scheduled transaction, parsing each month only once."""
+        self.setdefault(category_name, set()).update(date_strs)
+        amount = abs(amount)
+        totals = self.monthly_totals
+        month_str, key = None, None
+        for date_str in date_strs:
+            if date_str[:7] != month_str:
+                month_str = date_str[:7]
+                key = (category_name, int(month_str[:4]), int(month_str[5:7]))
+            totals[key] = totals.get(key, 0) + amount
+
+    def scheduled_amount(self, category_name, year, month):
+        """Total absolute amount scheduled for a category in the given month."""
+        return self.monthly_totals.get((category_name, year, month), 0)
+
+    @classmethod
+    def from_projection(cls, daily_projection):
+        """Build the index from the scheduled transactions already in a daily projection."""
+        index = cls()
+        for date_str, day_data in daily_projection.items():
+            for change in day_data["changes"]:
+                if change.get("reason") == "Scheduled Transaction":
+                    index.add(change["category"], date_str, change["amount"])
+        return index
+
+
 def projected_balances_for_budget(budget_uuid, days_ahead=300, simulations=None):
     """
     Calculate projected balances for a budget over a specified period.
@@ -29,15 +78,16 @@ def projected_balances_for_budget(budget_uuid, days_ahead=300, simulations=None)
     """
     budget_id = get_objectid_for_budget(budget_uuid)
     future_transactions = get_scheduled_transactions(budget_uuid)
-    categories = get_categories_for_budget(budget_id)
-    accounts = get_accounts_for_budget(budget_id)
+    categories = get_categories_for_budget(budget_id, PROJECTION_CATEGORY_FIELDS)
+    accounts = get_accounts_for_budget(budget_id, PROJECTION_ACCOUNT_FIELDS)
     
     # Perform balance prediction logic here
     projected_balances = project_daily_balances_with_reasons(accounts, categories, future_transactions, days_ahead, simulations)
     return projected_balances
 
 
-def project_daily_balances_with_reasons(accounts, categories, future_transactions, days_ahead=30, simulations=None):
+def project_daily_balances_with_reasons(accounts, categories, future_transactions, days_ahead=30, simulations=None,
+                                        start_date=None):
     """
     Project daily balances with detailed reasons for changes.
     
@@ -47,20 +97,26 @@ def project_daily_balances_with_reasons(accounts, categories, future_transaction
         future_transactions: List of scheduled future transactions
         days_ahead: Number of days to project into the future
         simulations: Optional list of simulation scenarios
+        start_date: First projected day; defaults to today (set by benchmarks to be reproducible)
         
     Returns:
         OrderedDict containing daily projections sorted by date
     """
     initial_balance = calculate_initial_balance(accounts)
-    daily_projection = initialize_daily_projection(initial_balance, days_ahead)
+    with stage("initialize_daily_projection"):
+        daily_projection = initialize_daily_projection(initial_balance, days_ahead, start_date)
 
-    scheduled_dates_by_category = add_future_transactions_to_projection(daily_projection, future_transactions)
+    with stage("add_future_transactions_to_projection"):
+        scheduled_dates_by_category = add_future_transactions_to_projection(daily_projection, future_transactions)
 
-    process_need_categories(daily_projection, categories, scheduled_dates_by_category, days_ahead)
+    with stage("process_need_categories"):
+        process_need_categories(daily_projection, categories, scheduled_dates_by_category, days_ahead, start_date)
 
-    add_simulations_to_projection(daily_projection, simulations)
+    with stage("add_simulations_to_projection"):
+        add_simulations_to_projection(daily_projection, simulations)
 
-    calculate_running_balance(daily_projection, initial_balance, days_ahead)
+    with stage("calculate_running_balance"):
+        calculate_running_balance(daily_projection, initial_balance, days_ahead, start_date)
     projected_balances = {date: data for date, data in daily_projection.items() if data["changes"]}
     sorted_projected_balances = OrderedDict(sorted(projected_balances.items(), key=lambda item: item[0]))
     
@@ -72,20 +128,21 @@ def calculate_initial_balance(accounts):
     return sum(account['balance'] for account in accounts) / 1000  # Convert to thousands
 
 
-def initialize_daily_projection(initial_balance, days_ahead):
+def initialize_daily_projection(initial_balance, days_ahead, start_date=None):
     """
     Initialize the daily projection dictionary with empty entries.
     
     Args:
         initial_balance: Starting balance for the projection
         days_ahead: Number of days to project into the future
+        start_date: First projected day, today by default
         
     Returns:
         Dictionary with initialized daily entries
     """
     daily_projection = {}
     # Start with current day (day 0) up to days_ahead
-    current_date = datetime.now().date()
+    current_date = start_date or datetime.now().date()
     daily_projection[current_date.isoformat()] = {
         "balance": 0,  # Start with 0, balance will be calculated later
         "changes": [{
@@ -108,39 +165,50 @@ def initialize_daily_projection(initial_balance, days_ahead):
 def add_future_transactions_to_projection(daily_projection, future_transactions):
     """
     Add scheduled future transactions to the daily projection.
+
+    Recurring schedules are expanded into every occurrence within the projection,
+    based on their YNAB frequency.
     
     Args:
         daily_projection: Dictionary containing daily projections
         future_transactions: List of scheduled transactions
         
     Returns:
-        Dictionary mapping category names to sets of scheduled dates
+        ScheduledIndex mapping category names to sets of scheduled dates, which also
+        holds the scheduled totals per (category, year-month)
     """
-    scheduled_dates_by_category = {}
+    scheduled_dates_by_category = ScheduledIndex()
+    if not daily_projection:
+        return scheduled_dates_by_category
+    horizon_start, horizon_end = min(daily_projection), max(daily_projection)
+
     for txn in future_transactions:
-        transaction_date = datetime.strptime(txn['date_next'], '%Y-%m-%d').date().isoformat()
         category_name = txn['category_name']
         amount = txn['amount'] / 1000  # Convert to thousands
+        occurrences = expand_scheduled_transaction(txn, horizon_start, horizon_end)
 
-        if transaction_date in daily_projection:
-            daily_projection[transaction_date]["changes"].append({
-                "reason": "Scheduled Transaction",
-                "amount": amount,  # Keep raw numeric value
-                "category": category_name,
-                "account": txn['account_name'],
-                "payee": txn['payee_name'],
-                "memo": txn['memo']
-            })
+        for transaction_date in np.datetime_as_string(occurrences, unit="D").tolist():
+            if transaction_date in daily_projection:
+                daily_projection[transaction_date]["changes"].append({
+                    "reason": "Scheduled Transaction",
+                    "amount": amount,  # Keep raw numeric value
+                    "category": category_name,
+                    "account": txn['account_name'],
+                    "payee": txn['payee_name'],
+                    "memo": txn['memo']
+                })
 
-            if category_name not in scheduled_dates_by_category:
-                scheduled_dates_by_category[category_name] = set()
-            scheduled_dates_by_category[category_name].add(transaction_date)
+                scheduled_dates_by_category.add(category_name, transaction_date, amount)
 
     return scheduled_dates_by_category
 
 
-def process_need_categories(daily_projection, categories, scheduled_dates_by_category, days_ahead):
+def process_need_categories(daily_projection, categories, scheduled_dates_by_category, days_ahead, start_date=None):
     """Process all categories with NEED type goals."""
+    if not isinstance(scheduled_dates_by_category, ScheduledIndex):
+        # Build the month totals once for all categories
+        scheduled_dates_by_category = ScheduledIndex.from_projection(daily_projection)
+
     for category in categories:
         target = category.get("target")
 
@@ -150,11 +218,12 @@ def process_need_categories(daily_projection, categories, scheduled_dates_by_cat
                 category,
                 target,
                 scheduled_dates_by_category,
-                days_ahead
+                days_ahead,
+                start_date
             )
 
 
-def process_need_category(daily_projection, category, target, scheduled_dates_by_category, days_ahead):
+def process_need_category(daily_projection, category, target, scheduled_dates_by_category, days_ahead, start_date=None):
     """
     Process a single NEED category and its spending targets.
     
@@ -162,15 +231,12 @@ def process_need_category(daily_projection, category, target, scheduled_dates_by
         daily_projection: Dictionary containing daily projections
         category: Category object with target information
         target: Target configuration for the category
-        scheduled_dates_by_category: Dictionary of already scheduled dates
+        scheduled_dates_by_category: ScheduledIndex of already scheduled transactions
         days_ahead: Number of days to project into the future
+        start_date: First projected day, today by default
     """
-    target_amount = target.get("goal_target", 0) / 1000  # Convert to thousands
-    current_balance = category.get("balance", 0) / 1000  # Convert to thousands
-    global_overall_left = target.get("goal_overall_left")  # This could be None
-    if global_overall_left is None:  # Explicitly handle None
-        global_overall_left = 0
-    global_overall_left /= 1000  # Convert to thousands
+    target_amount, current_balance, global_overall_left = need_category_amounts(category, target)
+    scheduled_index = scheduled_dates_by_category if isinstance(scheduled_dates_by_category, ScheduledIndex) else None
 
     # Pass the current balance to apply_need_category_spending
     # That function will determine if the balance should be used (only for current month)
@@ -181,11 +247,29 @@ def process_need_category(daily_projection, category, target, scheduled_dates_by
         current_balance,
         target_amount,
         days_ahead,
-        global_overall_left
+        global_overall_left,
+        scheduled_index,
+        start_date
     )
 
 
-def apply_need_category_spending(daily_projection, category, target, current_balance, target_amount, days_ahead, global_overall_left):
+def need_category_amounts(category, target):
+    """
+    Extract the amounts a NEED category works with, converted to thousands.
+
+    Returns:
+        Tuple of (target_amount, current_balance, global_overall_left)
+    """
+    target_amount = target.get("goal_target", 0) / 1000  # Convert to thousands
+    current_balance = category.get("balance", 0) / 1000  # Convert to thousands
+    global_overall_left = target.get("goal_overall_left")  # This could be None
+    if global_overall_left is None:  # Explicitly handle None
+        global_overall_left = 0
+    global_overall_left /= 1000  # Convert to thousands
+    return target_amount, current_balance, global_overall_left
+
+
+def apply_need_category_spending(daily_projection, category, target, current_balance, target_amount, days_ahead, global_overall_left, scheduled_index=None, start_date=None):
     """
     Apply spending patterns for a NEED category based on its target configuration.
     
@@ -197,8 +281,42 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
         target_amount: Target amount for the category
         days_ahead: Number of days to project into the future
         global_overall_left: Remaining amount in the overall goal
+        scheduled_index: Optional ScheduledIndex; built from the projection when omitted
+        start_date: First projected day, today by default
+    """
+    if scheduled_index is None:
+        scheduled_index = ScheduledIndex.from_projection(daily_projection)
+    category_name = category["name"]
+
+    for date_str, amount, reason in iter_need_category_spending(
+        category, target, current_balance, target_amount, days_ahead, global_overall_left,
+        lambda year, month: scheduled_index.scheduled_amount(category_name, year, month), start_date
+    ):
+        apply_transaction(daily_projection, date_str, amount, category_name, reason)
+
+
+def iter_need_category_spending(category, target, current_balance, target_amount, days_ahead, global_overall_left, scheduled_amount_for_month, today=None):
+    """
+    Yield the spending a NEED category is expected to cause, month by month.
+
+    This holds the cadence and goal rules shared by the dict-based projection and
+    the columnar engine; it never touches a projection itself.
+
+    Args:
+        category: Category object with target information
+        target: Target configuration for the category
+        current_balance: Current balance in the category
+        target_amount: Target amount for the category
+        days_ahead: Number of days to project into the future
+        global_overall_left: Remaining amount in the overall goal
+        scheduled_amount_for_month: Callable (year, month) -> absolute amount already
+            covered by scheduled transactions of this category in that month
+        today: First projected day, today by default
+
+    Yields:
+        Tuples of (ISO date string, positive amount, reason)
     """
-    today = datetime.now().date()
+    today = today or datetime.now().date()
     applied_months = set()
     cadence_interval = None
     cadence_config = None
@@ -236,15 +354,7 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
         is_current_month = today.year == target_year and today.month == target_month
 
         # Calculate scheduled transactions for this month
-        month_start = datetime(target_year, target_month, 1).date()
-        month_end = datetime(target_year, target_month, days_in_month).date()
-        scheduled_amount = 0
-        for day in range(days_in_month):
-            check_date = (month_start + timedelta(days=day)).isoformat()
-            if check_date in daily_projection:
-                for change in daily_projection[check_date]["changes"]:
-                    if change["reason"] == "Scheduled Transaction" and change["category"] == category["name"]:
-                        scheduled_amount += abs(change["amount"])  # Use abs() since changes are negative
+        scheduled_amount = scheduled_amount_for_month(target_year, target_month)
 
         # Handle yearly cadence (goal_cadence 13) separately
         if goal_cadence == 13:  # Yearly cadence
@@ -254,7 +364,7 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
                     remaining_amount = global_overall_left if global_overall_left > 0 else target_amount
                     remaining_amount = max(0, remaining_amount - scheduled_amount)
                     if remaining_amount > 0:
-                        apply_transaction(daily_projection, date_str, remaining_amount, category["name"], "Yearly Payment")
+                        yield date_str, remaining_amount, "Yearly Payment"
                     applied_months.add(target_date)
             continue
 
@@ -262,7 +372,7 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
         if is_current_month:
             # For the current month, use the current balance as spending
             if current_balance > 0:
-                apply_transaction(daily_projection, date_str, current_balance, category["name"], "Current Month Balance")
+                yield date_str, current_balance, "Current Month Balance"
             continue
 
         # Handle goal_target_month logic for non-yearly cadences
@@ -271,7 +381,7 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
                 if global_overall_left > 0:
                     remaining_amount = max(0, global_overall_left - scheduled_amount)
                     if remaining_amount > 0:
-                        apply_transaction(daily_projection, date_str, remaining_amount, category["name"], "Remaining Spending (Goal Target)")
+                        yield date_str, remaining_amount, "Remaining Spending (Goal Target)"
                 applied_months.add(target_date)
                 continue
             elif target_date > goal_target_month and cadence_interval:
@@ -279,7 +389,7 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
                 if months_since_goal % cadence_interval == 0:
                     remaining_amount = max(0, target_amount - scheduled_amount)
                     if remaining_amount > 0:
-                        apply_transaction(daily_projection, date_str, remaining_amount, category["name"], f"Recurring Spending ({cadence_config['type'].capitalize()} every {goal_cadence_frequency})")
+                        yield date_str, remaining_amount, f"Recurring Spending ({cadence_config['type'].capitalize()} every {goal_cadence_frequency})"
                     applied_months.add(target_date)
                 continue
 
@@ -287,11 +397,11 @@ def apply_need_category_spending(daily_projection, category, target, current_bal
         if not goal_target_month:
             if is_current_month:
                 if current_balance > 0:
-                    apply_transaction(daily_projection, date_str, current_balance, category["name"], "Current Month Balance")
+                    yield date_str, current_balance, "Current Month Balance"
             else:
                 remaining_amount = max(0, target_amount - scheduled_amount)
                 if remaining_amount > 0:
-                    apply_transaction(daily_projection, date_str, remaining_amount, category["name"], "Future Month Target")
+                    yield date_str, remaining_amount, "Future Month Target"
 
 
 def apply_transaction(daily_projection, date_str, amount, category_name, reason):
@@ -311,7 +421,9 @@ def add_simulations_to_projection(daily_projection, simulations):
 
     for sim in simulations:
         sim_date = sim["date"]
-        sim_amount = float(sim["amount"])  # Convert string to float
+        sim_amount = sim["amount"]
+        if not isinstance(sim_amount, float):
+            sim_amount = float(sim_amount)  # Convert string to float; registry simulations are already converted
         sim_reason = sim.get("reason", "Simulation")
         sim_category = sim.get("category", "Miscellaneous")
 
@@ -324,7 +436,7 @@ def add_simulations_to_projection(daily_projection, simulations):
             })
 
 
-def calculate_running_balance(daily_projection, initial_balance, days_ahead):
+def calculate_running_balance(daily_projection, initial_balance, days_ahead, start_date=None):
     """
     Calculate running balances for each day in the projection.
     
@@ -332,10 +444,12 @@ def calculate_running_balance(daily_projection, initial_balance, days_ahead):
         daily_projection: Dictionary containing daily projections
         initial_balance: Starting balance for the calculation
         days_ahead: Number of days to calculate balances for
+        start_date: First projected day, today by default
     """
+    start_date = start_date or datetime.now().date()
     running_balance = 0  # Start with 0 since initial_balance is already added as a change
     for day in range(days_ahead + 1):
-        current_date = (datetime.now().date() + timedelta(days=day)).isoformat()
+        current_date = (start_date + timedelta(days=day)).isoformat()
         day_entry = daily_projection[current_date]
 
         # Apply changes and calculate new balance
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from app.metrics import count_cache
+
+PROJECTION_CACHE_MAX_ENTRIES = int(os.getenv("PROJECTION_CACHE_MAX_ENTRIES", "256"))
+PROJECTION_CACHE_TTL_SECONDS = float(os.getenv("PROJECTION_CACHE_TTL_SECONDS", "900"))
+PROJECTION_CACHE_MAX_BYTES = int(os.getenv("PROJECTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Rough per-item costs used to estimate the memory held by a cached projection
+DAY_ENTRY_BYTES = 400
+CHANGE_ENTRY_BYTES = 600
+
+
+def fingerprint(*parts):
+    """Stable SHA-256 hex digest of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def inputs_fingerprint(accounts, categories, future_transactions, days_ahead, reference_date=None):
+    """
+    Fingerprint of the data a projection is built from.
+
+    Args:
+        reference_date: The projection's day 0; defaults to today, since every
+            projection starts at the current date
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    reference_date = reference_date or datetime.now().date()
+    return fingerprint(accounts, categories, future_transactions, days_ahead, reference_date.isoformat())
+
+
+def estimate_size(value):
+    """Approximate memory held by a projection result in bytes."""
+    if hasattr(value, "balance") and hasattr(value, "changes"):  # ColumnarProjection
+        return value.balance.nbytes + value.balance_diff.nbytes + len(value.changes) * CHANGE_ENTRY_BYTES
+    if isinstance(value, dict):
+        return sum(
+            DAY_ENTRY_BYTES + len(day.get("changes", ())) * CHANGE_ENTRY_BYTES
+            for day in value.values() if isinstance(day, dict)
+        )
+    return DAY_ENTRY_BYTES
+
+
+class ProjectionCache:
+    """
+    Thread-safe LRU cache for projection results with TTL expiry and a memory cap.
+
+    Cached values are shared between requests and must not be mutated by callers.
+
+    Args:
+        max_entries: Maximum number of cached projections
+        ttl_seconds: Time after which an entry is expired
+        max_bytes: Upper bound for the summed estimate_size() of all entries
+        clock: Monotonic time source, replaceable in tests
+        name: Cache label of the hit and miss metrics; None to record no metrics
+    """
+
+    def __init__(self, max_entries=PROJECTION_CACHE_MAX_ENTRIES, ttl_seconds=PROJECTION_CACHE_TTL_SECONDS,
+                 max_bytes=PROJECTION_CACHE_MAX_BYTES, clock=time.monotonic, name=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        value = self._get(key)
+        if self.name:
+            count_cache(self.name, value is not None, value is None)
+        return value
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, size, value = entry
+            if expires_at <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=None):
+        """Store a value, evicting least recently used entries beyond the caps."""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return  # Never cache a single result larger than the whole cache
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl_seconds, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters and current usage, for sizing the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+projection_cache = ProjectionCache(name="projection")
+
+
+def cached_projection(project, inputs_key, accounts, categories, future_transactions, days_ahead, simulations=None, engine="dict"):
+    """
+    Call `project(accounts, categories, future_transactions, days_ahead, simulations)` through the shared cache.
+
+    Args:
+        project: Projection function to call on a miss
+        inputs_key: inputs_fingerprint() of the accounts, categories, scheduled
+            transactions and horizon
+        engine: Engine name, so results of different types never share a key
+    """
+    key = fingerprint(inputs_key, simulations, engine)
+    return projection_cache.get_or_compute(
+        key, lambda: project(accounts, categories, future_transactions, days_ahead, simulations)
+    )
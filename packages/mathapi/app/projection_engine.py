@@ -0,0 +1,324 @@
+from datetime import date, datetime, timedelta
+from collections import OrderedDict
+from app.prediction_api import (
+    ScheduledIndex,
+    calculate_initial_balance,
+    iter_need_category_spending,
+    need_category_amounts,
+)
+from app.recurrence import expand_scheduled_transaction
+from app.metrics import stage
+import numpy as np
+
+MAX_SCENARIO_CELLS = 2_000_000  # scenarios x days, bounds the delta matrix of evaluate_scenarios (~16MB)
+
+
+class ChangeTable:
+    """
+    Columnar side table holding the individual changes behind a projection.
+
+    Every row is one change: its day offset from the projection start, the signed
+    amount, the category and the reason. Extra detail (account, payee, memo,
+    simulation flag) is stored per row and only turned into change dicts when a
+    caller expands the table.
+    """
+
+    def __init__(self):
+        self.days = []
+        self.amounts = []
+        self.categories = []
+        self.reasons = []
+        self.extras = []
+
+    def __len__(self):
+        return len(self.days)
+
+    def append(self, day, amount, category, reason, extra=None):
+        """Add a single change row."""
+        self.days.append(day)
+        self.amounts.append(amount)
+        self.categories.append(category)
+        self.reasons.append(reason)
+        self.extras.append(extra)
+
+    def extend(self, days, amount, category, reason, extra=None):
+        """Add one row per day offset, all sharing the same amount and detail."""
+        count = len(days)
+        self.days.extend(days)
+        self.amounts.extend([amount] * count)
+        self.categories.extend([category] * count)
+        self.reasons.extend([reason] * count)
+        self.extras.extend([extra] * count)
+
+    def concat(self, other):
+        """Return a new table with the rows of this table followed by those of `other`."""
+        table = ChangeTable()
+        table.days = self.days + other.days
+        table.amounts = self.amounts + other.amounts
+        table.categories = self.categories + other.categories
+        table.reasons = self.reasons + other.reasons
+        table.extras = self.extras + other.extras
+        return table
+
+    def day_array(self):
+        return np.asarray(self.days, dtype=np.int64)
+
+    def amount_array(self):
+        return np.asarray(self.amounts, dtype=np.float64)
+
+    def expand(self, row):
+        """Return a row as a change dict in the shape used by prediction_api."""
+        change = {
+            "reason": self.reasons[row],
+            "amount": self.amounts[row],
+            "category": self.categories[row],
+        }
+        if self.extras[row]:
+            change.update(self.extras[row])
+        return change
+
+
+class ColumnarProjection:
+    """
+    Daily balance projection stored as day-offset arrays.
+
+    Args:
+        start_date: Date of day offset 0
+        days_ahead: Number of days projected after the start date
+        changes: ChangeTable with every change in the projection
+        balance_diff: Optional precomputed daily differences matching `changes`
+        balance: Optional precomputed running balance matching `changes`
+    """
+
+    def __init__(self, start_date, days_ahead, changes, balance_diff=None, balance=None):
+        self.start_date = start_date
+        self.days_ahead = days_ahead
+        self.changes = changes
+        if balance_diff is None:
+            # Scatter every change into its day and accumulate once
+            balance_diff = np.bincount(
+                changes.day_array(), weights=changes.amount_array(), minlength=days_ahead + 1
+            )
+        self.balance_diff = balance_diff
+        self.balance = np.cumsum(balance_diff) if balance is None else balance
+
+    def with_simulations(self, simulations):
+        """
+        Apply simulations as a sparse delta on top of this projection.
+
+        The baseline is not recomputed: the simulated amounts are scattered into a
+        delta vector whose cumulative sum shifts the baseline's running balance.
+
+        Args:
+            simulations: Optional list of simulation scenarios
+
+        Returns:
+            ColumnarProjection for the simulation; this projection itself when
+            no simulated change falls inside the horizon
+        """
+        overlay = ChangeTable()
+        add_simulations(overlay, self.start_date, self.days_ahead, simulations)
+        if not len(overlay):
+            return self
+
+        delta = np.bincount(overlay.day_array(), weights=overlay.amount_array(), minlength=self.days_ahead + 1)
+        return ColumnarProjection(
+            self.start_date,
+            self.days_ahead,
+            self.changes.concat(overlay),
+            balance_diff=self.balance_diff + delta,
+            balance=self.balance + np.cumsum(delta),
+        )
+
+    def dates(self):
+        """ISO date strings for every day offset in the projection."""
+        start = np.datetime64(self.start_date, "D")
+        return np.datetime_as_string(start + np.arange(self.days_ahead + 1), unit="D")
+
+    def scheduled_index(self):
+        """ScheduledIndex of the scheduled transaction rows in the change table."""
+        dates = self.dates().tolist()
+        changes = self.changes
+        index = ScheduledIndex()
+        for row, reason in enumerate(changes.reasons):
+            if reason == "Scheduled Transaction":
+                index.add(changes.categories[row], dates[changes.days[row]], changes.amounts[row])
+        return index
+
+    def rows_by_day(self):
+        """Map each day offset that has changes to its change table rows, in insertion order."""
+        rows_by_day = {}
+        for row, day in enumerate(self.changes.days):
+            rows_by_day.setdefault(day, []).append(row)
+        return rows_by_day
+
+    def to_daily_dict(self, include_changes=True):
+        """
+        Compatibility view in the shape of project_daily_balances_with_reasons.
+
+        Args:
+            include_changes: Expand the change table into each day's "changes" list
+
+        Returns:
+            OrderedDict of ISO date -> {"balance", "changes", "balance_diff"} for
+            every day that has at least one change, sorted by date
+        """
+        dates = self.dates().tolist()
+        balance = self.balance.tolist()
+        balance_diff = self.balance_diff.tolist()
+        changes = self.changes
+        reasons, amounts, categories, extras = changes.reasons, changes.amounts, changes.categories, changes.extras
+        projected_balances = OrderedDict()
+        for day, rows in sorted(self.rows_by_day().items()):
+            day_changes = []
+            if include_changes:
+                # Inlined ChangeTable.expand, this loop runs once per change row
+                for row in rows:
+                    change = {"reason": reasons[row], "amount": amounts[row], "category": categories[row]}
+                    if extras[row]:
+                        change.update(extras[row])
+                    day_changes.append(change)
+            projected_balances[dates[day]] = {
+                "balance": balance[day],
+                "changes": day_changes,
+                "balance_diff": balance_diff[day],
+            }
+        return projected_balances
+
+
+def project_daily_balances_columnar(accounts, categories, future_transactions, days_ahead=30, simulations=None,
+                                    start_date=None):
+    """
+    Columnar alternative to prediction_api.project_daily_balances_with_reasons.
+
+    Changes are collected in a ChangeTable keyed by day offset, then the daily
+    differences and running balance are computed with a single scatter and cumsum.
+
+    Args:
+        accounts: List of account objects with balances
+        categories: List of budget categories
+        future_transactions: List of scheduled future transactions
+        days_ahead: Number of days to project into the future
+        simulations: Optional list of simulation scenarios
+        start_date: First projected day; defaults to today (set by benchmarks to be reproducible)
+
+    Returns:
+        ColumnarProjection; call to_daily_dict() for the dict-based output shape
+    """
+    start_date = start_date or datetime.now().date()
+    changes = ChangeTable()
+    changes.append(0, calculate_initial_balance(accounts), "Starting Balance", "Initial Balance")
+
+    with stage("add_scheduled_transactions"):
+        scheduled_index = add_scheduled_transactions(changes, start_date, days_ahead, future_transactions)
+    with stage("add_need_categories"):
+        add_need_categories(changes, start_date, days_ahead, categories, scheduled_index)
+    with stage("add_simulations"):
+        add_simulations(changes, start_date, days_ahead, simulations)
+
+    with stage("columnar_balance"):
+        return ColumnarProjection(start_date, days_ahead, changes)
+
+
+def day_offset(start_date, date_str):
+    """Number of days between the projection start and an ISO date string, or None if unparsable."""
+    try:
+        return (date.fromisoformat(date_str) - start_date).days
+    except (TypeError, ValueError):
+        return None
+
+
+def add_scheduled_transactions(changes, start_date, days_ahead, future_transactions):
+    """
+    Add every occurrence of the scheduled transactions inside the horizon to the change table.
+
+    Returns:
+        ScheduledIndex of the added transactions
+    """
+    scheduled_index = ScheduledIndex()
+    start = np.datetime64(start_date, "D")
+    horizon_end = start_date + timedelta(days=days_ahead)
+
+    for txn in future_transactions:
+        occurrences = expand_scheduled_transaction(txn, start_date, horizon_end)
+        if not len(occurrences):
+            continue
+        category_name = txn['category_name']
+        amount = txn['amount'] / 1000  # Convert to thousands
+        changes.extend((occurrences - start).astype(np.int64).tolist(), amount, category_name, "Scheduled Transaction", {
+            "account": txn['account_name'],
+            "payee": txn['payee_name'],
+            "memo": txn['memo'],
+        })
+        scheduled_index.add_occurrences(category_name, np.datetime_as_string(occurrences, unit="D").tolist(), amount)
+    return scheduled_index
+
+
+def add_need_categories(changes, start_date, days_ahead, categories, scheduled_index):
+    """Add the expected spending of all NEED categories to the change table."""
+    for category in categories:
+        target = category.get("target")
+        if not (target and target.get("goal_type") == "NEED"):
+            continue
+
+        name = category["name"]
+        target_amount, current_balance, global_overall_left = need_category_amounts(category, target)
+        spending = iter_need_category_spending(
+            category, target, current_balance, target_amount, days_ahead, global_overall_left,
+            lambda year, month: scheduled_index.scheduled_amount(name, year, month), start_date
+        )
+        for date_str, amount, reason in spending:
+            day = day_offset(start_date, date_str)
+            if 0 <= day <= days_ahead:
+                changes.append(day, -amount, name, reason)  # Negative for expenses
+
+
+def add_simulations(changes, start_date, days_ahead, simulations):
+    """Add simulation scenarios inside the horizon to the change table."""
+    if not simulations:
+        return
+
+    for sim in simulations:
+        day = day_offset(start_date, sim["date"])
+        if day is None or not 0 <= day <= days_ahead:
+            continue
+        amount = sim["amount"]
+        changes.append(
+            day,
+            amount if isinstance(amount, float) else float(amount),
+            sim.get("category", "Miscellaneous"),
+            sim.get("reason", "Simulation"),
+            {"is_simulation": True},
+        )
+
+
+def evaluate_scenarios(baseline, scenarios):
+    """
+    Evaluate many simulation lists against one baseline as a scenarios x days matrix.
+
+    Every scenario's simulated amounts are scattered into its own row of a delta
+    matrix, which is accumulated with a single cumsum along the day axis and added
+    to the baseline running balance.
+
+    Args:
+        baseline: ColumnarProjection without simulations
+        scenarios: List of simulation lists, in the format of the simulation files
+
+    Returns:
+        Array of shape (len(scenarios), days_ahead + 1) with the daily balances
+
+    Raises:
+        ValueError: If the matrix would exceed MAX_SCENARIO_CELLS
+    """
+    if len(scenarios) * (baseline.days_ahead + 1) > MAX_SCENARIO_CELLS:
+        raise ValueError(f"At most {MAX_SCENARIO_CELLS} scenario days can be evaluated at once")
+    overlay = ChangeTable()
+    rows = []
+    for row, simulations in enumerate(scenarios):
+        count = len(overlay)
+        add_simulations(overlay, baseline.start_date, baseline.days_ahead, simulations)
+        rows.extend([row] * (len(overlay) - count))
+
+    delta = np.zeros((len(scenarios), baseline.days_ahead + 1))
+    np.add.at(delta, (np.asarray(rows, dtype=np.int64), overlay.day_array()), overlay.amount_array())
+    return baseline.balance + np.cumsum(delta, axis=1)
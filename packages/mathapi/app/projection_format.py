@@ -0,0 +1,145 @@
+from datetime import date
+
+# Per-day series and change columns a compact response can carry
+COMPACT_FIELDS = ("balance", "balance_diff", "changes")
+
+
+def parse_fields(value):
+    """
+    Parse the `fields` query parameter of the compact format.
+
+    Args:
+        value: Comma-separated field names, or None for all fields
+
+    Returns:
+        Tuple of field names, in COMPACT_FIELDS order
+
+    Raises:
+        ValueError: If a field name is unknown or none is given
+    """
+    if value is None:
+        return COMPACT_FIELDS
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = requested - set(COMPACT_FIELDS)
+    if unknown or not requested:
+        raise ValueError(f"Invalid fields query parameter, it must list some of: {', '.join(COMPACT_FIELDS)}.")
+    return tuple(field for field in COMPACT_FIELDS if field in requested)
+
+
+class ValueDictionary:
+    """
+    Dictionary encoding shared by all scenarios of a compact response.
+
+    Every distinct value of a change column (a category, reason, payee, ...)
+    is stored once; the columns themselves hold indexes into it.
+    """
+
+    def __init__(self):
+        self.values = {}  # column -> list of distinct values
+        self._codes = {}  # column -> value -> index
+
+    def encode(self, column, value):
+        codes = self._codes.setdefault(column, {})
+        code = codes.get(value)
+        if code is None:
+            values = self.values.setdefault(column, [])
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+
+def _changes_beyond(daily_balances, base):
+    """
+    Changes of a projection that are not in `base`, or None when the projection
+    does not extend it (some day does not start with the base's changes).
+    """
+    for day, entry in base.items():
+        base_changes = entry["changes"]
+        if daily_balances.get(day, {}).get("changes", [])[:len(base_changes)] != base_changes:
+            return None
+    return {
+        day: entry["changes"][len(base.get(day, {}).get("changes", [])):]
+        for day, entry in daily_balances.items()
+    }
+
+
+def compact_projection(daily_balances, start_date, dictionary, fields=COMPACT_FIELDS, base=None):
+    """
+    Convert a projection in the dict-based shape to parallel arrays.
+
+    Args:
+        daily_balances: ISO date -> {"balance", "balance_diff", "changes"}, as
+            returned by project_daily_balances_with_reasons
+        start_date: The date day offsets count from
+        dictionary: ValueDictionary receiving the distinct change values
+        fields: Fields of COMPACT_FIELDS to include
+        base: Optional projection (the baseline) that this one extends; when
+            every day's changes start with the base's changes of that day, only
+            the additional changes are encoded and "changes_base" is set to True
+
+    Returns:
+        {"days": [day offsets]} plus the requested fields: "balance" and
+        "balance_diff" per day, and "changes" as columns with one entry per
+        change ("day" offset, "amount", and a dictionary code for every other
+        change key; missing keys encode None)
+    """
+    dates = list(daily_balances)
+    days = [(date.fromisoformat(day) - start_date).days for day in dates]
+    compact = {"days": days}
+    for field in ("balance", "balance_diff"):
+        if field in fields:
+            compact[field] = [daily_balances[day][field] for day in dates]
+
+    if "changes" in fields:
+        changes_by_day = _changes_beyond(daily_balances, base) if base is not None else None
+        if changes_by_day is None:
+            changes_by_day = {day: daily_balances[day]["changes"] for day in dates}
+        else:
+            compact["changes_base"] = True
+        changes = [(offset, change) for offset, day in zip(days, dates) for change in changes_by_day[day]]
+        columns = sorted({key for _, change in changes for key in change} - {"amount"})
+        compact["changes"] = {
+            "day": [offset for offset, _ in changes],
+            "amount": [change.get("amount") for _, change in changes],
+        }
+        for column in columns:
+            compact["changes"][column] = [dictionary.encode(column, change.get(column)) for _, change in changes]
+    return compact
+
+
+def compact_payload(projections, fields=COMPACT_FIELDS):
+    """
+    Compact response for several scenarios.
+
+    Args:
+        projections: (scenario name, projection in the dict-based shape) pairs,
+            where a failed scenario's projection is {"error": message}; the first
+            pair is the baseline and its first date is the start date. Pairs are
+            consumed one at a time, so a generator keeps only the baseline and
+            the current projection in memory
+        fields: Fields of COMPACT_FIELDS to include
+
+    Returns:
+        {"start_date", "scenarios": {name: compact projection or error}} plus
+        "dictionary" (column -> distinct values) when changes are included.
+        Simulations that add changes to the baseline's only list the added
+        changes, marked with "changes_base"
+    """
+    dictionary = ValueDictionary()
+    start_date = None
+    baseline = None
+    scenarios = {}
+    for name, daily_balances in projections:
+        if start_date is None:
+            start_date = date.fromisoformat(min(daily_balances)) if daily_balances else date.today()
+            scenarios[name] = compact_projection(daily_balances, start_date, dictionary, fields)
+            baseline = daily_balances if "changes" in fields else None
+        elif "error" in daily_balances:
+            scenarios[name] = daily_balances
+        else:
+            scenarios[name] = compact_projection(daily_balances, start_date, dictionary, fields, baseline)
+
+    payload = {"start_date": (start_date or date.today()).isoformat(), "scenarios": scenarios}
+    if "changes" in fields:
+        payload["dictionary"] = dictionary.values
+    return payload
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.db import get_DB
+
+logger = logging.getLogger(__name__)
+
+# Per-process request budget; with several workers each process gets this budget
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "300"))
+OPENAI_BURST = int(os.getenv("OPENAI_BURST", "10"))
+# YNAB allows 200 requests per hour per access token; this budget is shared by all processes
+YNAB_REQUESTS_PER_HOUR = float(os.getenv("YNAB_REQUESTS_PER_HOUR", "200"))
+YNAB_BURST = int(os.getenv("YNAB_BURST", "50"))
+# Longest a request waits for a token before failing instead
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token would not become available within the allowed wait."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; acquire()
+    blocks until enough tokens are available, so bursts up to the capacity go
+    through immediately and sustained traffic is smoothed to the rate.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum number of stored tokens (the burst size)
+        clock: Monotonic time source, replaceable in tests
+        sleep: Sleep function, replaceable in tests
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("A token bucket needs a positive rate and a capacity of at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available without waiting; returns whether it did."""
+        return tokens <= self.capacity and self._take_or_delay(tokens) == 0.0
+
+    def _take_or_delay(self, tokens):
+        """Take tokens and return 0, or return how long to wait before trying again."""
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.capacity}")
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def _check_wait(self, waited, delay, max_wait):
+        if max_wait is not None and waited + delay > max_wait:
+            raise RateLimitExceeded(f"Rate limit: no token available within {max_wait:g}s")
+
+    def acquire(self, tokens=1, max_wait=RATE_LIMIT_MAX_WAIT_SECONDS):
+        """
+        Take tokens, waiting for them if needed.
+
+        Args:
+            max_wait: Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the tokens would not be available within max_wait
+        """
+        waited = 0.0
+        while (delay := self._take_or_delay(tokens)) > 0:
+            self._check_wait(waited, delay, max_wait)
+            self.sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self, tokens=1, max_wait=RATE_LIMIT_MAX_WAIT_SECONDS):
+        """acquire() for coroutines: waits without blocking the event loop."""
+        waited = 0.0
+        while (delay := self._take_or_delay(tokens)) > 0:
+            self._check_wait(waited, delay, max_wait)
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state is kept in MongoDB, so every process using the same
+    key draws from one budget.
+
+    The bucket document ({_id: key, tokens, updated}) is changed by
+    compare-and-swap on its previous values; wall-clock time is used because
+    the processes may run on different hosts. While MongoDB is unavailable the
+    process falls back to a local bucket with the same settings.
+
+    Args:
+        key: Identifies the shared budget, e.g. per API token
+        collection: Function returning the pymongo collection of bucket documents
+    """
+
+    # Compare-and-swap attempts before backing off for a moment
+    MAX_SWAPS = 5
+
+    def __init__(self, key, rate, capacity, collection, clock=time.time, sleep=time.sleep):
+        super().__init__(rate, capacity, clock, sleep)
+        self.key = key
+        self.collection = collection
+
+    def _take_or_delay(self, tokens):
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of {self.capacity}")
+        try:
+            return self._take_or_delay_shared(tokens)
+        except PyMongoError as e:
+            logger.warning("rate_limit_shared_unavailable key=%s error=%s", self.key, e)
+            return super()._take_or_delay(tokens)
+
+    def _take_or_delay_shared(self, tokens):
+        collection = self.collection()
+        for _ in range(self.MAX_SWAPS):
+            now = self.clock()
+            state = collection.find_one({"_id": self.key})
+            if state is None:
+                try:
+                    collection.insert_one({"_id": self.key, "tokens": float(self.capacity - tokens), "updated": now})
+                    return 0.0
+                except DuplicateKeyError:
+                    continue  # Another process created the bucket first
+
+            updated = max(now, state["updated"])
+            available = min(self.capacity, state["tokens"] + (updated - state["updated"]) * self.rate)
+            if available < tokens:
+                return (tokens - available) / self.rate
+            swapped = collection.update_one(
+                {"_id": self.key, "tokens": state["tokens"], "updated": state["updated"]},
+                {"$set": {"tokens": available - tokens, "updated": updated}},
+            )
+            if swapped.modified_count:
+                return 0.0
+        return 0.05  # Contended; try again shortly
+
+
+def _token_key(token):
+    """Bucket key of an API token, which is never stored itself."""
+    return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:16]
+
+
+openai_limiter = TokenBucket(OPENAI_REQUESTS_PER_MINUTE / 60, OPENAI_BURST)
+# Only category updates draw from it (see ynab_api.fetch); reads for projections are never throttled
+ynab_limiter = SharedTokenBucket(
+    f"ynab:{_token_key(os.getenv('YNAB_ACCESS_TOKEN'))}", YNAB_REQUESTS_PER_HOUR / 3600, YNAB_BURST,
+    lambda: get_DB().ratelimits,
+)
@@ -0,0 +1,114 @@
+from datetime import date, datetime
+from functools import lru_cache
+import logging
+import numpy as np
+
+# YNAB scheduled transaction frequencies expressed as a fixed step in days or months
+DAY_FREQUENCIES = {
+    "daily": 1,
+    "weekly": 7,
+    "everyOtherWeek": 14,
+    "every4Weeks": 28,
+}
+MONTH_FREQUENCIES = {
+    "monthly": 1,
+    "everyOtherMonth": 2,
+    "every3Months": 3,
+    "every4Months": 4,
+    "twiceAYear": 6,
+    "yearly": 12,
+    "everyOtherYear": 24,
+}
+TWICE_A_MONTH = "twiceAMonth"
+EXPANSION_CACHE_SIZE = 4096
+
+
+def to_date(value):
+    """Parse a YNAB ISO date string (or pass through a date)."""
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def month_days(months, day_of_month):
+    """
+    Dates on `day_of_month` for an array of datetime64[M] months.
+
+    The day is clamped to the length of each month, so day 31 falls on the last
+    day of shorter months, like YNAB does.
+    """
+    month_start = months.astype("datetime64[D]")
+    month_length = ((months + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+    return month_start + np.minimum(day_of_month, month_length) - 1
+
+
+def expand_occurrences(frequency, date_next, horizon_start, horizon_end, date_first=None):
+    """
+    Expand a schedule into all of its occurrence dates within a horizon.
+
+    Occurrences are generated with datetime64 arithmetic on arrays; `date_next` is
+    always the first occurrence and the day of month of monthly schedules is taken
+    from `date_first` when given. Unknown frequencies and "never" expand to
+    `date_next` only. "twiceAMonth" is approximated as the anchor day and the day
+    15 days away from it in every month.
+
+    Args:
+        frequency: YNAB frequency string
+        date_next: Next occurrence (date or ISO string)
+        horizon_start: First date of the horizon (inclusive)
+        horizon_end: Last date of the horizon (inclusive)
+        date_first: Optional first occurrence of the schedule
+
+    Returns:
+        Sorted datetime64[D] array of the occurrences inside the horizon
+    """
+    first = np.datetime64(to_date(date_next), "D")
+    start = np.datetime64(to_date(horizon_start), "D")
+    end = np.datetime64(to_date(horizon_end), "D")
+    anchor_day = to_date(date_first or date_next).day
+
+    if frequency in DAY_FREQUENCIES:
+        occurrences = np.arange(first, end + 1, DAY_FREQUENCIES[frequency])
+    elif frequency in MONTH_FREQUENCIES or frequency == TWICE_A_MONTH:
+        first_month = first.astype("datetime64[M]")
+        month_span = int((end.astype("datetime64[M]") - first_month).astype(np.int64))
+        step = MONTH_FREQUENCIES.get(frequency, 1)
+        months = first_month + np.arange(0, month_span + 1, step)
+        occurrences = month_days(months, anchor_day)
+        if frequency == TWICE_A_MONTH:
+            second_day = anchor_day + 15 if anchor_day <= 15 else anchor_day - 15
+            occurrences = np.sort(np.concatenate([occurrences, month_days(months, second_day)]))
+        occurrences = np.concatenate([[first], occurrences[occurrences > first]])
+    else:
+        if frequency not in (None, "never"):
+            logging.warning(f"Unknown scheduled transaction frequency '{frequency}', using date_next only")
+        occurrences = np.array([first])
+
+    return occurrences[(occurrences >= start) & (occurrences <= end)]
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _cached_occurrences(schedule_id, frequency, date_next, date_first, horizon_start, horizon_end):
+    occurrences = expand_occurrences(frequency, date_next, horizon_start, horizon_end, date_first)
+    occurrences.flags.writeable = False  # Shared between requests
+    return occurrences
+
+
+def expand_scheduled_transaction(txn, horizon_start, horizon_end):
+    """
+    Occurrence dates of a YNAB scheduled transaction within a horizon.
+
+    Results are cached per schedule id and horizon. The schedule's frequency and
+    dates are part of the key, so an edited schedule is expanded again.
+
+    Returns:
+        Read-only datetime64[D] array
+    """
+    return _cached_occurrences(
+        txn.get('id'),
+        txn.get('frequency'),
+        txn['date_next'],
+        txn.get('date_first'),
+        to_date(horizon_start),
+        to_date(horizon_end),
+    )
@@ -0,0 +1,144 @@
+import os
+from app.monte_carlo import DEFAULT_PATHS
+from app.projection_engine import MAX_SCENARIO_CELLS
+from app.projection_format import parse_fields
+from app.simulation_registry import normalize_simulation
+
+# Query parameter parsing shared by the Flask (app.app) and ASGI (app.asgi) routes.
+# Every parser takes the request's query arguments (a werkzeug MultiDict in both
+# frameworks) and raises ValueError with the message to return with a 400.
+
+PROJECTION_ENGINES = ("dict", "columnar")
+# Simulations are overlaid on one baseline by default; "dict" re-projects every simulation
+DEFAULT_ENGINE = "columnar"
+OUTPUT_FORMATS = ("json", "ndjson", "compact")
+STREAM_CHUNKS = ("scenario", "month")
+MAX_BATCH_SCENARIOS = 1000
+DEFAULT_DAYS_AHEAD = 300
+# Longest horizon a request may project, in days (ten years by default)
+MAX_DAYS_AHEAD = int(os.getenv("MAX_DAYS_AHEAD", "3650"))
+
+
+def parse_budget_id(args):
+    """The required budget_id query parameter."""
+    budget_uuid = args.get('budget_id')
+    if not budget_uuid:
+        raise ValueError("budget_id query parameter is required")
+    return budget_uuid
+
+
+def parse_days_ahead(value):
+    """
+    Validate the days_ahead query parameter of the projection routes.
+
+    Args:
+        value: The raw parameter, None for DEFAULT_DAYS_AHEAD
+
+    Returns:
+        Horizon in days, between 0 and MAX_DAYS_AHEAD
+
+    Raises:
+        ValueError: With the message to return to the client
+    """
+    if value is None:
+        return DEFAULT_DAYS_AHEAD
+    try:
+        days_ahead = int(value)
+    except ValueError:
+        raise ValueError("Invalid days_ahead query parameter, it must be an integer.")
+    if not 0 <= days_ahead <= MAX_DAYS_AHEAD:
+        raise ValueError(f"Invalid days_ahead query parameter, it must be between 0 and {MAX_DAYS_AHEAD}.")
+    return days_ahead
+
+
+def _parse_choice(args, name, choices, default):
+    value = args.get(name, default)
+    if value not in choices:
+        raise ValueError(f"Invalid {name} query parameter, it must be one of: {', '.join(choices)}.")
+    return value
+
+
+def parse_projection_params(args):
+    """
+    Parameters of /balance-prediction/interactive.
+
+    Returns:
+        (budget_uuid, days_ahead, engine)
+    """
+    budget_uuid = parse_budget_id(args)
+    days_ahead = parse_days_ahead(args.get('days_ahead'))
+    return budget_uuid, days_ahead, _parse_choice(args, 'engine', PROJECTION_ENGINES, DEFAULT_ENGINE)
+
+
+def parse_data_params(args):
+    """
+    Parameters of /balance-prediction/data.
+
+    Returns:
+        (budget_uuid, days_ahead, engine, output format, chunk, compact fields)
+    """
+    budget_uuid, days_ahead, engine = parse_projection_params(args)
+    output_format = _parse_choice(args, 'format', OUTPUT_FORMATS, 'json')
+    chunk = _parse_choice(args, 'chunk', STREAM_CHUNKS, 'scenario')
+    return budget_uuid, days_ahead, engine, output_format, chunk, parse_fields(args.get('fields'))
+
+
+def parse_probabilistic_params(args):
+    """
+    Parameters of /balance-prediction/probabilistic.
+
+    Returns:
+        (budget_uuid, days_ahead, paths, seed or None)
+    """
+    budget_uuid = parse_budget_id(args)
+    days_ahead = parse_days_ahead(args.get('days_ahead'))
+    try:
+        paths = int(args.get('paths', DEFAULT_PATHS))
+        seed = args.get('seed')
+        seed = int(seed) if seed is not None else None
+    except ValueError:
+        raise ValueError("paths and seed query parameters must be integers.")
+    return budget_uuid, days_ahead, paths, seed
+
+
+def parse_scenarios(body, days_ahead=DEFAULT_DAYS_AHEAD):
+    """
+    Validate the body of /balance-prediction/scenarios.
+
+    Scenarios are either {"name": [simulations]} or a plain list of simulation lists.
+    Their number times the horizon is capped by MAX_SCENARIO_CELLS, which bounds
+    the scenarios x days matrix a single request can allocate.
+
+    Returns:
+        Ordered {name: normalized simulations} dict
+
+    Raises:
+        ValueError: With the message to return to the client
+    """
+    scenarios = body.get("scenarios") if isinstance(body, dict) else None
+    if isinstance(scenarios, list):
+        scenarios = {f"scenario_{index}": simulations for index, simulations in enumerate(scenarios)}
+    if not isinstance(scenarios, dict) or not scenarios:
+        raise ValueError("Request body must contain a non-empty 'scenarios' object or list")
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        raise ValueError(f"At most {MAX_BATCH_SCENARIOS} scenarios can be evaluated per request")
+    if len(scenarios) * (days_ahead + 1) > MAX_SCENARIO_CELLS:
+        raise ValueError(
+            f"At most {MAX_SCENARIO_CELLS // (days_ahead + 1)} scenarios can be evaluated over {days_ahead} days"
+        )
+    try:
+        return {name: normalize_simulation(simulations) for name, simulations in scenarios.items()}
+    except ValueError as e:
+        raise ValueError(f"Invalid scenario: {str(e)}")
+
+
+def parse_scenarios_params(args, body):
+    """
+    Parameters and body of /balance-prediction/scenarios.
+
+    Returns:
+        (budget_uuid, days_ahead, scenarios as returned by parse_scenarios)
+    """
+    budget_uuid = parse_budget_id(args)
+    days_ahead = parse_days_ahead(args.get('days_ahead'))
+    return budget_uuid, days_ahead, parse_scenarios(body, days_ahead)
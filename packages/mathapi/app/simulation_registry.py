@@ -0,0 +1,154 @@
+from datetime import datetime
+import json
+import logging
+import os
+import re
+import threading
+
+SIMULATION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+def normalize_simulation(entries):
+    """
+    Validate a simulation and convert it to the form the projection uses.
+
+    Dates are checked to be ISO dates (YYYY-MM-DD) and amounts are converted to
+    floats once, so projections do not need to parse them on every request.
+
+    Args:
+        entries: List of {"date", "amount", "reason"?, "category"?} dicts
+
+    Returns:
+        New list of entries with a float "amount" and defaults for reason and category
+
+    Raises:
+        ValueError: If the simulation or one of its entries is invalid
+    """
+    if not isinstance(entries, list):
+        raise ValueError("A simulation must be a list of entries")
+
+    normalized = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Entry {index} must be an object")
+        try:
+            date = datetime.strptime(entry["date"], '%Y-%m-%d').date().isoformat()
+            amount = float(entry["amount"])
+        except KeyError as e:
+            raise ValueError(f"Entry {index} is missing {e}")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Entry {index} is invalid: {e}")
+        normalized.append({
+            "date": date,
+            "amount": amount,
+            "reason": entry.get("reason", "Simulation"),
+            "category": entry.get("category", "Miscellaneous"),
+        })
+    return normalized
+
+
+def simulation_file_name(name):
+    """Validate a simulation name and return its JSON file name."""
+    if not name or not SIMULATION_NAME_PATTERN.match(name):
+        raise ValueError("Simulation names may only contain letters, digits, '.', '_' and '-'")
+    return name if name.endswith(".json") else f"{name}.json"
+
+
+class SimulationRegistry:
+    """
+    In-memory registry of the simulation files in a folder.
+
+    Files are parsed and validated once and only read again when their
+    modification time changes; removed files disappear from the registry.
+    Scenarios can be added or removed at runtime, which writes through to the
+    folder so other worker processes pick them up as well.
+
+    Args:
+        folder: Directory containing one JSON simulation per file
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._simulations = {}  # file name -> (mtime_ns, normalized entries)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload new and modified files and forget deleted ones."""
+        if not os.path.isdir(self.folder):
+            logging.warning(f"Simulation folder not found: {self.folder}")
+            with self._lock:
+                self._simulations.clear()
+            return
+
+        with self._lock:
+            seen = set()
+            for entry in os.scandir(self.folder):
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                mtime_ns = entry.stat().st_mtime_ns
+                cached = self._simulations.get(entry.name)
+                if cached and cached[0] == mtime_ns:
+                    continue
+                try:
+                    with open(entry.path, "r") as file:
+                        self._simulations[entry.name] = (mtime_ns, normalize_simulation(json.load(file)))
+                except Exception as e:
+                    logging.warning(f"Failed to load simulation file {entry.name}: {str(e)}")
+                    self._simulations.pop(entry.name, None)
+            for name in set(self._simulations) - seen:
+                del self._simulations[name]
+
+    def all(self):
+        """Return all valid simulations as an ordered {file name: entries} dict."""
+        self.refresh()
+        with self._lock:
+            return {name: self._simulations[name][1] for name in sorted(self._simulations)}
+
+    def get(self, name):
+        """Return the entries of one simulation, or None if it does not exist."""
+        return self.all().get(simulation_file_name(name))
+
+    def put(self, name, entries):
+        """
+        Validate and store a simulation, replacing an existing one with the same name.
+
+        Returns:
+            Tuple of (file name, normalized entries)
+
+        Raises:
+            ValueError: If the name or the entries are invalid
+        """
+        file_name = simulation_file_name(name)
+        normalized = normalize_simulation(entries)
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, file_name)
+        temp_path = f"{path}.tmp"
+        with self._lock:
+            with open(temp_path, "w") as file:
+                json.dump(normalized, file, indent=4)
+            os.replace(temp_path, path)  # Atomic, so readers never see a partial file
+            self._simulations[file_name] = (os.stat(path).st_mtime_ns, normalized)
+        return file_name, normalized
+
+    def delete(self, name):
+        """
+        Remove a simulation.
+
+        Returns:
+            True if it existed
+        """
+        file_name = simulation_file_name(name)
+        with self._lock:
+            self._simulations.pop(file_name, None)
+            try:
+                os.remove(os.path.join(self.folder, file_name))
+            except FileNotFoundError:
+                return False
+        return True
+
+    def version(self):
+        """Identifier that changes whenever a simulation is added, changed or removed."""
+        self.refresh()
+        with self._lock:
+            return tuple(sorted((name, mtime_ns) for name, (mtime_ns, _) in self._simulations.items()))
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from budget_api import get_objectid_for_budget, convert_objectid_to_str
-from db import get_DB
+from app.budget_api import get_objectid_for_budget, convert_objectid_to_str
+from app.db import get_DB
 import logging
 
 # Load environment variables from .env file
@@ -38,19 +38,23 @@ def get_local_transactions_last_x_days(uuid, x_days):
         transactions_list.append(convert_objectid_to_str(transaction))
     return transactions_list
 
-def get_scheduled_transactions(budget_id):
-    """Fetches scheduled transactions for a given budget ID from the YNAB API."""
-    
-    if not budget_id:
-        raise ValueError("A budget ID is required")
-
-    # Define the path for scheduled transactions and use the fetch function
-    path = f"/budgets/{budget_id}/scheduled_transactions"
-    result = fetch("GET", path)
-    
-    # Extract only the scheduled transactions data if no error occurred
-    if "error" not in result:
-        return result.get("data", {}).get("scheduled_transactions", [])
-    else:
-        return result
-    
+def get_categorized_transactions(budget_id, after_id=None, batch_size=1000):
+    """
+    Iterate over the categorized local transactions of a budget in insertion order.
+
+    Args:
+        budget_id: ObjectId of the budget
+        after_id: Only return transactions inserted after the one with this ObjectId
+        batch_size: Number of documents per cursor batch
+
+    Returns:
+        Cursor of documents with _id, payeeName, memo, amount and categoryId
+    """
+    query = {
+        "budgetId": budget_id,
+        "categoryId": {"$ne": None}
+    }
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    projection = {"payeeName": 1, "memo": 1, "amount": 1, "categoryId": 1}
+    return get_DB().localtransactions.find(query, projection, batch_size=batch_size).sort("_id", 1)
@@ -0,0 +1,93 @@
+"""
+Production entry point.
+
+Run with the pre-fork server configured in gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py
+
+This module is imported by the gunicorn master for its configuration, so it
+only imports the application inside create_app(), which runs in each worker.
+"""
+import importlib
+import logging
+import math
+import os
+
+logger = logging.getLogger(__name__)
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+# Modules a worker imports before serving its first request
+WARM_UP_MODULES = (
+    "numpy",
+    "app.prediction_api",
+    "app.projection_engine",
+    "app.monte_carlo",
+    "app.recurrence",
+)
+
+
+def _read(path):
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit(cpu_max_path=CGROUP_V2_CPU_MAX, quota_path=CGROUP_V1_CPU_QUOTA, period_path=CGROUP_V1_CPU_PERIOD):
+    """
+    Number of CPUs the container may use, from its cgroup CPU quota.
+
+    A Kubernetes CPU limit is enforced as a CFS quota, which os.cpu_count() does
+    not see: it reports every core of the node.
+
+    Returns:
+        The CPU limit rounded up to a whole CPU (at least 1), or None without a quota
+    """
+    cpu_max = _read(cpu_max_path)  # cgroup v2: "<quota> <period>" or "max <period>"
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return max(1, math.ceil(int(quota) / int(period)))
+        return None
+
+    quota, period = _read(quota_path), _read(period_path)  # cgroup v1: quota is -1 without a limit
+    if quota and period and int(quota) > 0:
+        return max(1, math.ceil(int(quota) / int(period)))
+    return None
+
+
+def worker_count(environ=os.environ):
+    """
+    Number of worker processes to run.
+
+    WEB_CONCURRENCY wins when set; otherwise one worker per CPU of the container's
+    CPU limit, falling back to the host's CPU count. Requests mostly wait on
+    MongoDB, YNAB and OpenAI, which threads per worker absorb, so workers are not
+    multiplied beyond the CPUs that can run projections in parallel.
+    """
+    if environ.get("WEB_CONCURRENCY"):
+        return max(1, int(environ["WEB_CONCURRENCY"]))
+    return cpu_limit() or os.cpu_count() or 1
+
+
+def warm_up():
+    """
+    Import the projection modules and load the simulation registry before serving
+    traffic, and start ensuring the MongoDB indexes in the background.
+    """
+    for module in WARM_UP_MODULES:
+        importlib.import_module(module)
+    from app.app import simulation_registry, start_database_init
+    start_database_init()
+    simulation_registry.refresh()
+    logger.info("worker_warm_up pid=%s simulations=%d", os.getpid(), len(simulation_registry.all()))
+
+
+def create_app():
+    """Application factory used by gunicorn ("app.wsgi:create_app()")."""
+    from app.app import app
+    return app
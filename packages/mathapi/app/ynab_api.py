@@ -1,50 +1,166 @@
 import os
+import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.rate_limit import ynab_limiter, RateLimitExceeded
+from app.metrics import EXTERNAL_CALLS, external_call
 
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Fetch the YNAB access token and base URL
 YNAB_ACCESS_TOKEN = os.getenv("YNAB_ACCESS_TOKEN")
 YNAB_BASE_URL = os.getenv("YNAB_BASE_URL")
 
-def fetch(method, path, body=None):
-    """Performs an HTTP request to the YNAB API with the specified method and path."""
-    
-    # Define the full URL by combining the base URL and path
-    url = f"{YNAB_BASE_URL}{path}"
-    headers = {
-        "Authorization": f"Bearer {YNAB_ACCESS_TOKEN}"
-    }
+# Connection pool and retry configuration
+YNAB_CONNECT_TIMEOUT = float(os.getenv("YNAB_CONNECT_TIMEOUT", "3.05"))
+YNAB_READ_TIMEOUT = float(os.getenv("YNAB_READ_TIMEOUT", "20"))
+YNAB_POOL_SIZE = int(os.getenv("YNAB_POOL_SIZE", "10"))
+YNAB_MAX_RETRIES = int(os.getenv("YNAB_MAX_RETRIES", "3"))
+YNAB_RETRY_BACKOFF = float(os.getenv("YNAB_RETRY_BACKOFF", "0.5"))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Idempotent methods only: a PATCH or POST retried after a read timeout may be applied twice
+RETRY_METHODS = frozenset(["GET", "PUT", "DELETE"])
+# Upper bound for a Retry-After delay, so a misbehaving header cannot park a worker thread
+MAX_RETRY_AFTER_SECONDS = float(os.getenv("YNAB_MAX_RETRY_AFTER", "30"))
+
+
+class BoundedRetry(Retry):
+    """urllib3 Retry that honours Retry-After but waits at most MAX_RETRY_AFTER_SECONDS."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER_SECONDS)
+
+
+class YnabClient:
+    """
+    Reusable YNAB HTTP client.
+
+    A single requests.Session keeps connections alive in a shared pool, every
+    request is bounded by connect/read timeouts, and 429/5xx responses are retried
+    with exponential backoff (honouring Retry-After, up to MAX_RETRY_AFTER_SECONDS).
+    Only idempotent methods are retried. Sessions are safe to share
+    between the threads of one worker process.
+    """
+
+    def __init__(self, base_url=None, access_token=None, connect_timeout=YNAB_CONNECT_TIMEOUT,
+                 read_timeout=YNAB_READ_TIMEOUT, pool_size=YNAB_POOL_SIZE,
+                 max_retries=YNAB_MAX_RETRIES, backoff_factor=YNAB_RETRY_BACKOFF):
+        self.base_url = base_url if base_url is not None else YNAB_BASE_URL
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = BoundedRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token if access_token is not None else YNAB_ACCESS_TOKEN}",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+    def request(self, method, path, body=None, params=None, rate_limited=False):
+        """
+        Perform a request and return the parsed JSON body.
+
+        Args:
+            rate_limited: Take a token from the shared YNAB rate limiter first
+
+        Raises:
+            requests.exceptions.RequestException: On connection errors, timeouts
+                and error responses that are left after retrying
+            RateLimitExceeded: If rate_limited and no token is available in time
+        """
+        url = f"{self.base_url}{path}"
+        if rate_limited:
+            waited = ynab_limiter.acquire()
+            logger.debug("ynab_request method=%s path=%s rate_limit_wait_s=%.2f", method, path, waited)
+        with external_call("ynab"):
+            response = self.session.request(method, url, json=body, params=params, timeout=self.timeout)
+            logger.info(
+                "ynab_response method=%s path=%s status=%s elapsed_ms=%d",
+                method, path, response.status_code, response.elapsed.total_seconds() * 1000,
+            )
+            response.raise_for_status()  # Raise an HTTPError for bad responses
+            return response.json()
+
+    def close(self):
+        self.session.close()
 
-    try:
-        # Send the request using the specified HTTP method
-        print(f"Fetching data from {url} using method: {method}")
-        response = requests.request(method, url, headers=headers, json=body)
-        response.raise_for_status()  # Raise an HTTPError for bad responses
 
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide YnabClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = YnabClient()
+    return _client
+
+
+def _reset_after_fork():
+    # A forked child must not reuse the parent's pooled connections
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def fetch(method, path, body=None, rate_limited=False):
+    """
+    Performs an HTTP request to the YNAB API with the specified method and path.
+
+    Bulk work such as applying categories passes rate_limited=True, so it stays
+    within YNAB's hourly quota across all workers; interactive reads do not wait.
+    """
+    try:
         # Return the parsed JSON response
-        return response.json()
-    
+        return get_client().request(method, path, body, rate_limited=rate_limited)
+
     except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
-        return {"error": f"HTTP error occurred: {http_err}"}
+        logger.warning("ynab_http_error method=%s path=%s error=%s", method, path, http_err)
+        status = http_err.response.status_code if http_err.response is not None else None
+        return {"error": f"HTTP error occurred: {http_err}", "status": status}
+    except RateLimitExceeded as err:
+        EXTERNAL_CALLS.labels("ynab", "rate_limited").inc()
+        logger.warning("ynab_rate_limited method=%s path=%s error=%s", method, path, err)
+        return {"error": str(err)}
     except Exception as err:
-        print(f"An error occurred: {err}")
+        logger.error("ynab_request_failed method=%s path=%s error=%s", method, path, err)
         return {"error": "An unexpected error occurred"}
 
 def get_scheduled_transactions(budget_id):
     """Fetches scheduled transactions for a given budget ID from the YNAB API."""
-    
+
     if not budget_id:
         raise ValueError("A budget ID is required")
 
     # Define the path for scheduled transactions and use the fetch function
     path = f"budgets/{budget_id}/scheduled_transactions"
     result = fetch("GET", path)
-    
+
     # Extract only the scheduled transactions data if no error occurred
     if "error" not in result:
         return result.get("data", {}).get("scheduled_transactions", [])
@@ -61,4 +177,4 @@ def get_uncategorized_transactions(budget_id):
     result = fetch("GET", path)
     # filter out tranfers with Pyaee name "Transfer :"
     return [transaction for transaction in result.get("data", {}).get("transactions", []) if not transaction["payee_name"].startswith("Transfer :")]
-    
+
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from app.metrics import EXTERNAL_CALLS, external_call
+from app.ynab_api import (
+    YNAB_ACCESS_TOKEN,
+    YNAB_BASE_URL,
+    YNAB_CONNECT_TIMEOUT,
+    YNAB_READ_TIMEOUT,
+    YNAB_POOL_SIZE,
+    YNAB_MAX_RETRIES,
+    YNAB_RETRY_BACKOFF,
+    MAX_RETRY_AFTER_SECONDS,
+    RETRY_METHODS,
+    RETRY_STATUS_CODES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(response, attempt, backoff_factor):
+    """Seconds to wait before retrying: Retry-After when present, otherwise exponential backoff."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            pass
+    return backoff_factor * (2 ** attempt)
+
+
+class AsyncYnabClient:
+    """
+    asyncio counterpart of ynab_api.YnabClient.
+
+    One httpx.AsyncClient keeps a connection pool for the event loop it is used
+    on; requests have the same timeouts, and 429/5xx responses and connection
+    errors of idempotent requests are retried with the same backoff settings.
+    """
+
+    def __init__(self, base_url=None, access_token=None, connect_timeout=YNAB_CONNECT_TIMEOUT,
+                 read_timeout=YNAB_READ_TIMEOUT, pool_size=YNAB_POOL_SIZE,
+                 max_retries=YNAB_MAX_RETRIES, backoff_factor=YNAB_RETRY_BACKOFF, transport=None):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.client = httpx.AsyncClient(
+            base_url=base_url if base_url is not None else (YNAB_BASE_URL or ""),
+            headers={
+                "Authorization": f"Bearer {access_token if access_token is not None else YNAB_ACCESS_TOKEN}",
+                "Accept": "application/json",
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+
+    async def request(self, method, path, body=None, params=None):
+        """
+        Perform a request and return the parsed JSON body.
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and error responses
+                that are left after retrying
+        """
+        max_retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+        with external_call("ynab"):
+            for attempt in range(max_retries + 1):
+                response = None
+                start = time.perf_counter()
+                try:
+                    response = await self.client.request(method, path, json=body, params=params)
+                except httpx.TransportError:
+                    if attempt == max_retries:
+                        raise
+                else:
+                    logger.info(
+                        "ynab_response method=%s path=%s status=%s elapsed_ms=%d attempt=%d",
+                        method, path, response.status_code, (time.perf_counter() - start) * 1000, attempt,
+                    )
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                        break
+                await asyncio.sleep(retry_delay(response, attempt, self.backoff_factor))
+
+            response.raise_for_status()
+            return response.json()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = None
+_client_pid = None
+
+
+def get_async_client():
+    """
+    Return the AsyncYnabClient of this process, creating it on first use.
+
+    The ASGI server runs one event loop per worker process, so a per-process
+    client is also a per-loop client.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = AsyncYnabClient()
+        _client_pid = os.getpid()
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None and _client_pid == os.getpid():
+        await _client.aclose()
+    _client = None
+
+
+async def fetch_async(method, path, body=None):
+    """Async ynab_api.fetch: the parsed JSON response, or an {"error": ...} dict."""
+    try:
+        return await get_async_client().request(method, path, body)
+
+    except httpx.HTTPStatusError as http_err:
+        logger.warning("ynab_http_error method=%s path=%s error=%s", method, path, http_err)
+        return {"error": f"HTTP error occurred: {http_err}", "status": http_err.response.status_code}
+    except Exception as err:
+        logger.error("ynab_request_failed method=%s path=%s error=%s", method, path, err)
+        return {"error": "An unexpected error occurred"}
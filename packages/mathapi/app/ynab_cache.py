@@ -0,0 +1,222 @@
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from app.db import get_DB
+import app.ynab_api as ynab_api
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_TRANSACTIONS = "scheduled_transactions"
+TRANSACTIONS = "transactions"
+
+# Days of transaction history the first sync of a budget downloads; later syncs are deltas
+TRANSACTIONS_SYNC_DAYS = int(os.getenv("YNAB_TRANSACTIONS_SYNC_DAYS", "365"))
+
+# Cached transactions without a category or in YNAB's "Uncategorized" category
+UNCATEGORIZED_QUERY = {"$or": [{"data.category_id": None}, {"data.category_name": "Uncategorized"}]}
+
+_indexes_ready = False
+
+
+def ensure_cache_indexes():
+    """Create the indexes the delta cache relies on for its upserts and lookups."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    db = get_DB()
+    db.ynabsyncstate.create_index([("budgetUuid", ASCENDING), ("resource", ASCENDING)], unique=True)
+    db.ynabcacheitems.create_index(
+        [("budgetUuid", ASCENDING), ("resource", ASCENDING), ("id", ASCENDING)], unique=True
+    )
+    _indexes_ready = True
+
+
+def sync_path(budget_uuid, resource, state):
+    """
+    YNAB path for a resource, asking only for changes since the stored server knowledge.
+
+    Without a stored state, transactions are requested from TRANSACTIONS_SYNC_DAYS
+    ago only, so the first sync does not download the budget's whole history.
+    """
+    params = {}
+    if state:
+        params["last_knowledge_of_server"] = state["serverKnowledge"]
+    elif resource == TRANSACTIONS:
+        params["since_date"] = (date.today() - timedelta(days=TRANSACTIONS_SYNC_DAYS)).isoformat()
+    path = f"budgets/{budget_uuid}/{resource}"
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def sync_operations(key, items, knowledge=None):
+    """
+    Bulk write operations upserting changed items and marking deleted ones.
+
+    Every item document records the server knowledge of the response it came
+    from, and is only replaced by a response with newer knowledge. A slower
+    concurrent sync that started from older knowledge therefore cannot undo the
+    changes a faster one stored; its upserts fail with a DuplicateKeyError on
+    the unique item index instead (see write_items). Deleted items are kept as
+    tombstones for the same reason, so a stale response cannot bring them back.
+
+    Args:
+        knowledge: server_knowledge of the response; None replaces unconditionally
+    """
+    operations = []
+    for item in items:
+        item_key = dict(key, id=item["id"])
+        filter_ = item_key
+        if knowledge is not None:
+            filter_ = dict(item_key, **{"$or": [{"knowledge": {"$lt": knowledge}}, {"knowledge": None}]})
+        if item.get("deleted"):
+            document = dict(item_key, knowledge=knowledge, deleted=True)
+        else:
+            document = dict(item_key, knowledge=knowledge, data=item)
+        operations.append(ReplaceOne(filter_, document, upsert=True))
+    return operations
+
+
+def only_stale_writes_failed(error):
+    """Whether a BulkWriteError only holds the duplicate key errors of outdated item upserts."""
+    details = error.details or {}
+    return not details.get("writeConcernErrors") and all(
+        write_error.get("code") == 11000 for write_error in details.get("writeErrors", [])
+    )
+
+
+def write_items(collection, operations):
+    """Apply sync_operations, ignoring the items that newer knowledge already replaced."""
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if not only_stale_writes_failed(e):
+            raise
+
+
+def sync_state_write(key, data):
+    """
+    Filter and update storing the server knowledge of a delta response.
+
+    The filter only matches a state with older (or no) server knowledge, so a
+    slower concurrent sync cannot overwrite a newer value; its upsert then fails
+    with a DuplicateKeyError on the unique state index instead.
+
+    Returns:
+        (filter, update), or None when the response has no server knowledge
+    """
+    knowledge = data.get("server_knowledge")
+    if knowledge is None:
+        return None
+    filter_ = dict(key, **{"$or": [{"serverKnowledge": {"$lt": knowledge}}, {"serverKnowledge": None}]})
+    return filter_, {"$set": {"serverKnowledge": knowledge, "updatedAt": datetime.utcnow()}}
+
+
+def sync_resource(budget_uuid, resource):
+    """
+    Bring the local copy of a YNAB resource up to date using delta requests.
+
+    The server_knowledge returned by YNAB is stored per budget and resource and
+    sent back as last_knowledge_of_server, so later calls only return what changed.
+    Changed items are upserted and deleted items marked as such, unless a
+    concurrent sync already stored them from newer knowledge.
+
+    Args:
+        budget_uuid: The UUID of the budget
+        resource: YNAB collection name, e.g. "transactions"
+
+    Returns:
+        Number of changed items, or the YNAB error dict when the request failed
+    """
+    ensure_cache_indexes()
+    db = get_DB()
+    key = {"budgetUuid": budget_uuid, "resource": resource}
+    state = db.ynabsyncstate.find_one(key, {"serverKnowledge": 1})
+
+    result = ynab_api.fetch("GET", sync_path(budget_uuid, resource, state))
+    if "error" in result:
+        return result
+
+    data = result.get("data", {})
+    items = data.get(resource, [])
+    operations = sync_operations(key, items, data.get("server_knowledge"))
+    if operations:
+        write_items(db.ynabcacheitems, operations)
+
+    state_write = sync_state_write(key, data)
+    if state_write:
+        try:
+            db.ynabsyncstate.update_one(*state_write, upsert=True)
+        except DuplicateKeyError:
+            pass  # A concurrent sync already stored newer server knowledge
+    logger.info(
+        "ynab_sync budget=%s resource=%s delta=%s changed=%d",
+        budget_uuid, resource, state is not None, len(items),
+    )
+    return len(items)
+
+
+def cached_items_filter(budget_uuid, resource, query=None):
+    filter_ = {"budgetUuid": budget_uuid, "resource": resource, "deleted": {"$ne": True}}
+    if query:
+        filter_.update(query)
+    return filter_
+
+
+def cached_items(budget_uuid, resource, query=None):
+    """Return the locally cached items of a resource, optionally filtered on their data."""
+    filter_ = cached_items_filter(budget_uuid, resource, query)
+    return [doc["data"] for doc in get_DB().ynabcacheitems.find(filter_, {"data": 1, "_id": 0})]
+
+
+def get_scheduled_transactions(budget_uuid):
+    """
+    Scheduled transactions for a budget, kept in sync with YNAB via delta requests.
+
+    Falls back to a direct YNAB request when MongoDB is unavailable; like
+    ynab_api.get_scheduled_transactions it returns the error dict if YNAB fails.
+    """
+    if not budget_uuid:
+        raise ValueError("A budget ID is required")
+
+    try:
+        result = sync_resource(budget_uuid, SCHEDULED_TRANSACTIONS)
+        if isinstance(result, dict):
+            return result
+        return cached_items(budget_uuid, SCHEDULED_TRANSACTIONS)
+    except PyMongoError as e:
+        logger.warning("ynab_cache_unavailable resource=%s error=%s", SCHEDULED_TRANSACTIONS, e)
+        return ynab_api.get_scheduled_transactions(budget_uuid)
+
+
+def get_uncategorized_transactions(budget_uuid):
+    """
+    Uncategorized transactions for a budget, served from the delta-synced transaction cache.
+
+    A transaction is uncategorized when it has no category or sits in YNAB's
+    "Uncategorized" category; transfers are filtered out as in ynab_api. The
+    cache starts TRANSACTIONS_SYNC_DAYS before the budget's first sync, so older
+    uncategorized transactions are not returned.
+    """
+    if not budget_uuid:
+        raise ValueError("A budget ID is required")
+
+    try:
+        result = sync_resource(budget_uuid, TRANSACTIONS)
+        if isinstance(result, dict):
+            return []
+        transactions = cached_items(budget_uuid, TRANSACTIONS, UNCATEGORIZED_QUERY)
+    except PyMongoError as e:
+        logger.warning("ynab_cache_unavailable resource=%s error=%s", TRANSACTIONS, e)
+        return ynab_api.get_uncategorized_transactions(budget_uuid)
+
+    return without_transfers(transactions)
+
+
+def without_transfers(transactions):
+    """Filter out transfers, which have a payee name starting with "Transfer :"."""
+    return [
+        transaction for transaction in transactions
+        if not (transaction.get("payee_name") or "").startswith("Transfer :")
+    ]
@@ -1,64 +1,195 @@
-from .ynab_api import fetch, get_uncategorized_transactions
-from .ai_api import suggest_category
-from .categories_api import get_categories_for_budget
-from .budget_api import get_objectid_for_budget, convert_objectid_to_str
+from concurrent.futures import ThreadPoolExecutor
+from .ynab_api import fetch
+from .ynab_cache import get_uncategorized_transactions
+from .categorization import iter_categorize
+from .category_memo import remember_categories
+from .categories_api import get_categories_for_budget, CATEGORIZATION_CATEGORY_FIELDS
+from .budget_api import get_objectid_for_budget
+import os
+import time
 import logging
 
+# YNAB updates in flight at once; the YNAB rate limiter bounds their throughput
+CATEGORIZATION_MAX_WORKERS = int(os.getenv("CATEGORIZATION_MAX_WORKERS", "8"))
+# Transactions updated per bulk PATCH request
+YNAB_BULK_UPDATE_SIZE = int(os.getenv("YNAB_BULK_UPDATE_SIZE", "100"))
+
+def _updated_memo(transaction):
+    memo = transaction.get("memo") or ""  # Ensure memo is a string
+    return f"{memo} AI suggested".strip()
+
+def _transaction_update(transaction, category):
+    return {
+        "category_id": category["uuid"],
+        "approved": True,
+        "flag_color": "blue",
+        "memo": _updated_memo(transaction)
+    }
+
+def _updated_entry(transaction, category):
+    return {
+        "transaction_id": transaction["id"],
+        "status": "updated",
+        "category_name": category["name"],
+        "memo": _updated_memo(transaction)
+    }
+
+def _apply_category(budget_uuid, transaction, category):
+    """Set the category of one YNAB transaction and return its result entry."""
+    transaction_id = transaction["id"]
+    logging.info("Updating transaction %s with category %s", transaction_id, category["name"])
+    path = f"budgets/{budget_uuid}/transactions/{transaction_id}"
+    result = fetch("PUT", path, {"transaction": _transaction_update(transaction, category)}, rate_limited=True)
+    if "error" in result:
+        logging.warning(f"Failed to update transaction {transaction_id}: {result['error']}")
+        return {"transaction_id": transaction_id, "status": "failed", "error": result["error"]}
+    return _updated_entry(transaction, category)
+
+def updated_transaction_ids(result):
+    """Ids of the transactions a bulk PATCH response reports as saved."""
+    data = result.get("data") or {}
+    ids = data.get("transaction_ids")
+    if ids is None:
+        ids = [transaction.get("id") for transaction in data.get("transactions") or []]
+    return set(ids)
+
+def _apply_categories(budget_uuid, assignments):
+    """
+    Set the categories of several YNAB transactions with one bulk PATCH.
+
+    Transactions the response does not report as saved are retried one by one,
+    so a single rejected transaction cannot fail the rest of its chunk. If YNAB
+    rejects the whole request as invalid (400), every transaction is retried
+    one by one; if it is rate limited, unavailable or unreachable, the chunk is
+    marked failed rather than multiplying the requests to a struggling API.
+
+    Args:
+        assignments: (transaction, category) pairs
+
+    Returns:
+        Result entries, in the order of `assignments`
+    """
+    if len(assignments) == 1:
+        return [_apply_category(budget_uuid, *assignments[0])]
+
+    path = f"budgets/{budget_uuid}/transactions"
+    body = {"transactions": [
+        dict(_transaction_update(transaction, category), id=transaction["id"])
+        for transaction, category in assignments
+    ]}
+    result = fetch("PATCH", path, body, rate_limited=True)
+    if "error" in result:
+        logging.warning(f"Bulk update of {len(assignments)} transactions failed: {result['error']}")
+        if result.get("status") != 400:
+            return [
+                {"transaction_id": transaction["id"], "status": "failed", "error": result["error"]}
+                for transaction, _ in assignments
+            ]
+        updated = set()
+    else:
+        updated = updated_transaction_ids(result)
+
+    rejected = [transaction["id"] for transaction, _ in assignments if transaction["id"] not in updated]
+    logging.info(
+        "ynab_bulk_update budget=%s transactions=%d fallback=%d",
+        budget_uuid, len(assignments), len(rejected),
+    )
+    return [
+        _updated_entry(transaction, category) if transaction["id"] in updated
+        else _apply_category(budget_uuid, transaction, category)
+        for transaction, category in assignments
+    ]
+
 def apply_suggested_categories_service(budget_uuid):
-    """Fetch uncategorized transactions, suggest categories, and update them in YNAB."""
+    """
+    Fetch uncategorized transactions, suggest categories, and update them in YNAB.
+
+    Suggestions stream in (memo and local model first, then OpenAI batches as
+    they complete); suggested transactions are gathered into chunks of
+    YNAB_BULK_UPDATE_SIZE, and each chunk is sent as one bulk PATCH by a bounded
+    pool of workers as soon as it is full.
+
+    Returns:
+        One entry per uncategorized transaction, in their original order, with a
+        "status" of "updated", "skipped" (no usable suggestion) or "failed" (with
+        an "error")
+    """
     try:
         # Fetch budget ID and uncategorized transactions
         budget_id = get_objectid_for_budget(budget_uuid)
         uncategorized_transactions = get_uncategorized_transactions(budget_uuid)
-        categories = get_categories_for_budget(budget_id)
+        categories = get_categories_for_budget(budget_id, CATEGORIZATION_CATEGORY_FIELDS)
 
         if not uncategorized_transactions:
             return {"message": "No uncategorized transactions found"}
 
-        updated_transactions = []
-
-        for transaction in uncategorized_transactions:
-            try:
-                # Suggest a category using AI
-                suggested_category_name = suggest_category(transaction, categories)
-                suggested_category = next(
-                    (cat for cat in categories if cat["name"] == suggested_category_name), None
-                )
-
-                if not suggested_category:
-                    logging.warning(f"No matching category found for transaction: {transaction['id']}")
-                    continue
-
-                # Update transaction in YNAB
-                print (f"Updating transaction {transaction['id']} with category {suggested_category}")
-                transaction_id = transaction["id"]
-                memo = transaction.get("memo") or ""  # Ensure memo is a string
-                updated_memo = f"{memo} AI suggested".strip()   
-
-                path = f"budgets/{budget_uuid}/transactions/{transaction_id}"
-                body = {
-                    "transaction": {
-                        "category_id": suggested_category["uuid"],
-                        "approved": True,
-                        "flag_color": "blue",
-                        "memo": updated_memo
-                    }
-                }
-                result = fetch("PUT", path, body)
-                if "error" not in result:
-                    updated_transactions.append({
-                        "transaction_id": transaction_id,
-                        "status": "updated",
-                        "memo": updated_memo
-                    })
-                else:
-                    logging.warning(f"Failed to update transaction {transaction_id}: {result['error']}")
-
-            except Exception as e:
-                logging.warning(f"Error processing transaction {transaction['id']}: {e}")
-                continue
-
-        return updated_transactions
+        start = time.perf_counter()
+        categories_by_name = {category["name"]: category for category in categories}
+        positions = {transaction["id"]: index for index, transaction in enumerate(uncategorized_transactions)}
+        results = [None] * len(uncategorized_transactions)
+        sources = {}
+        pending = []  # (transaction, category) pairs not yet sent to YNAB
+        chunks = []  # (assignments, future)
+
+        with ThreadPoolExecutor(max_workers=CATEGORIZATION_MAX_WORKERS, thread_name_prefix="ynab-apply") as executor:
+            def submit(assignments):
+                chunks.append((assignments, executor.submit(_apply_categories, budget_uuid, assignments)))
+
+            for batch, suggestions, error in iter_categorize(budget_uuid, uncategorized_transactions, categories):
+                for transaction in batch:
+                    position = positions[transaction["id"]]
+                    if error is not None:
+                        results[position] = {
+                            "transaction_id": transaction["id"],
+                            "status": "failed",
+                            "error": f"Categorization failed: {error}"
+                        }
+                        continue
+                    suggestion = suggestions.get(transaction["id"]) or {}
+                    category = categories_by_name.get(suggestion.get("category_name"))
+                    if not category:
+                        logging.warning(f"No matching category found for transaction: {transaction['id']}")
+                        results[position] = {
+                            "transaction_id": transaction["id"],
+                            "status": "skipped",
+                            "suggested_category_name": suggestion.get("category_name")
+                        }
+                        continue
+                    sources[transaction["id"]] = suggestion.get("source")
+                    pending.append((transaction, category))
+                # Send full chunks while later suggestions are still coming in
+                while len(pending) >= YNAB_BULK_UPDATE_SIZE:
+                    submit(pending[:YNAB_BULK_UPDATE_SIZE])
+                    pending = pending[YNAB_BULK_UPDATE_SIZE:]
+            if pending:
+                submit(pending)
+
+            applied = []
+            for assignments, future in chunks:
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    logging.warning(f"Error updating {len(assignments)} transactions: {e}")
+                    entries = [
+                        {"transaction_id": transaction["id"], "status": "failed", "error": str(e)}
+                        for transaction, _ in assignments
+                    ]
+                for (transaction, category), entry in zip(assignments, entries):
+                    results[positions[transaction["id"]]] = dict(entry, source=sources[transaction["id"]])
+                    if entry["status"] == "updated":
+                        applied.append((transaction, category))
+
+        # Remember the applied categories so these payees skip the AI next time
+        try:
+            remember_categories(budget_uuid, applied)
+        except Exception as e:
+            logging.warning(f"Could not update the category memo: {e}")
+
+        logging.info(
+            "categories_applied budget=%s transactions=%d updated=%d elapsed_ms=%d",
+            budget_uuid, len(results), len(applied), (time.perf_counter() - start) * 1000,
+        )
+        return results
 
     except Exception as e:
         logging.error(f"Error in apply_suggested_categories_service: {e}")
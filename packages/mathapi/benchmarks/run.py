@@ -0,0 +1,205 @@
+"""
+Projection benchmarks: sweeps over horizon, category count and scenario count.
+
+Every case projects the baseline and each scenario of a synthetic budget (see
+benchmarks/synthetic.py) without the projection cache, and records the wall
+time (best and median of --repeat runs) and the tracemalloc peak of one more
+run. Budgets are generated and projected as of a fixed --today, so the same seed
+gives the same workload on any day. Results are written as JSON so runs of
+different versions can be compared:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sweep horizon --engine columnar --compare results.json
+"""
+import argparse
+from datetime import date, datetime, timezone
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.prediction_api import project_daily_balances_with_reasons
+from app.projection_engine import project_daily_balances_columnar
+from benchmarks.synthetic import generate_budget
+
+RESULTS_VERSION = 2
+ENGINES = ("dict", "columnar")
+# Projection start date of the synthetic budgets, unless --today is given
+DEFAULT_TODAY = date(2025, 1, 15)
+
+# Sizes held fixed while another parameter is swept
+DEFAULTS = {"days_ahead": 365, "categories": 50, "scheduled": 50, "scenarios": 0}
+SWEEPS = {
+    "horizon": ("days_ahead", [30, 90, 365, 1095, 3650]),
+    "categories": ("categories", [10, 50, 200, 1000]),
+    "scenarios": ("scenarios", [1, 10, 50, 100]),
+}
+QUICK_SWEEPS = {
+    "horizon": ("days_ahead", [30, 365]),
+    "categories": ("categories", [10, 50]),
+    "scenarios": ("scenarios", [1, 10]),
+}
+
+
+def project_all(engine, budget, days_ahead, start_date=None):
+    """
+    Project the baseline and every scenario of a budget, the way /balance-prediction/data does.
+
+    Args:
+        start_date: First projected day; pass the `today` the budget was generated for
+    """
+    accounts, categories = budget["accounts"], budget["categories"]
+    future_transactions = budget["future_transactions"]
+    if engine == "columnar":
+        baseline = project_daily_balances_columnar(
+            accounts, categories, future_transactions, days_ahead, start_date=start_date
+        )
+        results = [baseline.to_daily_dict()]
+        results.extend(baseline.with_simulations(simulation).to_daily_dict() for simulation in budget["simulations"].values())
+        return results
+    results = [
+        project_daily_balances_with_reasons(accounts, categories, future_transactions, days_ahead, start_date=start_date)
+    ]
+    results.extend(
+        project_daily_balances_with_reasons(
+            accounts, categories, future_transactions, days_ahead, simulation, start_date=start_date
+        )
+        for simulation in budget["simulations"].values()
+    )
+    return results
+
+
+def measure(engine, params, repeat, seed, today=DEFAULT_TODAY):
+    """
+    Benchmark one case.
+
+    Args:
+        today: Date the budget is generated for and projected from
+
+    Returns:
+        Result record with the case parameters, wall times in seconds and the
+        peak traced memory in bytes
+    """
+    budget = generate_budget(
+        seed=seed, categories=params["categories"], scheduled=params["scheduled"],
+        scenarios=params["scenarios"], days_ahead=params["days_ahead"], today=today,
+    )
+    project_all(engine, budget, params["days_ahead"], today)  # Warm up imports and recurrence caches
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        project_all(engine, budget, params["days_ahead"], today)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        project_all(engine, budget, params["days_ahead"], today)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(
+        params, engine=engine, repeat=repeat,
+        wall_s_min=round(min(times), 6), wall_s_median=round(statistics.median(times), 6), peak_bytes=peak,
+    )
+
+
+def cases(sweeps, engines):
+    """Yield (sweep name, engine, params) for every point of the selected sweeps."""
+    for name, (parameter, values) in sweeps.items():
+        for value in values:
+            for engine in engines:
+                yield name, engine, dict(DEFAULTS, **{parameter: value})
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def case_key(result):
+    return (result["sweep"], result["engine"], result["days_ahead"], result["categories"],
+            result["scheduled"], result["scenarios"])
+
+
+def compare(results, previous):
+    """Print the time and memory ratio of every case to the same case in an earlier run."""
+    earlier = {case_key(result): result for result in previous["results"]}
+    for result in results:
+        before = earlier.get(case_key(result))
+        if before:
+            print(
+                f"{result['sweep']:<10} {result['engine']:<8} {result[SWEEPS[result['sweep']][0]]:>6}  "
+                f"time x{result['wall_s_min'] / before['wall_s_min']:.2f}  "
+                f"memory x{result['peak_bytes'] / max(before['peak_bytes'], 1):.2f}",
+                file=sys.stderr,
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sweep", choices=sorted(SWEEPS) + ["all"], default="all")
+    parser.add_argument("--engine", choices=list(ENGINES) + ["all"], default="all")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--today", type=date.fromisoformat, default=DEFAULT_TODAY,
+        help=f"projection start date of the budgets (default {DEFAULT_TODAY.isoformat()})",
+    )
+    parser.add_argument("--quick", action="store_true", help="small sweeps, for smoke runs")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    sweeps = QUICK_SWEEPS if args.quick else SWEEPS
+    if args.sweep != "all":
+        sweeps = {args.sweep: sweeps[args.sweep]}
+    engines = ENGINES if args.engine == "all" else (args.engine,)
+
+    results = []
+    for sweep, engine, params in cases(sweeps, engines):
+        result = dict(measure(engine, params, args.repeat, args.seed, args.today), sweep=sweep)
+        results.append(result)
+        print(
+            f"{sweep:<10} {engine:<8} {params[sweeps[sweep][0]]:>6}  "
+            f"{result['wall_s_min'] * 1000:10.1f} ms  {result['peak_bytes'] / 1024 / 1024:8.2f} MiB",
+            file=sys.stderr,
+        )
+
+    report = {
+        "version": RESULTS_VERSION, "seed": args.seed, "today": args.today.isoformat(),
+        "environment": environment(), "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Seeded generator of synthetic budgets for the projection benchmarks.
+
+The same seed and sizes always produce the same budget, so timings of
+different versions are measured on identical inputs.
+"""
+from datetime import date, timedelta
+from itertools import cycle, product
+import random
+
+from app.prediction_api import CADENCE_CONFIG
+from app.recurrence import DAY_FREQUENCIES, MONTH_FREQUENCIES, TWICE_A_MONTH
+from app.simulation_registry import normalize_simulation
+
+# Every frequency the recurrence expansion knows, plus one-off schedules
+FREQUENCIES = list(DAY_FREQUENCIES) + list(MONTH_FREQUENCIES) + [TWICE_A_MONTH, "never"]
+ACCOUNT_NAMES = ["Checking", "Savings", "Credit Card", "Cash"]
+PAYEES = ["Landlord", "Employer", "Supermarket", "Energy Co", "Insurance Co", "Gym", "Streaming", "School"]
+
+
+def need_target_variants(today):
+    """
+    Every goal_cadence of CADENCE_CONFIG, plus an unknown one that falls back to
+    monthly, combined with and without a goal_target_month.
+
+    Returns:
+        List of (goal_cadence, goal_target_month) pairs
+    """
+    target_month = (today.replace(day=1) + timedelta(days=62)).replace(day=1).isoformat()
+    cadences = sorted(CADENCE_CONFIG) + [max(CADENCE_CONFIG) + 1]
+    return list(product(cadences, [None, target_month]))
+
+
+def generate_categories(rng, count, today, need_share=0.8):
+    """
+    Categories of a synthetic budget, in milliunits.
+
+    NEED categories cycle through need_target_variants() so even small budgets
+    exercise every cadence; goal_day, goal_overall_left and goal_cadence_frequency
+    vary randomly. The rest have no NEED target.
+    """
+    variants = cycle(need_target_variants(today))
+    categories = []
+    for index in range(count):
+        category = {"name": f"Category {index}", "balance": rng.randrange(0, 500) * 1000}
+        if rng.random() < need_share:
+            goal_cadence, goal_target_month = next(variants)
+            target = {
+                "goal_type": "NEED",
+                "goal_target": rng.randrange(10, 2000) * 1000,
+                "goal_cadence": goal_cadence,
+                "goal_cadence_frequency": rng.choice([1, 1, 2]),
+                "goal_overall_left": rng.choice([None, 0, rng.randrange(1, 1000) * 1000]),
+            }
+            if goal_target_month:
+                target["goal_target_month"] = goal_target_month
+            if rng.random() < 0.7:
+                target["goal_day"] = rng.randrange(1, 32)
+            category["target"] = target
+        categories.append(category)
+    return categories
+
+
+def generate_scheduled_transactions(rng, count, categories, today):
+    """Scheduled transactions cycling through FREQUENCIES, mostly expenses of the given categories."""
+    frequencies = cycle(FREQUENCIES)
+    names = [category["name"] for category in categories] or ["Miscellaneous"]
+    transactions = []
+    for index in range(count):
+        income = rng.random() < 0.15
+        date_next = today + timedelta(days=rng.randrange(0, 60))
+        transactions.append({
+            "id": f"scheduled-{index}",
+            "date_first": (date_next - timedelta(days=rng.randrange(0, 365))).isoformat(),
+            "date_next": date_next.isoformat(),
+            "frequency": next(frequencies),
+            "amount": rng.randrange(500, 5000) * 1000 if income else -rng.randrange(5, 1500) * 1000,
+            "category_name": "Salary" if income else rng.choice(names),
+            "account_name": rng.choice(ACCOUNT_NAMES),
+            "payee_name": rng.choice(PAYEES),
+            "memo": rng.choice([None, "", f"Reference {index}"]),
+        })
+    return transactions
+
+
+def generate_simulations(rng, count, entries, days_ahead, today):
+    """
+    Simulation scenarios with `entries` changes each inside the horizon.
+
+    Returns:
+        Dictionary of scenario name to normalized simulation entries, like SimulationRegistry.all()
+    """
+    simulations = {}
+    for index in range(count):
+        simulations[f"scenario_{index}"] = normalize_simulation([
+            {
+                "date": (today + timedelta(days=rng.randrange(0, days_ahead + 1))).isoformat(),
+                "amount": str(rng.randrange(-3000, 1000)),
+                "reason": f"What-if {index}",
+                "category": "Miscellaneous",
+            }
+            for _ in range(entries)
+        ])
+    return simulations
+
+
+def generate_budget(seed=0, categories=50, scheduled=50, accounts=3, scenarios=0, simulation_entries=12,
+                    days_ahead=365, today=None):
+    """
+    Generate the inputs of a projection.
+
+    Args:
+        seed: Random seed; equal arguments give equal budgets
+        categories: Number of categories
+        scheduled: Number of scheduled transactions
+        accounts: Number of accounts
+        scenarios: Number of simulation scenarios
+        simulation_entries: Changes per simulation scenario
+        days_ahead: Horizon the simulation dates fall in
+        today: The projection start date; defaults to today, since projections start today
+
+    Returns:
+        Dictionary with "accounts", "categories", "future_transactions" and "simulations"
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    budget_categories = generate_categories(rng, categories, today)
+    return {
+        "accounts": [
+            {"name": ACCOUNT_NAMES[index % len(ACCOUNT_NAMES)], "balance": rng.randrange(-2000, 20000) * 1000}
+            for index in range(accounts)
+        ],
+        "categories": budget_categories,
+        "future_transactions": generate_scheduled_transactions(rng, scheduled, budget_categories, today),
+        "simulations": generate_simulations(rng, scenarios, simulation_entries, days_ahead, today),
+    }
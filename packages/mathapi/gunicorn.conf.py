@@ -0,0 +1,58 @@
+# Gunicorn configuration for the Math API
+#
+#   gunicorn -c gunicorn.conf.py
+#
+# Every setting can be overridden from the environment, see the readme.
+import os
+
+from app.wsgi import worker_count
+
+wsgi_app = "app.wsgi:create_app()"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Pre-fork workers sized from the container's CPU limit, each with a thread pool
+# so a slow YNAB or OpenAI call only occupies one thread
+workers = worker_count()
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Long enough for a cold projection or a categorization batch; workers get
+# graceful_timeout to finish in-flight requests on restart or SIGTERM
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers now and then to bound memory growth of the in-process caches
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# The app is imported in each worker, after the fork, so no client, pool or
+# thread is ever shared between processes
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Multiprocess metrics files of a previous run would be summed into the new one's
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    from app.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from app.wsgi import warm_up
+    try:
+        warm_up()
+    except Exception as e:
+        worker.log.warning(f"Worker warm-up failed: {e}")
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+import app.ai_api as ai_api
+from app.ai_api import parse_batch_response, suggest_categories, suggest_categories_async
+
+CATEGORIES = [{"name": "Groceries"}, {"name": "Rent"}]
+
+
+def _transactions(count):
+    return [
+        {"id": f"t{index}", "payee_name": f"Payee {index}", "amount": -12340, "date": "2026-10-01"}
+        for index in range(count)
+    ]
+
+
+def test_parse_batch_response_accepts_fenced_json_and_ignores_unknown_ids():
+    transactions = _transactions(2)
+    content = '```json\n{"t0": "Groceries", "t1": " Rent ", "other": "Rent"}\n```'
+    assert parse_batch_response(content, transactions) == {"t0": "Groceries", "t1": "Rent"}
+
+
+@pytest.mark.parametrize("content", ["Groceries", "[\"Groceries\"]"])
+def test_parse_batch_response_rejects_non_objects(content):
+    with pytest.raises(ValueError):
+        parse_batch_response(content, _transactions(1))
+
+
+def test_suggest_categories_sends_one_request_per_batch(monkeypatch):
+    prompts = []
+
+    def complete(prompt):
+        prompts.append(prompt)
+        ids = [json.loads(line)["id"] for line in prompt.splitlines() if line.startswith("{")]
+        if not ids:  # A batch of one uses the single-transaction prompt
+            return "Groceries"
+        return json.dumps({transaction_id: "Groceries" for transaction_id in ids})
+
+    monkeypatch.setattr(ai_api, "_complete", complete)
+    suggestions = suggest_categories(_transactions(5), CATEGORIES, batch_size=2)
+
+    assert suggestions == {f"t{index}": "Groceries" for index in range(5)}
+    assert len(prompts) == 3
+    assert '"amount": -12.34' in prompts[0]
+    # The single-transaction prompt of the last batch uses the same currency units
+    assert "- Amount: -12.34" in prompts[2]
+
+
+def test_suggest_categories_splits_batches_it_cannot_parse(monkeypatch):
+    prompts = []
+
+    def complete(prompt):
+        prompts.append(prompt)
+        ids = [json.loads(line)["id"] for line in prompt.splitlines() if line.startswith("{")]
+        if len(ids) > 2:
+            return "Sorry, here are the categories: Groceries"
+        if not ids:  # Single-transaction prompt
+            return "Rent\n"
+        return json.dumps({ids[0]: "Groceries"})  # Leaves the second id unanswered
+
+    monkeypatch.setattr(ai_api, "_complete", complete)
+    suggestions = suggest_categories(_transactions(4), CATEGORIES, batch_size=4)
+
+    assert suggestions == {"t0": "Groceries", "t1": "Rent", "t2": "Groceries", "t3": "Rent"}
+
+
+def test_suggest_categories_async_matches_sync(monkeypatch):
+    async def complete(prompt):
+        ids = [json.loads(line)["id"] for line in prompt.splitlines() if line.startswith("{")]
+        return json.dumps({transaction_id: "Rent" for transaction_id in ids}) if ids else "Rent"
+
+    monkeypatch.setattr(ai_api, "_complete_async", complete)
+    suggestions = asyncio.run(suggest_categories_async(_transactions(3), CATEGORIES, batch_size=2))
+
+    assert suggestions == {"t0": "Rent", "t1": "Rent", "t2": "Rent"}
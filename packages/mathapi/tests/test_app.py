@@ -0,0 +1,336 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from datetime import datetime, timedelta
+
+import app.app as app_module
+import app.projection_cache as projection_cache_module
+from app.app import app, load_simulations_folder
+from app.projection_cache import ProjectionCache
+from app.projection_engine import MAX_SCENARIO_CELLS
+from app.request_params import MAX_BATCH_SCENARIOS, MAX_DAYS_AHEAD
+from app.simulation_registry import SimulationRegistry, normalize_simulation
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    base_date = datetime.now().date()
+    inputs = {
+        "accounts": [{"balance": 1000000}],
+        "categories": [
+            {
+                "name": "Rent",
+                "balance": 0,
+                "target": {"goal_type": "NEED", "goal_target": 400000, "goal_cadence": 1, "goal_cadence_frequency": 1}
+            }
+        ],
+        "future_transactions": [
+            {
+                "date_next": (base_date + timedelta(days=2)).isoformat(),
+                "frequency": "monthly",
+                "category_name": "Salary",
+                "amount": 900000,
+                "account_name": "Checking",
+                "payee_name": "Employer",
+                "memo": None
+            }
+        ]
+    }
+    simulations = {
+        "Actual Balance": None,
+        "car": normalize_simulation([
+            {"date": (base_date + timedelta(days=5)).isoformat(), "amount": "-2000", "reason": "Car", "category": "Car"}
+        ])
+    }
+    monkeypatch.setattr(app_module, "load_projection_inputs", lambda budget_uuid: inputs)
+    monkeypatch.setattr(app_module, "load_simulations_folder", lambda: dict(simulations))
+    return inputs
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_data_overlays_simulations_on_the_baseline_by_default(budget, client, monkeypatch):
+    expected = client.get("/balance-prediction/data?budget_id=b&days_ahead=60&engine=dict").get_json()
+
+    def full_projection(*args, **kwargs):
+        raise AssertionError("the default engine must not re-project simulations")
+
+    monkeypatch.setattr(app_module, "project_daily_balances_with_reasons", full_projection)
+    data = client.get("/balance-prediction/data?budget_id=b&days_ahead=60").get_json()
+
+    assert set(data) == {"baseline", "simulation_Actual Balance", "simulation_car"}
+    for scenario, daily_balances in expected.items():
+        assert list(data[scenario]) == list(daily_balances)
+        assert [day["balance"] for day in data[scenario].values()] == pytest.approx(
+            [day["balance"] for day in daily_balances.values()]
+        )
+
+
+@pytest.mark.parametrize("path", [
+    "/balance-prediction/interactive",
+    "/balance-prediction/data",
+    "/balance-prediction/data?format=ndjson",
+    "/balance-prediction/data?engine=dict",
+    "/balance-prediction/probabilistic",
+])
+@pytest.mark.parametrize("days_ahead", ["-1", "-5", str(MAX_DAYS_AHEAD + 1), "soon"])
+def test_projection_routes_reject_an_invalid_horizon(budget, client, path, days_ahead):
+    separator = "&" if "?" in path else "?"
+    response = client.get(f"{path}{separator}budget_id=b&days_ahead={days_ahead}")
+
+    assert response.status_code == 400
+    assert "days_ahead" in response.get_data(as_text=True)
+
+
+def test_scenarios_reject_an_invalid_horizon(budget, client):
+    response = client.post("/balance-prediction/scenarios?budget_id=b&days_ahead=-1", json={"scenarios": [[]]})
+
+    assert response.status_code == 400
+    assert "days_ahead" in response.get_json()["error"]
+
+
+def test_horizon_bounds_are_inclusive(budget, client):
+    assert client.get("/balance-prediction/data?budget_id=b&days_ahead=0").status_code == 200
+    response = client.get(f"/balance-prediction/data?budget_id=b&days_ahead={MAX_DAYS_AHEAD}&format=compact")
+    assert response.status_code == 200
+
+
+def test_interactive_page_plots_every_scenario(budget, client):
+    response = client.get("/balance-prediction/interactive?budget_id=b&days_ahead=30")
+
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert '"name": "Actual Balance"' in page and '"name": "car"' in page
+    revalidated = client.get(
+        "/balance-prediction/interactive?budget_id=b&days_ahead=30", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def ndjson_records(response):
+    body = response.get_data(as_text=True)
+    assert body.endswith("\n")
+    records = [json.loads(line) for line in body.split("\n")[:-1]]
+    # One compact JSON document per line
+    assert body == "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    return records
+
+
+def test_ndjson_streams_one_record_per_scenario(budget, client):
+    expected = client.get("/balance-prediction/data?budget_id=b&days_ahead=60").get_json()
+    response = client.get("/balance-prediction/data?budget_id=b&days_ahead=60&format=ndjson")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    records = ndjson_records(response)
+    assert [record["scenario"] for record in records] == ["baseline", "simulation_Actual Balance", "simulation_car"]
+    assert all(set(record) == {"scenario", "data"} for record in records)
+    assert {record["scenario"]: record["data"] for record in records} == expected
+
+
+def test_ndjson_chunked_per_month(budget, client):
+    expected = client.get("/balance-prediction/data?budget_id=b&days_ahead=60").get_json()
+    records = ndjson_records(client.get("/balance-prediction/data?budget_id=b&days_ahead=60&format=ndjson&chunk=month"))
+
+    baseline = [record for record in records if record["scenario"] == "baseline"]
+    assert len(baseline) >= 2
+    assert [record["month"] for record in baseline] == sorted({day[:7] for day in expected["baseline"]})
+    for record in baseline:
+        assert set(record) == {"scenario", "month", "data"}
+        assert all(day.startswith(record["month"]) for day in record["data"])
+    assert {day: data for record in baseline for day, data in record["data"].items()} == expected["baseline"]
+
+
+def test_ndjson_reports_a_failing_simulation_in_its_record(budget, client, monkeypatch):
+    monkeypatch.setattr(app_module, "load_simulations_folder", lambda: {"broken": [{"date": "2030-01-01"}]})
+    records = ndjson_records(client.get("/balance-prediction/data?budget_id=b&days_ahead=30&format=ndjson&engine=dict"))
+
+    assert [record["scenario"] for record in records] == ["baseline", "simulation_broken"]
+    assert set(records[1]) == {"scenario", "error"}
+    assert records[1]["error"].startswith("Error:")
+
+
+def test_ndjson_does_not_cache_streamed_simulations(budget, client, monkeypatch):
+    cache = ProjectionCache()
+    monkeypatch.setattr(projection_cache_module, "projection_cache", cache)
+    client.get("/balance-prediction/data?budget_id=b&days_ahead=60&format=ndjson&engine=dict").get_data()
+
+    assert cache.stats()["entries"] == 1  # The baseline only
+
+
+def test_scenarios_are_evaluated_against_the_baseline(budget, client):
+    day = (datetime.now().date() + timedelta(days=3)).isoformat()
+    response = client.post("/balance-prediction/scenarios?budget_id=b&days_ahead=10", json={"scenarios": {
+        "none": [],
+        "bonus": [{"date": day, "amount": "500", "reason": "Bonus"}],
+    }})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data["dates"]) == len(data["baseline"]) == 11
+    assert data["scenarios"]["none"] == pytest.approx(data["baseline"])
+    assert data["scenarios"]["bonus"][3] - data["baseline"][3] == pytest.approx(500)
+
+
+@pytest.mark.parametrize("body, message", [
+    (None, "non-empty 'scenarios'"),
+    ({"scenarios": "salary-cut"}, "non-empty 'scenarios'"),
+    ({"scenarios": []}, "non-empty 'scenarios'"),
+    ({"scenarios": [[]] * (MAX_BATCH_SCENARIOS + 1)}, "At most"),
+    ({"scenarios": {"cut": "not a list"}}, "Invalid scenario"),
+    ({"scenarios": [[{"date": "tomorrow", "amount": "5"}]]}, "Invalid scenario"),
+    ({"scenarios": [[{"date": "2030-01-01"}]]}, "Invalid scenario"),
+])
+def test_scenarios_reject_an_invalid_body(budget, client, body, message):
+    response = client.post("/balance-prediction/scenarios?budget_id=b&days_ahead=10", json=body)
+
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+
+
+def test_scenarios_cap_the_scenario_days(budget, client):
+    days_ahead = MAX_DAYS_AHEAD
+    allowed = MAX_SCENARIO_CELLS // (days_ahead + 1)
+    response = client.post(
+        f"/balance-prediction/scenarios?budget_id=b&days_ahead={days_ahead}", json={"scenarios": [[]] * (allowed + 1)}
+    )
+
+    assert response.status_code == 400
+    assert f"At most {allowed} scenarios" in response.get_json()["error"]
+
+
+@pytest.fixture
+def registry(budget, monkeypatch, tmp_path):
+    """The app's simulation registry on an empty folder, with the real load_simulations_folder."""
+    registry = SimulationRegistry(str(tmp_path))
+    monkeypatch.setattr(app_module, "simulation_registry", registry)
+    monkeypatch.setattr(app_module, "load_simulations_folder", load_simulations_folder)
+    return registry
+
+
+def test_put_simulation_validates_and_replaces(registry, client):
+    response = client.put("/simulations/car", json=[{"date": "2030-01-05", "amount": "-2000", "reason": "Car"}])
+
+    assert response.status_code == 200
+    assert response.get_json() == {"car.json": [{"date": "2030-01-05", "amount": -2000.0, "reason": "Car", "category": "Miscellaneous"}]}
+    client.put("/simulations/car", json=[{"date": "2030-02-01", "amount": -500}])
+    assert [entry["amount"] for entry in client.get("/simulations").get_json()["car.json"]] == [-500.0]
+
+
+@pytest.mark.parametrize("name, body, message", [
+    ("car", {"date": "2030-01-05"}, "must be a list"),
+    ("car", [{"date": "05/01/2030", "amount": 1}], "Entry 0 is invalid"),
+    ("car", [{"amount": 1}], "Entry 0 is missing"),
+    ("car trip", [], "Simulation names"),
+])
+def test_put_simulation_rejects_invalid_simulations(registry, client, name, body, message):
+    response = client.put(f"/simulations/{name}", json=body)
+
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+    assert registry.all() == {}
+
+
+def test_delete_simulation(registry, client):
+    client.put("/simulations/car", json=[{"date": "2030-01-05", "amount": -2000}])
+
+    assert client.delete("/simulations/car").status_code == 204
+    assert client.get("/simulations").get_json() == {}
+    response = client.delete("/simulations/car")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Simulation not found: car"}
+
+
+def test_changing_a_simulation_changes_the_projection_etag(registry, client):
+    url = "/balance-prediction/data?budget_id=b&days_ahead=30"
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put("/simulations/car", json=[{"date": (datetime.now().date() + timedelta(days=5)).isoformat(), "amount": -2000}])
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "simulation_car.json" in response.get_json()
+    client.delete("/simulations/car")
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 200
+
+
+def test_compact_format_returns_the_requested_fields(budget, client):
+    full = client.get("/balance-prediction/data?budget_id=b&days_ahead=60").get_json()
+    response = client.get("/balance-prediction/data?budget_id=b&days_ahead=60&format=compact&fields=balance")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert "dictionary" not in data
+    assert set(data["scenarios"]) == set(full)
+    baseline = data["scenarios"]["baseline"]
+    assert set(baseline) == {"days", "balance"}
+    assert baseline["balance"] == pytest.approx([day["balance"] for day in full["baseline"].values()])
+
+    with_changes = client.get("/balance-prediction/data?budget_id=b&days_ahead=60&format=compact").get_json()
+    assert "dictionary" in with_changes and "changes" in with_changes["scenarios"]["baseline"]
+
+
+@pytest.mark.parametrize("fields", ["payees", "balance,payees", ","])
+def test_compact_format_rejects_unknown_fields(budget, client, fields):
+    response = client.get(f"/balance-prediction/data?budget_id=b&format=compact&fields={fields}")
+
+    assert response.status_code == 400
+    assert "fields" in response.get_json()["error"]
+
+
+def test_compact_and_full_responses_have_different_etags(budget, client):
+    url = "/balance-prediction/data?budget_id=b&days_ahead=60"
+    full = client.get(url).headers["ETag"]
+    compact = client.get(f"{url}&format=compact").headers["ETag"]
+    balance_only = client.get(f"{url}&format=compact&fields=balance").headers["ETag"]
+
+    assert len({full, compact, balance_only}) == 3
+    assert client.get(f"{url}&format=compact", headers={"If-None-Match": full}).status_code == 200
+
+
+@pytest.mark.parametrize("accept, encoding, decompress", [
+    ("gzip", "gzip", gzip.decompress),
+    ("gzip, br", "br", brotli.decompress),
+])
+def test_large_responses_are_compressed_with_the_accepted_encoding(budget, client, accept, encoding, decompress):
+    url = "/balance-prediction/data?budget_id=b&days_ahead=60"
+    plain = client.get(url)
+    response = client.get(url, headers={"Accept-Encoding": accept})
+
+    assert "Content-Encoding" not in plain.headers
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + f'-{encoding}"'
+    assert json.loads(decompress(response.get_data())) == plain.get_json()
+
+
+def test_streamed_ndjson_is_compressed(budget, client):
+    url = "/balance-prediction/data?budget_id=b&days_ahead=60&format=ndjson"
+    plain = client.get(url).get_data()
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert response.is_streamed
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_small_bodies_and_not_modified_responses_are_not_compressed(budget, client):
+    small = client.get("/healthz", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.get_json() == {"status": "ok"}
+
+    url = "/balance-prediction/data?budget_id=b&days_ahead=60"
+    etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    revalidated = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert "Content-Encoding" not in revalidated.headers
+    assert revalidated.headers["ETag"] == etag
+    assert "Accept-Encoding" in revalidated.headers["Vary"]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+import app.asgi as asgi
+from app.request_params import MAX_DAYS_AHEAD
+
+
+@pytest.fixture
+def inputs(monkeypatch):
+    inputs = {"accounts": [{"balance": 1000000}], "categories": [], "future_transactions": []}
+
+    async def load_projection_inputs(budget_uuid):
+        return inputs
+
+    monkeypatch.setattr(asgi, "load_projection_inputs", load_projection_inputs)
+    monkeypatch.setattr(asgi, "load_simulations_folder", lambda: {"Actual Balance": None})
+    return inputs
+
+
+def test_interactive_page_plots_the_baseline(inputs):
+    async def get():
+        response = await asgi.app.test_client().get("/balance-prediction/interactive?budget_id=b&days_ahead=30")
+        return response.status_code, await response.get_data(as_text=True)
+
+    status, page = asyncio.run(get())
+
+    assert status == 200
+    assert '"name": "Actual Balance"' in page
+
+
+@pytest.mark.parametrize("path", ["/balance-prediction/interactive", "/balance-prediction/data"])
+@pytest.mark.parametrize("days_ahead", ["-1", str(MAX_DAYS_AHEAD + 1)])
+def test_projection_routes_reject_an_invalid_horizon(inputs, path, days_ahead):
+    async def get():
+        response = await asgi.app.test_client().get(f"{path}?budget_id=b&days_ahead={days_ahead}")
+        return response.status_code, await response.get_data(as_text=True)
+
+    status, body = asyncio.run(get())
+
+    assert status == 400
+    assert "days_ahead" in body
+
+
+def test_scheduled_transactions_errors_are_reported_as_json(monkeypatch):
+    async def get_scheduled_transactions(budget_uuid):
+        raise RuntimeError("MongoDB is down")
+
+    monkeypatch.setattr(asgi, "get_scheduled_transactions", get_scheduled_transactions)
+
+    async def get():
+        response = await asgi.app.test_client().get("/sheduled-transactions?budget_id=b")
+        return response.status_code, await response.get_json()
+
+    status, body = asyncio.run(get())
+
+    assert status == 500
+    assert body == {"error": "Error fetching scheduled transactions: MongoDB is down"}
@@ -0,0 +1,43 @@
+from app.category_memo import amount_bucket, match_memos, memo_operations, normalize_payee
+
+CATEGORIES = [{"name": "Groceries", "uuid": "c1"}, {"name": "Fuel", "uuid": "c2"}]
+
+
+def test_normalize_payee_ignores_case_accents_digits_and_punctuation():
+    assert normalize_payee("Carrefour Market 0123 Gent") == "carrefour market gent"
+    assert normalize_payee("CARREFOUR-MARKET  gent #4567") == "carrefour market gent"
+    assert normalize_payee("Café Zoë") == "cafe zoe"
+    assert normalize_payee("1234 ...") is None
+    assert normalize_payee(None) is None
+
+
+def test_amount_bucket_is_direction_and_magnitude():
+    assert amount_bucket(-4500) == amount_bucket(-8000) == "out:0"
+    assert amount_bucket(-45000) == "out:1"
+    assert amount_bucket(1200000) == "in:3"
+    assert amount_bucket(0) == "out:0"
+
+
+def test_match_memos_prefers_the_amount_bucket_over_the_payee_wide_entry():
+    memos = [
+        {"payee": "total", "bucket": "*", "categoryName": "Groceries"},
+        {"payee": "total", "bucket": "out:1", "categoryName": "Fuel"},
+        {"payee": "gone", "bucket": "*", "categoryName": "Deleted category"},
+    ]
+    transactions = [
+        {"id": "a", "payee_name": "TOTAL 123", "amount": -60000},
+        {"id": "b", "payee_name": "Total", "amount": -3000},
+        {"id": "c", "payee_name": "Gone", "amount": -3000},
+        {"id": "d", "payee_name": "New payee", "amount": -3000},
+    ]
+    assert match_memos(memos, transactions, CATEGORIES) == {"a": "Fuel", "b": "Groceries"}
+
+
+def test_memo_operations_upsert_bucket_and_payee_wide_entries():
+    operations = memo_operations("budget", [({"payee_name": "Total 1", "amount": -60000}, CATEGORIES[1])])
+    filters = [operation._filter for operation in operations]
+    assert filters == [
+        {"budgetUuid": "budget", "payee": "total", "bucket": "out:1"},
+        {"budgetUuid": "budget", "payee": "total", "bucket": "*"},
+    ]
+    assert all(operation._doc["$set"]["categoryUuid"] == "c2" for operation in operations)
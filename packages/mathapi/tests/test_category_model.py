@@ -0,0 +1,136 @@
+from datetime import timedelta
+import threading
+
+import mongomock
+import pytest
+
+import app.budget_api as budget_api
+import app.categories_api as categories_api
+import app.category_model as category_model
+import app.transactions_api as transactions_api
+from app.category_model import (
+    CATEGORY_MODEL_RETRAIN_HOURS,
+    CategoryModel,
+    char_ngrams,
+    get_model,
+    predict_categories,
+    transaction_features,
+)
+
+HISTORY = [
+    ("Delhaize Gent", None, -45000, "Groceries"),
+    ("DELHAIZE 0123 GENT", None, -32000, "Groceries"),
+    ("Colruyt Laagste Prijzen", None, -61000, "Groceries"),
+    ("Colruyt 456", None, -25000, "Groceries"),
+    ("Shell Station", "tanken", -70000, "Fuel"),
+    ("Shell 88", "tanken", -65000, "Fuel"),
+    ("TotalEnergies", "tanken", -55000, "Fuel"),
+    ("Netflix", "abonnement", -13990, "Subscriptions"),
+    ("Spotify AB", "abonnement", -10990, "Subscriptions"),
+]
+
+
+@pytest.fixture
+def model():
+    model = CategoryModel()
+    for payee, memo, amount, category in HISTORY:
+        model.learn(transaction_features(payee, memo, amount), category)
+    return model
+
+
+def test_transaction_features_groups():
+    features = transaction_features("Shell 88", "Tanken!", -65000)
+    assert features["a"] == ["out:1"]
+    assert features["m"] == ["tanken"]
+    assert " sh" in features["p"] and "ell " in features["p"]
+    assert "a" in transaction_features(None, None, 0) and "p" not in transaction_features(None, None, 0)
+
+
+def test_char_ngrams_mark_word_boundaries():
+    assert char_ngrams("ab", sizes=(3,)) == [" ab", "ab "]
+
+
+def test_predicts_known_payees_with_high_confidence(model):
+    category, confidence = model.predict(transaction_features("DELHAIZE 999 GENT", None, -51000))
+    assert category == "Groceries"
+    assert confidence > 0.9
+
+    category, _ = model.predict(transaction_features("Shell Express", "tanken", -60000))
+    assert category == "Fuel"
+
+
+def test_unknown_payees_get_low_confidence(model):
+    _, confidence = model.predict(transaction_features("Xqzw Vbnm", None, -5000))
+    assert confidence < 0.9
+
+
+def test_probabilities_sum_to_one(model):
+    probabilities = model.probabilities(transaction_features("Netflix", None, -13990))
+    assert sum(probability for _, probability in probabilities) == pytest.approx(1.0)
+    assert probabilities[0][0] == "Subscriptions"
+
+
+def test_untrained_model_predicts_nothing():
+    assert CategoryModel().predict(transaction_features("Netflix", None, -13990)) == (None, 0.0)
+
+
+def test_blob_round_trip_and_incremental_learning(model):
+    restored = CategoryModel.from_blob(model.to_blob())
+    features = transaction_features("Colruyt Gent", None, -40000)
+    assert restored.probabilities(features) == pytest.approx(model.probabilities(features))
+
+    restored.learn(transaction_features("Lidl", None, -20000), "Groceries")
+    assert restored.transactions == model.transactions + 1
+    assert restored.predict(transaction_features("Lidl Gent", None, -22000))[0] == "Groceries"
+
+
+@pytest.fixture
+def budget_db(monkeypatch):
+    """mongomock database with one budget, two categories and the modules' model cache cleared."""
+    db = mongomock.MongoClient().db
+    for module in (category_model, budget_api, categories_api, transactions_api):
+        monkeypatch.setattr(module, "get_DB", lambda: db)
+    monkeypatch.setattr(category_model, "_models", {})
+    budget_id = db.localbudgets.insert_one({"uuid": "budget"}).inserted_id
+    categories = {
+        name: db.localcategories.insert_one({"budgetId": budget_id, "name": name}).inserted_id
+        for name in ("Groceries", "Fuel")
+    }
+    return db, budget_id, categories
+
+
+def test_recategorized_transactions_are_learned_after_a_full_retrain(budget_db):
+    db, budget_id, categories = budget_db
+    transaction_ids = [
+        db.localtransactions.insert_one({
+            "budgetId": budget_id, "payeeName": "Shell Station", "amount": -60000, "categoryId": categories["Groceries"]
+        }).inserted_id
+        for _ in range(5)
+    ]
+    features = transaction_features("Shell Station", None, -60000)
+    assert get_model("budget").predict(features)[0] == "Groceries"
+
+    # Recategorizing does not move the insertion watermark, so incremental training misses it
+    db.localtransactions.update_many({"_id": {"$in": transaction_ids}}, {"$set": {"categoryId": categories["Fuel"]}})
+    assert get_model("budget").predict(features)[0] == "Groceries"
+
+    category_model._models["budget"].trained_at -= timedelta(hours=CATEGORY_MODEL_RETRAIN_HOURS)
+    model = get_model("budget")
+    assert model.predict(features)[0] == "Fuel"
+    assert model.transactions == 5
+    assert not category_model.load_model("budget").needs_full_training()
+
+
+def test_predictions_wait_for_the_budget_lock(budget_db):
+    transactions = [{"id": "t1", "payee_name": "Shell", "memo": None, "amount": -1000}]
+    results = []
+    lock = category_model._model_lock("budget")
+    with lock:  # Another request training the model
+        thread = threading.Thread(
+            target=lambda: results.append(predict_categories("budget", transactions, [{"name": "Fuel"}]))
+        )
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive() and results == []
+    thread.join(5)
+    assert results == [{}]
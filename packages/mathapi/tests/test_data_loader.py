@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+import app.data_loader as data_loader
+from app.data_loader import load_projection_inputs
+
+
+@pytest.fixture
+def fetchers(monkeypatch):
+    """Stub the four fetches of load_projection_inputs; tests replace entries of the returned dict."""
+    stubs = {
+        "get_objectid_for_budget": lambda budget_uuid: "budget-object-id",
+        "get_scheduled_transactions": lambda budget_uuid: [{"id": "s1"}],
+        "get_categories_for_budget": lambda budget_id, fields: [{"name": "Rent", "budget": budget_id}],
+        "get_accounts_for_budget": lambda budget_id, fields: [{"balance": 1000}],
+    }
+    for name in stubs:
+        monkeypatch.setattr(data_loader, name, lambda *args, name=name: stubs[name](*args))
+    return stubs
+
+
+def test_inputs_are_loaded_concurrently(fetchers):
+    # Each fetch only returns once all three are running at the same time
+    running = threading.Barrier(3, timeout=5)
+
+    def together(result):
+        def fetch(*args):
+            running.wait()
+            return result
+        return fetch
+
+    fetchers["get_scheduled_transactions"] = together([{"id": "s1"}])
+    fetchers["get_categories_for_budget"] = together([{"name": "Rent"}])
+    fetchers["get_accounts_for_budget"] = together([{"balance": 1000}])
+
+    inputs = load_projection_inputs("budget-uuid")
+
+    assert inputs["future_transactions"] == [{"id": "s1"}]
+    assert inputs["categories"] == [{"name": "Rent"}]
+    assert inputs["accounts"] == [{"balance": 1000}]
+    assert set(inputs["timings"]) == {"scheduled_transactions", "budget_id", "categories", "accounts", "total"}
+
+
+def test_failing_fetch_reaches_the_caller_without_waiting_for_the_others(fetchers):
+    release = threading.Event()
+    finished = threading.Event()
+
+    def slow_scheduled_transactions(budget_uuid):
+        release.wait(5)
+        finished.set()
+        return []
+
+    def failing_accounts(budget_id, fields):
+        raise ValueError("accounts unavailable")
+
+    fetchers["get_scheduled_transactions"] = slow_scheduled_transactions
+    fetchers["get_accounts_for_budget"] = failing_accounts
+    try:
+        with pytest.raises(ValueError, match="accounts unavailable"):
+            load_projection_inputs("budget-uuid")
+        assert not finished.is_set()
+    finally:
+        release.set()
+
+
+def test_ynab_error_is_raised(fetchers):
+    fetchers["get_scheduled_transactions"] = lambda budget_uuid: {"error": "HTTP error occurred: 401"}
+
+    with pytest.raises(RuntimeError, match="401"):
+        load_projection_inputs("budget-uuid")
@@ -0,0 +1,47 @@
+import gzip
+import zlib
+
+import brotli
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app.http_cache import choose_encoding, compress_body, iter_compressed, not_modified, projection_etag
+
+INPUTS = {"accounts": [{"balance": 1000}], "categories": [], "future_transactions": []}
+
+
+def test_projection_etag_changes_with_inputs_and_params():
+    etag = projection_etag(INPUTS, 30, (), "/balance-prediction/data", {"budget_id": "b"})
+    assert etag == projection_etag(INPUTS, 30, (), "/balance-prediction/data", {"budget_id": "b"})
+    changed_inputs = dict(INPUTS, accounts=[{"balance": 2000}])
+    assert etag != projection_etag(changed_inputs, 30, (), "/balance-prediction/data", {"budget_id": "b"})
+    assert etag != projection_etag(INPUTS, 31, (), "/balance-prediction/data", {"budget_id": "b"})
+    assert etag != projection_etag(INPUTS, 30, (("a.json", 1),), "/balance-prediction/data", {"budget_id": "b"})
+    assert etag != projection_etag(INPUTS, 30, (), "/balance-prediction/data", {"budget_id": "b", "engine": "columnar"})
+
+
+def test_not_modified_matches_every_representation():
+    assert not_modified(parse_etags('"abc"'), "abc")
+    assert not_modified(parse_etags('"other", "abc-gzip"'), "abc")
+    assert not_modified(parse_etags('W/"abc-br"'), "abc")
+    assert not_modified(parse_etags("*"), "abc")
+    assert not not_modified(parse_etags('"abd"'), "abc")
+    assert not not_modified(parse_etags(None), "abc")
+
+
+def test_choose_encoding():
+    assert choose_encoding(parse_accept_header("gzip, deflate, br", Accept)) == "br"
+    assert choose_encoding(parse_accept_header("gzip, br;q=0", Accept)) == "gzip"
+    assert choose_encoding(parse_accept_header("gzip;q=0, identity", Accept)) is None
+    assert choose_encoding(parse_accept_header(None, Accept)) is None
+
+
+def test_compressed_bodies_round_trip():
+    assert gzip.decompress(compress_body(b"x" * 5000, "gzip")) == b"x" * 5000
+    chunks = list(iter_compressed(['{"a":1}\n', '{"b":2}\n'], "gzip"))
+    assert len(chunks) == 3
+    # Every chunk is flushed, so the first line can be decoded before the stream ends
+    assert zlib.decompressobj(zlib.MAX_WBITS | 16).decompress(chunks[0]) == b'{"a":1}\n'
+    assert gzip.decompress(b"".join(chunks)) == b'{"a":1}\n{"b":2}\n'
+    assert brotli.decompress(compress_body(b"x" * 5000, "br")) == b"x" * 5000
+    assert brotli.decompress(b"".join(iter_compressed(['{"a":1}\n', '{"b":2}\n'], "br"))) == b'{"a":1}\n{"b":2}\n'
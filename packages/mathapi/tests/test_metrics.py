@@ -0,0 +1,60 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.metrics import MongoCommandMetrics, count_cache, external_call, latest_metrics, stage
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_stage_times_calls_and_counts_errors():
+    before = _sample("mathapi_stage_duration_seconds_count", stage="test_stage")
+    errors = _sample("mathapi_errors_total", stage="test_stage")
+
+    @stage("test_stage")
+    def succeed():
+        return 42
+
+    assert succeed() == 42
+    with pytest.raises(ValueError):
+        with stage("test_stage"):
+            raise ValueError("boom")
+
+    assert _sample("mathapi_stage_duration_seconds_count", stage="test_stage") == before + 2
+    assert _sample("mathapi_errors_total", stage="test_stage") == errors + 1
+
+
+def test_external_call_counts_outcomes():
+    ok = _sample("mathapi_external_calls_total", service="test_service", outcome="ok")
+    failed = _sample("mathapi_external_calls_total", service="test_service", outcome="error")
+
+    with external_call("test_service"):
+        pass
+    with pytest.raises(RuntimeError):
+        with external_call("test_service"):
+            raise RuntimeError("down")
+
+    assert _sample("mathapi_external_calls_total", service="test_service", outcome="ok") == ok + 1
+    assert _sample("mathapi_external_calls_total", service="test_service", outcome="error") == failed + 1
+    assert _sample("mathapi_stage_duration_seconds_count", stage="test_service_fetch") >= 2
+
+
+def test_count_cache_and_exposition():
+    hits = _sample("mathapi_cache_events_total", cache="test_cache", result="hit")
+    count_cache("test_cache", 3, 1)
+    count_cache("test_cache", True, False)
+    assert _sample("mathapi_cache_events_total", cache="test_cache", result="hit") == hits + 4
+
+    body, content_type = latest_metrics()
+    assert content_type.startswith("text/plain")
+    assert b'mathapi_cache_events_total{cache="test_cache",result="miss"}' in body
+
+
+def test_mongo_listener_observes_command_durations():
+    class Event:
+        duration_micros = 2500
+
+    calls = _sample("mathapi_external_calls_total", service="mongodb", outcome="ok")
+    MongoCommandMetrics().succeeded(Event())
+    assert _sample("mathapi_external_calls_total", service="mongodb", outcome="ok") == calls + 1
@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+from datetime import date
+from app.projection_engine import project_daily_balances_columnar
+from app.monte_carlo import (
+    MAX_CELLS,
+    MAX_PATHS,
+    effective_paths,
+    project_balance_bands,
+    simulate_balance_paths,
+    stochastic_categories,
+    unscheduled_share
+)
+
+@pytest.fixture
+def categories():
+    return [
+        {"name": "Groceries", "historicalAverage": 400000, "typicalSpendingPattern": 0.3},
+        {"name": "Fuel", "historicalAverage": 120000, "typicalSpendingPattern": None},
+        {"name": "Unused", "historicalAverage": 0, "typicalSpendingPattern": 0.5},
+        {
+            "name": "Rent",
+            "historicalAverage": 800000,
+            "typicalSpendingPattern": 0.03,
+            "target": {"goal_type": "NEED", "goal_target": 800000}
+        }
+    ]
+
+@pytest.fixture
+def baseline():
+    return project_daily_balances_columnar([{"balance": 1000000}], [], [], 90)
+
+def test_stochastic_categories_skip_empty_and_center_need(categories):
+    selected = stochastic_categories(categories)
+
+    assert selected[0] == ("Groceries", 400.0, 0.3, False)
+    assert selected[1][1] == 120.0
+    assert 0 < selected[1][2] < 1
+    assert selected[2] == ("Rent", 800.0, 0.03, True)
+    assert len(selected) == 3
+
+def test_simulation_is_seedable(baseline, categories):
+    first = simulate_balance_paths(baseline, categories, paths=200, seed=42)
+    second = simulate_balance_paths(baseline, categories, paths=200, seed=42)
+
+    assert first.shape == (200, 91)
+    assert np.array_equal(first, second)
+    without_need = simulate_balance_paths(baseline, categories[:3], paths=200, seed=42)
+    assert (without_need <= baseline.balance).all()
+
+def test_expected_spending_matches_historical_average(baseline, categories):
+    balances = simulate_balance_paths(baseline, categories, paths=4000, seed=7)
+    spent_per_month = (baseline.balance[-1] - balances[:, -1]).mean() / (91 / 30.4375)
+
+    assert spent_per_month == pytest.approx(520.0, rel=0.05)
+
+def test_scheduled_spending_is_not_sampled_again():
+    start = date(2025, 1, 1)
+    gym = {"name": "Gym", "historicalAverage": 100000, "typicalSpendingPattern": 0.1}
+    fees = {
+        "date_first": "2025-01-10", "date_next": "2025-01-10", "frequency": "monthly", "amount": -60000,
+        "category_name": "Gym", "account_name": "Checking", "payee_name": "Gym", "memo": None,
+    }
+    baseline = project_daily_balances_columnar([{"balance": 1000000}], [gym], [fees], 89, start_date=start)
+
+    assert unscheduled_share(baseline, baseline.scheduled_index(), "Gym", 100.0)[[0, 40, 89]] == pytest.approx(0.4)
+    balances = simulate_balance_paths(baseline, [gym], paths=4000, seed=5)
+    sampled_per_month = (baseline.balance[-1] - balances[:, -1]).mean() / 3
+
+    assert sampled_per_month == pytest.approx(40.0, rel=0.05)
+
+def test_need_categories_widen_the_bands_around_the_baseline(baseline):
+    rent = {
+        "name": "Rent",
+        "historicalAverage": 800000,
+        "typicalSpendingPattern": 0.03,
+        "target": {"goal_type": "NEED", "goal_target": 800000}
+    }
+    bands = project_balance_bands(baseline, [rent], paths=4000, seed=3)
+
+    assert bands["p5"][-1] < bands["baseline"][-1] < bands["p95"][-1]
+    balances = simulate_balance_paths(baseline, [rent], paths=4000, seed=3)
+    assert balances[:, -1].mean() == pytest.approx(baseline.balance[-1], rel=0.01)
+
+def test_bands_are_ordered(baseline, categories):
+    bands = project_balance_bands(baseline, categories, paths=500, seed=1)
+
+    assert len(bands["dates"]) == 91
+    assert all(p5 <= p50 <= p95 for p5, p50, p95 in zip(bands["p5"], bands["p50"], bands["p95"]))
+    assert all(0 <= p <= 1 for p in bands["probability_negative"])
+    assert bands["probability_negative"][-1] > 0
+    assert bands["paths"] == 500
+
+def test_path_count_is_capped():
+    assert effective_paths(10 ** 9, 30) == MAX_PATHS
+    assert effective_paths(MAX_PATHS, 3650) == MAX_CELLS // 3651
+    assert effective_paths(0, 30) == 1
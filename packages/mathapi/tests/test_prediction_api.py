@@ -8,7 +8,8 @@ from app.prediction_api import (
     add_simulations_to_projection,
     process_need_categories,
     process_need_category,
-    apply_need_category_spending
+    apply_need_category_spending,
+    ScheduledIndex
 )
 import calendar
 
@@ -554,4 +555,55 @@ def test_spending_with_scheduled_transactions(base_projection):
     scheduled = next(c for c in changes if c["reason"] == "Scheduled Transaction")
     remaining = next(c for c in changes if c["reason"] == "Future Month Target")
     assert scheduled["amount"] == -50.0
-    assert remaining["amount"] == -50.0  # Remaining amount to reach target 
\ No newline at end of file
+    assert remaining["amount"] == -50.0  # Remaining amount to reach target 
+
+
+def test_scheduled_index_month_totals(base_projection):
+    """The index returned for scheduled transactions drives NEED processing."""
+    base_date = datetime.now().date()
+    next_month = (base_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+    future_transactions = [
+        {
+            "date_next": next_month.isoformat(),
+            "category_name": "Utilities",
+            "amount": -30000,
+            "account_name": "Checking",
+            "payee_name": "Water",
+            "memo": None
+        },
+        {
+            "date_next": next_month.replace(day=10).isoformat(),
+            "category_name": "Utilities",
+            "amount": -40000,
+            "account_name": "Checking",
+            "payee_name": "Power",
+            "memo": None
+        }
+    ]
+
+    index = add_future_transactions_to_projection(base_projection, future_transactions)
+
+    assert isinstance(index, ScheduledIndex)
+    assert index["Utilities"] == {next_month.isoformat(), next_month.replace(day=10).isoformat()}
+    assert index.scheduled_amount("Utilities", next_month.year, next_month.month) == pytest.approx(70.0)
+    assert index.scheduled_amount("Utilities", base_date.year, base_date.month) == 0
+
+    categories = [{
+        "name": "Utilities",
+        "balance": 0,
+        "target": {
+            "goal_type": "NEED",
+            "goal_target": 100000,
+            "goal_cadence": 1,
+            "goal_cadence_frequency": 1
+        }
+    }]
+
+    process_need_categories(base_projection, categories, index, 60)
+
+    last_day = next_month.replace(day=calendar.monthrange(next_month.year, next_month.month)[1])
+    changes = [c for c in base_projection[last_day.isoformat()]["changes"]
+              if c["category"] == "Utilities"]
+    assert len(changes) == 1
+    assert changes[0]["amount"] == pytest.approx(-30.0)
@@ -0,0 +1,81 @@
+import pytest
+from datetime import date
+from app.projection_cache import ProjectionCache, fingerprint, inputs_fingerprint, estimate_size
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_fingerprint_is_stable_and_order_independent():
+    first = inputs_fingerprint([{"balance": 1, "name": "a"}], [], [], 30, date(2025, 1, 1))
+    second = inputs_fingerprint([{"name": "a", "balance": 1}], [], [], 30, date(2025, 1, 1))
+
+    assert first == second
+    assert first != inputs_fingerprint([{"balance": 2, "name": "a"}], [], [], 30, date(2025, 1, 1))
+    assert first != inputs_fingerprint([{"balance": 1, "name": "a"}], [], [], 31, date(2025, 1, 1))
+    assert first != inputs_fingerprint([{"balance": 1, "name": "a"}], [], [], 30, date(2025, 1, 2))
+    assert fingerprint(first, None, "dict") != fingerprint(first, [{"amount": 1}], "dict")
+
+def test_hits_and_misses(clock):
+    cache = ProjectionCache(max_entries=4, ttl_seconds=10, max_bytes=10_000, clock=clock)
+
+    assert cache.get("a") is None
+    cache.put("a", {"x": 1}, size=1)
+
+    assert cache.get("a") == {"x": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_ttl_expiry(clock):
+    cache = ProjectionCache(max_entries=4, ttl_seconds=10, max_bytes=10_000, clock=clock)
+    cache.put("a", "value", size=1)
+
+    clock.now = 10.0
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_lru_eviction_by_entries(clock):
+    cache = ProjectionCache(max_entries=2, ttl_seconds=10, max_bytes=10_000, clock=clock)
+    cache.put("a", 1, size=1)
+    cache.put("b", 2, size=1)
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", 3, size=1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_memory(clock):
+    cache = ProjectionCache(max_entries=10, ttl_seconds=10, max_bytes=100, clock=clock)
+    cache.put("a", 1, size=60)
+    cache.put("b", 2, size=60)
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+
+    cache.put("huge", 3, size=101)
+    assert cache.get("huge") is None
+
+def test_get_or_compute_only_computes_on_miss(clock):
+    cache = ProjectionCache(max_entries=2, ttl_seconds=10, max_bytes=10_000, clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"2025-01-01": {"balance": 1, "changes": [{}]}}
+
+    cache.get_or_compute("k", compute)
+    cache.get_or_compute("k", compute)
+
+    assert len(calls) == 1
+    assert estimate_size(compute()) > 0
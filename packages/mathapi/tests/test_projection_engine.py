@@ -0,0 +1,186 @@
+import pytest
+from datetime import datetime, timedelta
+import app.projection_engine as projection_engine
+from app.prediction_api import project_daily_balances_with_reasons
+from app.projection_engine import project_daily_balances_columnar, evaluate_scenarios
+
+@pytest.fixture
+def projection_inputs():
+    base_date = datetime.now().date()
+    next_month = (base_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+    target_month = (base_date + timedelta(days=60)).replace(day=1)
+
+    accounts = [{"balance": 2500000}, {"balance": 500000}]
+    categories = [
+        {
+            "name": "Rent",
+            "balance": 0,
+            "target": {
+                "goal_type": "NEED",
+                "goal_target": 800000,
+                "goal_cadence": 1,
+                "goal_cadence_frequency": 1,
+                "goal_day": 1,
+                "goal_overall_left": 800000
+            }
+        },
+        {
+            "name": "Groceries",
+            "balance": 120000,
+            "target": {
+                "goal_type": "NEED",
+                "goal_target": 400000,
+                "goal_cadence": 1,
+                "goal_cadence_frequency": 1
+            }
+        },
+        {
+            "name": "Insurance",
+            "balance": 0,
+            "target": {
+                "goal_type": "NEED",
+                "goal_target": 300000,
+                "goal_cadence": 3,
+                "goal_cadence_frequency": 1,
+                "goal_target_month": target_month.isoformat(),
+                "goal_day": 15,
+                "goal_overall_left": 300000
+            }
+        },
+        {
+            "name": "Taxes",
+            "balance": 0,
+            "target": {
+                "goal_type": "NEED",
+                "goal_target": 1200000,
+                "goal_cadence": 13,
+                "goal_cadence_frequency": 1,
+                "goal_target_month": target_month.isoformat(),
+                "goal_day": 20,
+                "goal_overall_left": 0
+            }
+        },
+        {"name": "No Target", "balance": 0}
+    ]
+    future_transactions = [
+        {
+            "date_next": next_month.isoformat(),
+            "category_name": "Rent",
+            "amount": -300000,
+            "account_name": "Checking",
+            "payee_name": "Landlord",
+            "memo": None
+        },
+        {
+            "date_next": (base_date + timedelta(days=3)).isoformat(),
+            "category_name": "Salary",
+            "amount": 3100000,
+            "account_name": "Checking",
+            "payee_name": "Employer",
+            "memo": "Monthly salary",
+            "frequency": "monthly"
+        },
+        {
+            "id": "weekly-groceries",
+            "date_next": (base_date + timedelta(days=1)).isoformat(),
+            "frequency": "weekly",
+            "category_name": "Groceries",
+            "amount": -45000,
+            "account_name": "Checking",
+            "payee_name": "Supermarket",
+            "memo": None
+        },
+        {
+            "date_next": (base_date + timedelta(days=900)).isoformat(),
+            "category_name": "Far Away",
+            "amount": -1000,
+            "account_name": "Checking",
+            "payee_name": "Nobody",
+            "memo": None
+        }
+    ]
+    simulations = [
+        {
+            "date": (base_date + timedelta(days=10)).isoformat(),
+            "amount": "-2000",
+            "reason": "Simulation: new car",
+            "category": "Car"
+        }
+    ]
+    return accounts, categories, future_transactions, simulations
+
+@pytest.mark.parametrize("with_simulations", [False, True])
+def test_columnar_matches_dict_projection(projection_inputs, with_simulations):
+    accounts, categories, future_transactions, simulations = projection_inputs
+    simulations = simulations if with_simulations else None
+
+    expected = project_daily_balances_with_reasons(accounts, categories, future_transactions, 365, simulations)
+    result = project_daily_balances_columnar(accounts, categories, future_transactions, 365, simulations)
+
+    assert result.to_daily_dict() == expected
+    assert list(result.to_daily_dict().keys()) == list(expected.keys())
+
+def test_columnar_projection_arrays(projection_inputs):
+    accounts, categories, future_transactions, _ = projection_inputs
+
+    result = project_daily_balances_columnar(accounts, categories, future_transactions, 30)
+
+    assert len(result.balance) == 31
+    assert len(result.dates()) == 31
+    assert result.dates()[0] == datetime.now().date().isoformat()
+    assert result.balance[0] == pytest.approx(result.balance_diff[0])
+    assert result.balance[-1] == pytest.approx(result.balance_diff.sum())
+
+def test_columnar_projection_without_changes_detail(projection_inputs):
+    accounts, categories, future_transactions, _ = projection_inputs
+
+    result = project_daily_balances_columnar(accounts, categories, future_transactions, 30)
+    compact = result.to_daily_dict(include_changes=False)
+
+    assert all(day["changes"] == [] for day in compact.values())
+    assert list(compact.keys()) == list(result.to_daily_dict().keys())
+
+def test_simulation_overlay_matches_full_projection(projection_inputs):
+    accounts, categories, future_transactions, simulations = projection_inputs
+
+    baseline = project_daily_balances_columnar(accounts, categories, future_transactions, 365)
+    overlay = baseline.with_simulations(simulations).to_daily_dict()
+    expected = project_daily_balances_with_reasons(accounts, categories, future_transactions, 365, simulations)
+
+    assert list(overlay.keys()) == list(expected.keys())
+    for date, day_data in expected.items():
+        assert overlay[date]["changes"] == day_data["changes"]
+        assert overlay[date]["balance"] == pytest.approx(day_data["balance"])
+        assert overlay[date]["balance_diff"] == pytest.approx(day_data["balance_diff"])
+
+def test_simulation_overlay_leaves_baseline_untouched(projection_inputs):
+    accounts, categories, future_transactions, simulations = projection_inputs
+
+    baseline = project_daily_balances_columnar(accounts, categories, future_transactions, 365)
+    before = baseline.balance.copy()
+    baseline.with_simulations(simulations)
+
+    assert (baseline.balance == before).all()
+    assert baseline.with_simulations(None) is baseline
+
+def test_evaluate_scenarios_matches_overlays(projection_inputs):
+    accounts, categories, future_transactions, simulations = projection_inputs
+    base_date = datetime.now().date()
+    one_off = [{"date": (base_date + timedelta(days=40)).isoformat(), "amount": -500, "category": "Purchase"}]
+    scenarios = [simulations, [], one_off, simulations + one_off]
+
+    baseline = project_daily_balances_columnar(accounts, categories, future_transactions, 365)
+    balances = evaluate_scenarios(baseline, scenarios)
+
+    assert balances.shape == (4, 366)
+    for row, scenario in enumerate(scenarios):
+        assert balances[row] == pytest.approx(baseline.with_simulations(scenario).balance)
+
+def test_evaluate_scenarios_caps_the_matrix_size(projection_inputs, monkeypatch):
+    accounts, categories, future_transactions, _ = projection_inputs
+    baseline = project_daily_balances_columnar(accounts, categories, future_transactions, 99)
+    monkeypatch.setattr(projection_engine, "MAX_SCENARIO_CELLS", 300)
+
+    assert evaluate_scenarios(baseline, [[], [], []]).shape == (3, 100)
+    with pytest.raises(ValueError):
+        evaluate_scenarios(baseline, [[], [], [], []])
@@ -0,0 +1,80 @@
+from datetime import date
+
+import mongomock
+import pytest
+
+import app.accounts_api as accounts_api
+import app.categories_api as categories_api
+from app.accounts_api import PROJECTION_ACCOUNT_FIELDS, get_accounts_for_budget
+from app.categories_api import PROJECTION_CATEGORY_FIELDS, get_categories_for_budget
+from app.monte_carlo import simulate_balance_paths
+from app.prediction_api import project_daily_balances_with_reasons
+from app.projection_engine import project_daily_balances_columnar
+from benchmarks.synthetic import generate_budget
+
+
+class RecordingDict(dict):
+    """Dict recording the (dotted) keys read from it and from its nested dicts."""
+
+    def __init__(self, data, read, prefix=""):
+        super().__init__({
+            key: RecordingDict(value, read, f"{prefix}{key}.") if isinstance(value, dict) else value
+            for key, value in data.items()
+        })
+        self.read = read
+        self.prefix = prefix
+
+    def __getitem__(self, key):
+        self.read.add(self.prefix + key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.read.add(self.prefix + key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self.read.add(self.prefix + key)
+        return super().__contains__(key)
+
+
+def is_loaded(field, fields):
+    """Whether a projection on `fields` keeps `field`, or `field` is a parent of a kept subfield."""
+    return any(loaded == field or loaded.startswith(field + ".") for loaded in fields)
+
+
+@pytest.fixture
+def budget():
+    budget = generate_budget(seed=2, categories=60, scheduled=20, days_ahead=400, today=date.today())
+    for category in budget["categories"]:
+        category.update(historicalAverage=120000, typicalSpendingPattern=0.2)
+    return budget
+
+
+def test_projections_only_read_loaded_fields(budget):
+    category_fields, account_fields = set(), set()
+    categories = [RecordingDict(category, category_fields) for category in budget["categories"]]
+    accounts = [RecordingDict(account, account_fields) for account in budget["accounts"]]
+
+    project_daily_balances_with_reasons(accounts, categories, budget["future_transactions"], 400)
+    baseline = project_daily_balances_columnar(accounts, categories, budget["future_transactions"], 400)
+    simulate_balance_paths(baseline, categories, paths=10, seed=1)
+
+    assert "target.goal_cadence" in category_fields
+    assert [field for field in category_fields if not is_loaded(field, PROJECTION_CATEGORY_FIELDS)] == []
+    assert [field for field in account_fields if not is_loaded(field, PROJECTION_ACCOUNT_FIELDS)] == []
+
+
+def test_loaders_apply_the_field_projection(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(categories_api, "get_DB", lambda: db)
+    monkeypatch.setattr(accounts_api, "get_DB", lambda: db)
+    db.localcategories.insert_one({
+        "budgetId": "b", "name": "Rent", "balance": 0, "activity": -5,
+        "target": {"goal_type": "NEED", "goal_target": 800000, "goal_creation_month": "2024-01-01"},
+    })
+    db.localaccounts.insert_one({"budgetId": "b", "name": "Checking", "balance": 1000, "type": "checking"})
+
+    assert get_categories_for_budget("b", PROJECTION_CATEGORY_FIELDS) == [
+        {"name": "Rent", "balance": 0, "target": {"goal_type": "NEED", "goal_target": 800000}}
+    ]
+    assert get_accounts_for_budget("b", PROJECTION_ACCOUNT_FIELDS) == [{"name": "Checking", "balance": 1000}]
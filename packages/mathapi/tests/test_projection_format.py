@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+from app.projection_format import COMPACT_FIELDS, ValueDictionary, compact_payload, compact_projection, parse_fields
+
+BASELINE = {
+    "2025-01-01": {
+        "balance": 100.0,
+        "balance_diff": 100.0,
+        "changes": [{"reason": "Initial Balance", "amount": 100.0, "category": "Starting Balance"}],
+    },
+    "2025-01-03": {
+        "balance": 60.0,
+        "balance_diff": -40.0,
+        "changes": [
+            {"reason": "Scheduled Transaction", "amount": -30.0, "category": "Rent", "payee": "Landlord"},
+            {"reason": "Need Category", "amount": -10.0, "category": "Groceries"},
+        ],
+    },
+}
+
+
+def _decode(compact, dictionary):
+    """Rebuild the dict-based shape from a compact projection."""
+    changes = compact["changes"]
+    columns = [column for column in changes if column not in ("day", "amount")]
+    rebuilt = {}
+    for row, day in enumerate(changes["day"]):
+        change = {"amount": changes["amount"][row]}
+        for column in columns:
+            value = dictionary[column][changes[column][row]]
+            if value is not None:
+                change[column] = value
+        rebuilt.setdefault(day, []).append(change)
+    return rebuilt
+
+
+def test_parse_fields():
+    assert parse_fields(None) == COMPACT_FIELDS
+    assert parse_fields("changes, balance") == ("balance", "changes")
+    with pytest.raises(ValueError):
+        parse_fields("balance,payees")
+    with pytest.raises(ValueError):
+        parse_fields(",")
+
+
+def test_value_dictionary_codes_are_stable():
+    dictionary = ValueDictionary()
+    codes = [dictionary.encode("category", value) for value in ("Rent", "Food", "Rent", None)]
+    assert codes == [0, 1, 0, 2]
+    assert dictionary.values == {"category": ["Rent", "Food", None]}
+
+
+def test_compact_projection_round_trips():
+    dictionary = ValueDictionary()
+    compact = compact_projection(BASELINE, date(2025, 1, 1), dictionary)
+
+    assert compact["days"] == [0, 2]
+    assert compact["balance"] == [100.0, 60.0]
+    assert compact["balance_diff"] == [100.0, -40.0]
+    assert compact["changes"]["day"] == [0, 2, 2]
+    assert _decode(compact, dictionary.values) == {0: BASELINE["2025-01-01"]["changes"], 2: BASELINE["2025-01-03"]["changes"]}
+
+
+def test_compact_payload_shares_the_dictionary_and_keeps_errors():
+    simulation = dict(BASELINE)
+    simulation["2025-01-05"] = {
+        "balance": 10.0,
+        "balance_diff": -50.0,
+        "changes": [{"reason": "Car", "amount": -50.0, "category": "Rent", "is_simulation": True}],
+    }
+    payload = compact_payload(iter([
+        ("baseline", BASELINE), ("simulation_car", simulation), ("simulation_bad", {"error": "Error: bad"})
+    ]))
+
+    assert payload["start_date"] == "2025-01-01"
+    car = payload["scenarios"]["simulation_car"]
+    assert car["days"] == [0, 2, 4]
+    # Only the simulated change is listed on top of the baseline's
+    assert car["changes_base"] is True
+    assert car["changes"]["day"] == [4]
+    assert payload["scenarios"]["simulation_bad"] == {"error": "Error: bad"}
+    assert payload["dictionary"]["category"] == ["Starting Balance", "Rent", "Groceries"]
+    assert payload["dictionary"]["is_simulation"] == [True]
+
+
+def test_projection_that_does_not_extend_the_base_lists_all_changes():
+    other = {"2025-01-01": {"balance": 5.0, "balance_diff": 5.0, "changes": [{"reason": "Other", "amount": 5.0}]}}
+    compact = compact_projection(other, date(2025, 1, 1), ValueDictionary(), base=BASELINE)
+    assert "changes_base" not in compact
+    assert compact["changes"]["amount"] == [5.0]
+
+
+def test_fields_select_the_balance_line_only():
+    payload = compact_payload([("baseline", BASELINE)], fields=("balance",))
+    assert payload["scenarios"]["baseline"] == {"days": [0, 2], "balance": [100.0, 60.0]}
+    assert "dictionary" not in payload
@@ -0,0 +1,91 @@
+import asyncio
+
+import mongomock
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.rate_limit import RateLimitExceeded, SharedTokenBucket, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_bursts_up_to_capacity_then_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_tokens_refill_up_to_capacity_only():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire(2)
+    clock.now += 100
+
+    assert bucket.try_acquire(2)
+    assert not bucket.try_acquire()
+
+
+def test_acquire_fails_instead_of_waiting_longer_than_max_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.1, capacity=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=5)
+    assert clock.sleeps == []
+    assert bucket.acquire(max_wait=None) == pytest.approx(10)
+
+
+def test_acquire_async_waits_on_the_event_loop():
+    bucket = TokenBucket(rate=100, capacity=1)
+    bucket.acquire()
+    assert asyncio.run(bucket.acquire_async()) > 0
+
+
+def test_rejects_invalid_configuration():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, capacity=1).acquire(2)
+
+
+def test_shared_buckets_with_one_key_draw_from_one_budget():
+    clock = FakeClock()
+    collection = mongomock.MongoClient().db.ratelimits
+    first, second = (
+        SharedTokenBucket("ynab:token", rate=1, capacity=2, collection=lambda: collection, clock=clock, sleep=clock.sleep)
+        for _ in range(2)
+    )
+    other = SharedTokenBucket("ynab:other", rate=1, capacity=2, collection=lambda: collection, clock=clock)
+
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    assert other.try_acquire()
+    assert second.acquire() == pytest.approx(1)
+    assert collection.count_documents({}) == 2
+
+
+def test_shared_bucket_falls_back_to_the_process_without_mongo():
+    def unavailable():
+        raise ServerSelectionTimeoutError("no MongoDB")
+
+    clock = FakeClock()
+    bucket = SharedTokenBucket("ynab:token", rate=1, capacity=1, collection=unavailable, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1)
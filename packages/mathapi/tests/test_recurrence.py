@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+from datetime import date
+from app.recurrence import expand_occurrences, expand_scheduled_transaction
+
+def as_strings(occurrences):
+    return np.datetime_as_string(occurrences, unit="D").tolist()
+
+def test_never_expands_to_date_next_only():
+    result = expand_occurrences("never", "2025-03-10", "2025-03-01", "2025-12-31")
+
+    assert as_strings(result) == ["2025-03-10"]
+
+def test_missing_frequency_behaves_like_never():
+    result = expand_occurrences(None, "2025-03-10", "2025-03-01", "2025-12-31")
+
+    assert as_strings(result) == ["2025-03-10"]
+
+@pytest.mark.parametrize("frequency,expected", [
+    ("weekly", ["2025-03-03", "2025-03-10", "2025-03-17", "2025-03-24", "2025-03-31"]),
+    ("everyOtherWeek", ["2025-03-03", "2025-03-17", "2025-03-31"]),
+    ("every4Weeks", ["2025-03-03", "2025-03-31"]),
+])
+def test_day_based_frequencies(frequency, expected):
+    result = expand_occurrences(frequency, "2025-03-03", "2025-03-01", "2025-04-01")
+
+    assert as_strings(result) == expected
+
+def test_monthly_clamps_to_month_end():
+    result = expand_occurrences("monthly", "2025-01-31", "2025-01-01", "2025-05-31", date_first="2024-10-31")
+
+    assert as_strings(result) == ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30", "2025-05-31"]
+
+def test_monthly_keeps_anchor_day_after_short_month():
+    result = expand_occurrences("monthly", "2025-02-28", "2025-02-01", "2025-04-30", date_first="2025-01-31")
+
+    assert as_strings(result) == ["2025-02-28", "2025-03-31", "2025-04-30"]
+
+@pytest.mark.parametrize("frequency,expected", [
+    ("every3Months", ["2025-01-15", "2025-04-15", "2025-07-15", "2025-10-15", "2026-01-15"]),
+    ("twiceAYear", ["2025-01-15", "2025-07-15", "2026-01-15"]),
+    ("yearly", ["2025-01-15", "2026-01-15"]),
+])
+def test_month_based_frequencies(frequency, expected):
+    result = expand_occurrences(frequency, "2025-01-15", "2025-01-01", "2026-01-31")
+
+    assert as_strings(result) == expected
+
+def test_twice_a_month():
+    result = expand_occurrences("twiceAMonth", "2025-01-05", "2025-01-01", "2025-02-28")
+
+    assert as_strings(result) == ["2025-01-05", "2025-01-20", "2025-02-05", "2025-02-20"]
+
+def test_occurrences_are_limited_to_horizon():
+    result = expand_occurrences("weekly", "2025-01-01", "2025-01-10", "2025-01-20")
+
+    assert as_strings(result) == ["2025-01-15"]
+
+def test_expansion_is_cached_per_schedule_and_horizon():
+    txn = {"id": "rent", "date_next": "2025-01-01", "frequency": "monthly"}
+
+    first = expand_scheduled_transaction(txn, date(2025, 1, 1), date(2025, 12, 31))
+    second = expand_scheduled_transaction(dict(txn), "2025-01-01", "2025-12-31")
+    longer = expand_scheduled_transaction(txn, date(2025, 1, 1), date(2026, 12, 31))
+
+    assert first is second
+    assert len(first) == 12
+    assert len(longer) == 24
+    assert not first.flags.writeable
@@ -0,0 +1,46 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app.projection_format import COMPACT_FIELDS
+from app.request_params import (
+    DEFAULT_DAYS_AHEAD, DEFAULT_ENGINE, MAX_DAYS_AHEAD, parse_budget_id, parse_data_params, parse_days_ahead,
+    parse_probabilistic_params, parse_scenarios_params,
+)
+
+
+def test_parse_days_ahead():
+    assert parse_days_ahead(None) == DEFAULT_DAYS_AHEAD
+    assert parse_days_ahead("0") == 0
+    assert parse_days_ahead(str(MAX_DAYS_AHEAD)) == MAX_DAYS_AHEAD
+    for value in ("-1", str(MAX_DAYS_AHEAD + 1), "1.5", "soon"):
+        with pytest.raises(ValueError, match="days_ahead"):
+            parse_days_ahead(value)
+
+
+def test_parse_data_params_defaults_and_choices():
+    assert parse_data_params(MultiDict({"budget_id": "b"})) == (
+        "b", DEFAULT_DAYS_AHEAD, DEFAULT_ENGINE, "json", "scenario", COMPACT_FIELDS
+    )
+    assert parse_data_params(MultiDict({
+        "budget_id": "b", "days_ahead": "30", "engine": "dict", "format": "compact", "fields": "balance",
+    })) == ("b", 30, "dict", "compact", "scenario", ("balance",))
+    for args in ({}, {"budget_id": "b", "engine": "fast"}, {"budget_id": "b", "format": "xml"},
+                 {"budget_id": "b", "chunk": "week"}, {"budget_id": "b", "fields": "payees"}):
+        with pytest.raises(ValueError):
+            parse_data_params(MultiDict(args))
+
+
+def test_parse_probabilistic_params():
+    assert parse_probabilistic_params(MultiDict({"budget_id": "b", "paths": "10", "seed": "3"}))[2:] == (10, 3)
+    with pytest.raises(ValueError, match="paths and seed"):
+        parse_probabilistic_params(MultiDict({"budget_id": "b", "seed": "x"}))
+
+
+def test_parse_scenarios_params():
+    budget_uuid, days_ahead, scenarios = parse_scenarios_params(
+        MultiDict({"budget_id": "b", "days_ahead": "10"}), {"scenarios": [[{"date": "2030-01-01", "amount": "-5"}]]}
+    )
+    assert (budget_uuid, days_ahead, list(scenarios)) == ("b", 10, ["scenario_0"])
+    assert scenarios["scenario_0"][0]["amount"] == -5.0
+    with pytest.raises(ValueError, match="budget_id"):
+        parse_budget_id(MultiDict())
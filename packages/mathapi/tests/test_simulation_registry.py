@@ -0,0 +1,73 @@
+import json
+import os
+import pytest
+from app.simulation_registry import SimulationRegistry, normalize_simulation
+
+def write_simulation(folder, name, entries):
+    path = folder / name
+    path.write_text(json.dumps(entries))
+    return path
+
+def test_normalize_simulation_converts_amounts():
+    result = normalize_simulation([{"date": "2025-02-03", "amount": "2000", "category": "Salary"}])
+
+    assert result == [{"date": "2025-02-03", "amount": 2000.0, "reason": "Simulation", "category": "Salary"}]
+
+@pytest.mark.parametrize("entries", [
+    {"date": "2025-02-03", "amount": "1"},
+    [{"amount": "1"}],
+    [{"date": "03/02/2025", "amount": "1"}],
+    [{"date": "2025-02-03", "amount": "lots"}],
+    ["not an object"],
+])
+def test_normalize_simulation_rejects_invalid_entries(entries):
+    with pytest.raises(ValueError):
+        normalize_simulation(entries)
+
+def test_registry_loads_valid_files_only(tmp_path):
+    write_simulation(tmp_path, "salary.json", [{"date": "2025-02-03", "amount": "-500"}])
+    write_simulation(tmp_path, "broken.json", [{"date": "someday", "amount": "1"}])
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    simulations = SimulationRegistry(str(tmp_path)).all()
+
+    assert list(simulations) == ["salary.json"]
+    assert simulations["salary.json"][0]["amount"] == -500.0
+
+def test_registry_rereads_only_modified_files(tmp_path, monkeypatch):
+    path = write_simulation(tmp_path, "salary.json", [{"date": "2025-02-03", "amount": "-500"}])
+    registry = SimulationRegistry(str(tmp_path))
+    registry.all()
+
+    loads = []
+    original_load = json.load
+    monkeypatch.setattr(json, "load", lambda file: loads.append(file.name) or original_load(file))
+
+    registry.all()
+    assert loads == []
+
+    path.write_text(json.dumps([{"date": "2025-02-03", "amount": "-700"}]))
+    os.utime(path, ns=(1, 10 ** 18))
+
+    assert registry.all()["salary.json"][0]["amount"] == -700.0
+    assert len(loads) == 1
+
+def test_registry_put_and_delete(tmp_path):
+    registry = SimulationRegistry(str(tmp_path))
+
+    file_name, entries = registry.put("bonus", [{"date": "2025-06-01", "amount": 1000}])
+
+    assert file_name == "bonus.json"
+    assert (tmp_path / "bonus.json").exists()
+    assert registry.get("bonus") == entries
+    assert SimulationRegistry(str(tmp_path)).get("bonus.json") == entries
+
+    assert registry.delete("bonus") is True
+    assert registry.delete("bonus") is False
+    assert registry.all() == {}
+
+def test_registry_rejects_unsafe_names(tmp_path):
+    registry = SimulationRegistry(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        registry.put("../outside", [])
@@ -0,0 +1,48 @@
+from datetime import date
+import json
+
+import pytest
+
+from app.prediction_api import CADENCE_CONFIG
+from benchmarks.run import main, project_all
+from benchmarks.synthetic import FREQUENCIES, generate_budget
+
+TODAY = date(2025, 1, 15)
+
+
+def test_same_seed_gives_the_same_budget():
+    assert generate_budget(seed=3, today=TODAY, scenarios=2) == generate_budget(seed=3, today=TODAY, scenarios=2)
+    assert generate_budget(seed=3, today=TODAY) != generate_budget(seed=4, today=TODAY)
+
+
+def test_budget_covers_every_cadence_and_frequency():
+    budget = generate_budget(seed=0, categories=40, scheduled=len(FREQUENCIES), scenarios=3, today=TODAY)
+
+    targets = [category["target"] for category in budget["categories"] if "target" in category]
+    combinations = {(target["goal_cadence"], "goal_target_month" in target) for target in targets}
+    assert {(cadence, has_month) for cadence in CADENCE_CONFIG for has_month in (False, True)} <= combinations
+    assert {transaction["frequency"] for transaction in budget["future_transactions"]} == set(FREQUENCIES)
+    assert len(budget["simulations"]) == 3
+    assert all(isinstance(entry["amount"], float) for entries in budget["simulations"].values() for entry in entries)
+
+
+def test_engines_agree_on_a_synthetic_budget():
+    budget = generate_budget(seed=1, categories=20, scheduled=20, scenarios=2, days_ahead=120, today=TODAY)
+    dict_results = project_all("dict", budget, 120, TODAY)
+    columnar_results = project_all("columnar", budget, 120, TODAY)
+
+    assert len(dict_results) == 3
+    assert next(iter(dict_results[0])) == TODAY.isoformat()
+    for expected, actual in zip(dict_results, columnar_results):
+        assert list(actual) == list(expected)
+        assert [day["balance"] for day in actual.values()] == pytest.approx([day["balance"] for day in expected.values()])
+
+
+def test_benchmark_report_records_the_fixed_start_date(tmp_path):
+    output = tmp_path / "results.json"
+    main(["--quick", "--sweep", "horizon", "--engine", "columnar", "--repeat", "1", "--today", "2024-03-01",
+          "--output", str(output)])
+
+    report = json.loads(output.read_text())
+    assert report["today"] == "2024-03-01"
+    assert [result["days_ahead"] for result in report["results"]] == [30, 365]
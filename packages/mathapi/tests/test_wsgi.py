@@ -0,0 +1,26 @@
+from app.wsgi import cpu_limit, worker_count
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_cpu_limit_cgroup_v2(tmp_path):
+    assert cpu_limit(_write(tmp_path, "cpu.max", "150000 100000\n")) == 2
+    assert cpu_limit(_write(tmp_path, "cpu.max", "50000 100000\n")) == 1
+    assert cpu_limit(_write(tmp_path, "cpu.max", "max 100000\n")) is None
+
+
+def test_cpu_limit_cgroup_v1(tmp_path):
+    missing = str(tmp_path / "missing")
+    period = _write(tmp_path, "period", "100000")
+    assert cpu_limit(missing, _write(tmp_path, "quota", "400000"), period) == 4
+    assert cpu_limit(missing, _write(tmp_path, "quota", "-1"), period) is None
+    assert cpu_limit(missing, missing, missing) is None
+
+
+def test_worker_count_prefers_web_concurrency():
+    assert worker_count({"WEB_CONCURRENCY": "3"}) == 3
+    assert worker_count({}) >= 1
@@ -0,0 +1,103 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import threading
+
+import pytest
+import requests
+from urllib3.response import HTTPResponse
+
+import app.ynab_api as ynab_api
+from app.ynab_api import MAX_RETRY_AFTER_SECONDS, YnabClient
+
+
+@pytest.fixture
+def ynab_server():
+    """Local HTTP server answering with the queued statuses, then 200; records the requests it received."""
+    calls = []
+    statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self):
+            calls.append((self.command, self.path, self.headers.get("Authorization")))
+            status = statuses.pop(0) if statuses else 200
+            body = json.dumps({"data": {"ok": True}} if status == 200 else {"error": {}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_PUT = do_PATCH = _respond
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = YnabClient(
+        base_url=f"http://127.0.0.1:{server.server_port}/v1/", access_token="token", backoff_factor=0
+    )
+    yield client, calls, statuses
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_share_a_session_with_timeouts(monkeypatch):
+    client = YnabClient(base_url="https://ynab.test/v1/", access_token="token", connect_timeout=1, read_timeout=2)
+    sent = []
+
+    def send(method, url, **kwargs):
+        sent.append((method, url, kwargs))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"data": {}}'
+        return response
+
+    monkeypatch.setattr(client.session, "request", send)
+    assert client.request("GET", "budgets/1/accounts") == {"data": {}}
+
+    method, url, kwargs = sent[0]
+    assert (method, url) == ("GET", "https://ynab.test/v1/budgets/1/accounts")
+    assert kwargs["timeout"] == (1, 2)
+    assert client.session.headers["Authorization"] == "Bearer token"
+    assert client.session.get_adapter("https://ynab.test")._pool_maxsize > 1
+
+
+def test_retry_after_is_capped():
+    retry = YnabClient(base_url="https://ynab.test/v1/", access_token="token").session.get_adapter("https://").max_retries
+
+    assert retry.get_retry_after(HTTPResponse(status=429, headers={"Retry-After": "600"})) == MAX_RETRY_AFTER_SECONDS
+    assert retry.get_retry_after(HTTPResponse(status=429, headers={"Retry-After": "2"})) == 2
+    assert retry.get_retry_after(HTTPResponse(status=503)) is None
+
+
+def test_idempotent_requests_are_retried(ynab_server):
+    client, calls, statuses = ynab_server
+    statuses.extend([429, 503])
+
+    assert client.request("GET", "budgets/1/transactions") == {"data": {"ok": True}}
+    assert len(calls) == 3
+    assert calls[0] == ("GET", "/v1/budgets/1/transactions", "Bearer token")
+
+
+def test_patch_is_not_retried(ynab_server):
+    client, calls, statuses = ynab_server
+    statuses.append(503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.request("PATCH", "budgets/1/transactions", {"transactions": []})
+    assert len(calls) == 1
+
+
+def test_fetch_errors_carry_the_http_status(ynab_server, monkeypatch):
+    client, _, statuses = ynab_server
+    monkeypatch.setattr(ynab_api, "get_client", lambda: client)
+    statuses.append(400)
+
+    result = ynab_api.fetch("PATCH", "budgets/1/transactions", {"transactions": []})
+    assert result["status"] == 400
+    assert "400" in result["error"]
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.ynab_async import AsyncYnabClient, retry_delay
+
+
+def _client(handler, max_retries=2):
+    return AsyncYnabClient(
+        base_url="https://ynab.test/v1/", access_token="token", max_retries=max_retries,
+        backoff_factor=0, transport=httpx.MockTransport(handler),
+    )
+
+
+def test_request_retries_rate_limited_responses():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"data": {"ok": True}})
+
+    result = asyncio.run(_client(handler).request("GET", "budgets/1/transactions"))
+
+    assert result == {"data": {"ok": True}}
+    assert len(calls) == 2
+    assert str(calls[0].url) == "https://ynab.test/v1/budgets/1/transactions"
+    assert calls[0].headers["Authorization"] == "Bearer token"
+
+
+def test_request_raises_after_exhausting_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_client(handler, max_retries=1).request("GET", "budgets"))
+    assert len(calls) == 2
+
+
+def test_retry_delay_prefers_retry_after():
+    assert retry_delay(httpx.Response(429, headers={"Retry-After": "2"}), 0, 0.5) == 2.0
+    assert retry_delay(httpx.Response(429, headers={"Retry-After": "3600"}), 0, 0.5) == 30.0
+    assert retry_delay(None, 2, 0.5) == 2.0
+
+
+def test_patch_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_client(handler).request("PATCH", "budgets/1/transactions", {"transactions": []}))
+    assert len(calls) == 1
@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ServerSelectionTimeoutError
+
+import app.ynab_cache as ynab_cache
+from app.ynab_cache import TRANSACTIONS_SYNC_DAYS, get_uncategorized_transactions, sync_path, sync_resource
+
+
+def bulk_write(collection, operations, ordered=True):
+    # mongomock does not accept the bulk operations of recent pymongo versions
+    errors = []
+    for index, operation in enumerate(operations):
+        try:
+            collection.replace_one(operation._filter, operation._doc, upsert=operation._upsert)
+        except DuplicateKeyError as e:
+            errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+    if errors:
+        raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(mongomock.Collection, "bulk_write", bulk_write)
+    database = mongomock.MongoClient().db
+    monkeypatch.setattr(ynab_cache, "get_DB", lambda: database)
+    monkeypatch.setattr(ynab_cache, "_indexes_ready", False)
+    return database
+
+
+@pytest.fixture
+def ynab(monkeypatch):
+    """Stub of ynab_api.fetch answering with the queued responses and recording the requested paths."""
+    paths = []
+    responses = []
+
+    def fetch(method, path, body=None):
+        paths.append(path)
+        return responses.pop(0)
+
+    monkeypatch.setattr(ynab_cache.ynab_api, "fetch", fetch)
+    return paths, responses
+
+
+def transactions_response(transactions, knowledge):
+    return {"data": {"transactions": transactions, "server_knowledge": knowledge}}
+
+
+def test_first_transactions_sync_is_bounded():
+    since = (date.today() - timedelta(days=TRANSACTIONS_SYNC_DAYS)).isoformat()
+
+    assert sync_path("b", "transactions", None) == f"budgets/b/transactions?since_date={since}"
+    assert sync_path("b", "scheduled_transactions", None) == "budgets/b/scheduled_transactions"
+    assert sync_path("b", "transactions", {"serverKnowledge": 7}) == "budgets/b/transactions?last_knowledge_of_server=7"
+
+
+def test_sync_merges_deltas_and_round_trips_server_knowledge(db, ynab):
+    paths, responses = ynab
+    responses.append(transactions_response([
+        {"id": "t1", "payee_name": "Shop", "category_id": None},
+        {"id": "t2", "payee_name": "Rent", "category_id": "c1", "category_name": "Rent"},
+    ], knowledge=10))
+    responses.append(transactions_response([
+        {"id": "t1", "payee_name": "Shop", "category_id": "c2", "category_name": "Groceries"},
+        {"id": "t2", "deleted": True},
+        {"id": "t3", "payee_name": "Cafe", "category_id": None},
+    ], knowledge=12))
+
+    assert sync_resource("b", "transactions") == 2
+    assert sync_resource("b", "transactions") == 3
+
+    assert "since_date=" in paths[0]
+    assert paths[1] == "budgets/b/transactions?last_knowledge_of_server=10"
+    cached = {doc["id"]: doc["data"] for doc in db.ynabcacheitems.find({"deleted": {"$ne": True}})}
+    assert set(cached) == {"t1", "t3"}
+    assert ynab_cache.cached_items("b", "transactions") == [cached["t1"], cached["t3"]]
+    assert cached["t1"]["category_name"] == "Groceries"
+    assert db.ynabsyncstate.find_one()["serverKnowledge"] == 12
+
+
+def test_stale_server_knowledge_is_not_stored(db, ynab):
+    _, responses = ynab
+    db.ynabsyncstate.insert_one({"budgetUuid": "b", "resource": "transactions", "serverKnowledge": 20})
+    ynab_cache.ensure_cache_indexes()
+    # A concurrent sync that started before the stored one answers with older knowledge
+    responses.append(transactions_response([{"id": "t1", "payee_name": "Shop", "category_id": None}], knowledge=15))
+
+    assert sync_resource("b", "transactions") == 1
+    assert db.ynabsyncstate.count_documents({}) == 1
+    assert db.ynabsyncstate.find_one()["serverKnowledge"] == 20
+
+
+def test_items_of_a_stale_concurrent_sync_are_not_stored(db, ynab):
+    _, responses = ynab
+    # The faster sync stored the new category and the deletion from newer knowledge
+    responses.append(transactions_response([
+        {"id": "t1", "payee_name": "Shop", "category_id": "c2", "category_name": "Groceries"},
+        {"id": "t2", "deleted": True},
+    ], knowledge=20))
+    sync_resource("b", "transactions")
+    # The slower sync answers from older knowledge, still with the old versions
+    responses.append(transactions_response([
+        {"id": "t1", "payee_name": "Shop", "category_id": None},
+        {"id": "t2", "payee_name": "Rent", "category_id": None},
+        {"id": "t3", "payee_name": "Cafe", "category_id": None},
+    ], knowledge=15))
+
+    assert sync_resource("b", "transactions") == 3
+
+    cached = {item["id"]: item for item in ynab_cache.cached_items("b", "transactions")}
+    assert set(cached) == {"t1", "t3"}
+    assert cached["t1"]["category_name"] == "Groceries"
+
+
+def test_only_stale_item_writes_are_ignored():
+    assert ynab_cache.only_stale_writes_failed(BulkWriteError({"writeErrors": [{"code": 11000}]}))
+    assert not ynab_cache.only_stale_writes_failed(BulkWriteError({"writeErrors": [{"code": 11000}, {"code": 121}]}))
+    assert not ynab_cache.only_stale_writes_failed(BulkWriteError({"writeConcernErrors": [{"code": 64}]}))
+
+
+def test_uncategorized_transactions_come_from_the_cache(db, ynab):
+    _, responses = ynab
+    responses.append(transactions_response([
+        {"id": "t1", "payee_name": "Shop", "category_id": None},
+        {"id": "t2", "payee_name": "Transfer : Savings", "category_id": None},
+        {"id": "t3", "payee_name": "Rent", "category_id": "c1", "category_name": "Rent"},
+        {"id": "t4", "payee_name": "Cafe", "category_id": "c0", "category_name": "Uncategorized"},
+    ], knowledge=1))
+
+    assert sorted(t["id"] for t in get_uncategorized_transactions("b")) == ["t1", "t4"]
+
+
+def test_uncategorized_transactions_fall_back_to_ynab_without_mongo(monkeypatch):
+    def unavailable():
+        raise ServerSelectionTimeoutError("no MongoDB")
+
+    monkeypatch.setattr(ynab_cache, "get_DB", unavailable)
+    monkeypatch.setattr(ynab_cache, "_indexes_ready", False)
+    monkeypatch.setattr(ynab_cache.ynab_api, "get_uncategorized_transactions", lambda budget_uuid: [{"id": "direct"}])
+
+    assert get_uncategorized_transactions("b") == [{"id": "direct"}]
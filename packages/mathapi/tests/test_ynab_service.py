@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+import app.ynab_service as ynab_service
+
+CATEGORIES = [{"name": "Groceries", "uuid": "c1"}, {"name": "Fuel", "uuid": "c2"}]
+
+
+def _transactions(count):
+    return [{"id": f"t{index}", "payee_name": f"Payee {index}", "amount": -1000, "memo": None} for index in range(count)]
+
+
+def _patch(monkeypatch, transactions, batches, fetch):
+    monkeypatch.setattr(ynab_service, "get_objectid_for_budget", lambda budget_uuid: "budget-id")
+    monkeypatch.setattr(ynab_service, "get_uncategorized_transactions", lambda budget_uuid: transactions)
+    monkeypatch.setattr(ynab_service, "get_categories_for_budget", lambda budget_id, fields: CATEGORIES)
+    monkeypatch.setattr(ynab_service, "iter_categorize", lambda budget_uuid, transactions, categories: iter(batches))
+    monkeypatch.setattr(ynab_service, "fetch", fetch)
+    remembered = []
+    monkeypatch.setattr(ynab_service, "remember_categories", lambda budget_uuid, applied: remembered.extend(applied))
+    return remembered
+
+
+def _suggestion(name, source="openai"):
+    return {"category_name": name, "source": source, "confidence": None}
+
+
+def test_results_are_ordered_with_a_status_per_transaction(monkeypatch):
+    transactions = _transactions(5)
+    batches = [
+        ([transactions[3]], {"t3": _suggestion("Fuel", "memo")}, None),
+        (transactions[:3], {"t0": _suggestion("Groceries"), "t1": _suggestion("Unknown"), "t2": _suggestion("Fuel")}, None),
+        ([transactions[4]], {}, RuntimeError("OpenAI is down")),
+    ]
+
+    requests = []
+
+    def fetch(method, path, body, rate_limited=False):
+        assert rate_limited  # Category updates draw from the shared YNAB budget
+        requests.append((method, path))
+        if method == "PATCH":
+            ids = [update["id"] for update in body["transactions"] if update["id"] != "t2"]
+            return {"data": {"transaction_ids": ids}}
+        return {"error": "HTTP error occurred: 404"}
+
+    remembered = _patch(monkeypatch, transactions, batches, fetch)
+    results = ynab_service.apply_suggested_categories_service("budget")
+
+    assert [result["transaction_id"] for result in results] == ["t0", "t1", "t2", "t3", "t4"]
+    assert [result["status"] for result in results] == ["updated", "skipped", "failed", "updated", "failed"]
+    assert results[3]["source"] == "memo"
+    assert "OpenAI is down" in results[4]["error"]
+    assert sorted(transaction["id"] for transaction, _ in remembered) == ["t0", "t3"]
+    # One bulk update, and a single update only for the transaction it rejected
+    assert requests == [("PATCH", "budgets/budget/transactions"), ("PUT", "budgets/budget/transactions/t2")]
+
+
+def test_invalid_bulk_update_falls_back_to_single_updates(monkeypatch):
+    transactions = _transactions(3)
+    batches = [(transactions, {t["id"]: _suggestion("Groceries") for t in transactions}, None)]
+    methods = []
+
+    def fetch(method, path, body, rate_limited=False):
+        methods.append(method)
+        if method == "PATCH":
+            return {"error": "HTTP error occurred: 400", "status": 400}
+        assert body["transaction"]["category_id"] == "c1"
+        return {"data": {}}
+
+    _patch(monkeypatch, transactions, batches, fetch)
+    results = ynab_service.apply_suggested_categories_service("budget")
+
+    assert [result["status"] for result in results] == ["updated"] * 3
+    assert methods == ["PATCH", "PUT", "PUT", "PUT"]
+
+
+@pytest.mark.parametrize("error", [
+    {"error": "HTTP error occurred: 429", "status": 429},
+    {"error": "HTTP error occurred: 503", "status": 503},
+    {"error": "An unexpected error occurred"},
+])
+def test_unavailable_bulk_update_fails_the_chunk_without_single_updates(monkeypatch, error):
+    transactions = _transactions(3)
+    batches = [(transactions, {t["id"]: _suggestion("Groceries") for t in transactions}, None)]
+    methods = []
+
+    def fetch(method, path, body, rate_limited=False):
+        methods.append(method)
+        return error
+
+    remembered = _patch(monkeypatch, transactions, batches, fetch)
+    results = ynab_service.apply_suggested_categories_service("budget")
+
+    assert [result["status"] for result in results] == ["failed"] * 3
+    assert results[0]["error"] == error["error"]
+    assert methods == ["PATCH"]
+    assert remembered == []
+
+
+def test_updated_transaction_ids_falls_back_to_saved_transactions():
+    assert ynab_service.updated_transaction_ids({"data": {"transaction_ids": ["a", "b"]}}) == {"a", "b"}
+    assert ynab_service.updated_transaction_ids({"data": {"transactions": [{"id": "a"}]}}) == {"a"}
+    assert ynab_service.updated_transaction_ids({}) == set()
+
+
+def test_bulk_updates_run_concurrently(monkeypatch):
+    monkeypatch.setattr(ynab_service, "YNAB_BULK_UPDATE_SIZE", 2)
+    transactions = _transactions(16)
+    batches = [(transactions, {t["id"]: _suggestion("Groceries") for t in transactions}, None)]
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fetch(method, path, body, rate_limited=False):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return {"data": {"transaction_ids": [update["id"] for update in body["transactions"]]}}
+
+    _patch(monkeypatch, transactions, batches, fetch)
+    results = ynab_service.apply_suggested_categories_service("budget")
+
+    assert all(result["status"] == "updated" for result in results)
+    assert 1 < peak[0] <= ynab_service.CATEGORIZATION_MAX_WORKERS